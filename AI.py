@@ -3,106 +3,94 @@
 AI System for ANDO.5 Platform
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import json
-import re
-from datetime import datetime
-from typing import Dict, List, Tuple
+import itertools
+import logging
+import os
+import time
+import uuid
+from typing import Dict, Iterator, List, Tuple
+
+import config
+from cache import LRUCache
+from codec import FastJSONProvider, Field, RequestError, Schema, dumps
+from history import HistoryStore
+from historylog import ConversationLog
+from knowledge import KnowledgeSnapshot, KnowledgeStore
+from metrics import AppMetrics
+from prefork import read_statuses
+from prepared import PreparedResponse
+from profiling import RequestProfiler, StackSampler
+from ratelimit import ConcurrencyLimiter, RateLimiter
+from recommender import difficulty_level, render_matches
+from search import SearchIndex
+from sessions import SessionStore
+from textnorm import fold, normalize, tokenize, tokenize_pattern
 
 app = Flask(__name__)
-CORS(app)
-
-# قاعدة بيانات المعارف والردود الذكية
-KNOWLEDGE_BASE = {
-    "python": {
-        "description": "لغة برمجة قوية وسهلة التعلم",
-        "uses": ["تحليل البيانات", "الذكاء الاصطناعي", "تطوير الويب", "أتمتة المهام"],
-        "resources": [
-            {"name": "Python.org", "url": "https://python.org"},
-            {"name": "Real Python", "url": "https://realpython.com"}
-        ],
-        "difficulty": "سهلة",
-        "popularity": "⭐⭐⭐⭐⭐"
-    },
-    "javascript": {
-        "description": "لغة الويب الأساسية",
-        "uses": ["تطوير الواجهات الأمامية", "تطوير الخوادم", "تطبيقات الويب", "ألعاب الويب"],
-        "resources": [
-            {"name": "MDN Web Docs", "url": "https://mdn.org"},
-            {"name": "JavaScript.info", "url": "https://javascript.info"}
-        ],
-        "difficulty": "متوسطة",
-        "popularity": "⭐⭐⭐⭐⭐"
-    },
-    "cpp": {
-        "description": "لغة برمجة عالية الأداء",
-        "uses": ["تطوير الألعاب", "البرامج النظام", "التطبيقات عالية الأداء", "الروبوتات"],
-        "resources": [
-            {"name": "cplusplus.com", "url": "https://cplusplus.com"},
-            {"name": "C++ Reference", "url": "https://en.cppreference.com"}
-        ],
-        "difficulty": "صعبة",
-        "popularity": "⭐⭐⭐⭐"
-    }
-}
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['X-Session-Id'])
 
-# نماذج الأسئلة الشائعة والإجابات
-INTENTS = {
-    "greeting": {
-        "patterns": ["السلام عليكم", "صباح", "مساء", "أهلا", "hello", "hi"],
-        "responses": [
-            "وعليكم السلام! 👋 كيف يمكنني مساعدتك؟",
-            "مرحباً بك! 😊 هل تريد معلومات عن لغات البرمجة؟",
-            "أهلاً وسهلاً! 🎉 ما الذي تريد تعلمه؟"
-        ]
-    },
-    "help": {
-        "patterns": ["مساعدة", "ساعد", "احتاج", "help", "assist"],
-        "responses": [
-            "يمكنني مساعدتك في اختيار لغة برمجة مناسبة وتقديم موارد تعليمية! 📚",
-            "أنا هنا لتقديم المشورة حول البرمجة والبدء في التعلم! 💻"
-        ]
-    },
-    "language_info": {
-        "patterns": ["ما هي", "معلومات", "أخبر", "حدث", "info"],
-        "responses": [
-            "اختر لغة من القائمة لمعرفة المزيد عنها! 🔍"
-        ]
-    },
-    "recommendation": {
-        "patterns": ["ايهما أفضل", "أيهما", "أنسب", "recommend", "أنصح"],
-        "responses": [
-            "يعتمد على هدفك! Python رائعة للمبتدئين، JavaScript للويب، C++ للأداء العالية 🎯"
-        ]
-    }
-}
+logger = logging.getLogger("ando5")
+
+# قاعدة المعارف والنوايا تُحمَّل من ملف JSON ويُعاد تحميلها عند تعديله
+KNOWLEDGE_BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   config.KNOWLEDGE_BASE_FILE)
+knowledge_store = KnowledgeStore(KNOWLEDGE_BASE_PATH)
+
+def clip_response(message: str) -> str:
+    """قص الرد إلى MAX_RESPONSE_LENGTH حرفاً"""
+    if len(message) <= config.MAX_RESPONSE_LENGTH:
+        return message
+    return message[:config.MAX_RESPONSE_LENGTH - 1] + "…"
 
 class AIAssistant:
-    """مساعد ذكي للإجابة على الأسئلة"""
+    """مساعد ذكي للإجابة على الأسئلة
+
+    آمن للاستخدام من عدة خيوط: حالة المطابقة لقطة ثابتة تُقرأ بدون أقفال،
+    والسجل وذاكرة التخزين المؤقت موزعان على أجزاء بأقفال مستقلة.
+    """
     
-    def __init__(self):
-        self.conversation_history = []
-        self.user_preferences = {}
+    def __init__(self, store: KnowledgeStore, metrics: AppMetrics = None):
+        # سجل محدود لكل جلسة بدلاً من قائمة عامة مشتركة، مع نسخة دائمة مؤجلة الكتابة
+        log = None
+        if config.HISTORY_LOG_FILE:
+            log = ConversationLog(config.HISTORY_LOG_FILE,
+                                  flush_interval=config.HISTORY_LOG_FLUSH_INTERVAL,
+                                  batch_size=config.HISTORY_LOG_BATCH_SIZE,
+                                  durability=config.HISTORY_LOG_DURABILITY,
+                                  retention=config.HISTORY_LOG_RETENTION_DAYS * 86400,
+                                  prune_interval=config.HISTORY_LOG_PRUNE_INTERVAL)
+        self.history = HistoryStore(config.MAX_CONVERSATION_HISTORY,
+                                    config.MAX_HISTORY_RECORDS, log=log)
+        # الاسم وآخر لغة لكل جلسة حتى لا يعيد العميل إرسالها
+        self.user_preferences = SessionStore(config.SESSION_MEMORY_BUDGET, config.SESSION_TTL)
+        # الفهارس تعيش في لقطة المخزن وتُستبدل كاملة عند إعادة التحميل
+        self.store = store
+        # نتائج التحليل للأسئلة المتكررة، تُمسح عند تغيير قاعدة المعارف
+        self.response_cache = LRUCache(config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_TTL)
+        store.add_listener(lambda snapshot: self.response_cache.clear())
+        # بحث BM25 في الوصف والاستخدامات، يُحدَّث للمدخلات المتغيرة فقط عند إعادة التحميل
+        self.search_index = SearchIndex()
+        self.search_index.sync(store.current().knowledge_base)
+        store.add_listener(lambda snapshot: self.search_index.sync(snapshot.knowledge_base))
+        # أزمنة مراحل get_response وتوزيع درجات الثقة
+        self.metrics = metrics or AppMetrics()
     
     def clean_text(self, text: str) -> str:
-        """تنظيف النص من الرموز الخاصة"""
-        text = text.strip().lower()
-        text = re.sub(r'[^\w\s]', '', text)
-        return text
+        """تنظيف النص من الرموز الخاصة وتوحيد الحروف العربية"""
+        return normalize(text)
     
-    def extract_language(self, text: str) -> str:
+    def extract_language(self, text: str, snapshot: KnowledgeSnapshot = None) -> str:
         """استخراج اسم اللغة من النص"""
-        text_lower = text.lower()
-        for lang in KNOWLEDGE_BASE.keys():
-            if lang in text_lower:
-                return lang
-        return None
+        snapshot = snapshot or self.store.current()
+        return snapshot.language_matcher.find(text)
     
     def calculate_similarity(self, text: str, pattern: str) -> float:
         """حساب درجة التشابه بين نصين (Similarity Score)"""
-        text_words = set(self.clean_text(text).split())
-        pattern_words = set(self.clean_text(pattern).split())
+        text_words = tokenize(text)
+        pattern_words = tokenize_pattern(pattern)
         
         if not pattern_words:
             return 0
@@ -111,24 +99,96 @@ class AIAssistant:
         similarity = intersection / len(pattern_words)
         return similarity
     
-    def find_best_intent(self, user_input: str) -> Tuple[str, float]:
+    def find_best_intent(self, user_input: str, snapshot: KnowledgeSnapshot = None) -> Tuple[str, float]:
         """البحث عن أفضل نية (Intent) تطابق مدخل المستخدم"""
-        best_intent = None
-        best_score = 0
+        snapshot = snapshot or self.store.current()
+        return snapshot.intent_matcher.match(user_input)
+    
+    def get_response(self, user_input: str, session_id: str = "default") -> Dict:
+        """الحصول على الرد الذكي للمستخدم"""
+        # لقطة واحدة طوال الطلب حتى لو أُعيد التحميل أثناءه
+        snapshot = self.store.current()
+        intent, confidence, language = self.analyze(user_input, snapshot)
+        language = self.apply_context(session_id, intent, language, snapshot)
+        started = time.perf_counter()
+        response = self.build_response(intent, confidence, language, snapshot, user_input)
+        self.metrics.observe_stage("message_rendering", time.perf_counter() - started)
+        
+        # حفظ في السجل
+        self.history.append(session_id, user_input, response["message"])
         
-        for intent, data in INTENTS.items():
-            for pattern in data["patterns"]:
-                score = self.calculate_similarity(user_input, pattern)
-                if score > best_score:
-                    best_score = score
-                    best_intent = intent
+        return response
+    
+    def stream_response(self, user_input: str, session_id: str = "default",
+                        chunk_size: int = 80) -> Iterator[Tuple[str, Dict]]:
+        """الرد على مراحل (الحدث، البيانات): النية أولاً، ثم أجزاء الرسالة، ثم البيانات
+
+        الرد كاملاً يُبنى ويُسجَّل قبل أول حدث، فتظهر أخطاؤه قبل بدء البث ويبقى في
+        السجل حتى لو انقطع العميل في منتصفه.
+        """
+        snapshot = self.store.current()
+        intent, confidence, language = self.analyze(user_input, snapshot)
+        language = self.apply_context(session_id, intent, language, snapshot)
+        started = time.perf_counter()
+        response = self.build_response(intent, confidence, language, snapshot, user_input)
+        self.metrics.observe_stage("message_rendering", time.perf_counter() - started)
+        message = response["message"]
+        self.history.append(session_id, user_input, message)
+        
+        yield "meta", {"status": "success", "intent": intent, "confidence": confidence}
+        for start in range(0, len(message), chunk_size):
+            yield "chunk", {"text": message[start:start + chunk_size]}
         
-        return best_intent, best_score
+        yield "final", {key: response[key] for key in ("data", "suggestions", "results") if key in response}
     
-    def get_response(self, user_input: str) -> Dict:
-        """الحصول على الرد الذكي للمستخدم"""
-        intent, confidence = self.find_best_intent(user_input)
+    def get_responses(self, messages: List[str], session_id: str = "default") -> List[Dict]:
+        """الردود على دفعة رسائل مع تقييم النوايا دفعة واحدة"""
+        snapshot = self.store.current()
+        matches = snapshot.intent_matcher.match_batch(messages)
         
+        responses = []
+        for user_input, (intent, confidence) in zip(messages, matches):
+            language = self.extract_language(user_input, snapshot)
+            language = self.apply_context(session_id, intent, language, snapshot)
+            response = self.build_response(intent, confidence, language, snapshot, user_input)
+            self.history.append(session_id, user_input, response["message"])
+            responses.append(response)
+        return responses
+    
+    def apply_context(self, session_id: str, intent: str, language: str,
+                      snapshot: KnowledgeSnapshot) -> str:
+        """حفظ اللغة المذكورة في الجلسة، أو استخدام آخر لغة لسؤال متابعة بلا لغة"""
+        if language:
+            self.user_preferences.update(session_id, language=language, last_intent=intent)
+            return language
+        if intent == "language_info":
+            state = self.user_preferences.get(session_id)
+            if state is not None and state.language in snapshot.knowledge_base:
+                return state.language
+        return language
+    
+    def analyze(self, user_input: str, snapshot: KnowledgeSnapshot) -> Tuple[str, float, str]:
+        """النية ودرجة الثقة واللغة المذكورة، مخزنة حسب النص المُطبَّع"""
+        observe = self.metrics.observe_stage
+        started = time.perf_counter()
+        # fold وليس normalize حتى تبقى الرموز التي تحتاجها أسماء اللغات (c++)
+        normalized = " ".join(fold(user_input).split())
+        observe("normalization", time.perf_counter() - started)
+        
+        def compute():
+            started = time.perf_counter()
+            intent, confidence = self.find_best_intent(normalized, snapshot)
+            scored = time.perf_counter()
+            language = self.extract_language(normalized, snapshot)
+            observe("intent_scoring", scored - started)
+            observe("language_extraction", time.perf_counter() - scored)
+            return intent, confidence, language
+        
+        return self.response_cache.get_or_compute((snapshot.version, normalized), compute)
+    
+    def build_response(self, intent: str, confidence: float, language: str,
+                       snapshot: KnowledgeSnapshot, user_input: str = "") -> Dict:
+        """بناء الرد بعد معرفة النية ودرجة الثقة واللغة"""
         response = {
             "status": "success",
             "confidence": confidence,
@@ -136,47 +196,70 @@ class AIAssistant:
         }
         
         # التحقق من وجود لغة مذكورة
-        language = self.extract_language(user_input)
-        
         if language and confidence > 0.3:
-            response["message"] = self.get_language_info(language)
-            response["data"] = KNOWLEDGE_BASE[language]
+            kind = "language"
+            response["message"] = self.get_language_info(language, snapshot)
+            response["data"] = snapshot.knowledge_base[language]
         elif intent and confidence > 0.3:
             import random
-            response["message"] = random.choice(INTENTS[intent]["responses"])
+            kind = "intent"
+            response["message"] = random.choice(snapshot.intents[intent]["responses"])
         else:
-            response["message"] = "عذراً، لم أفهم سؤالك. جرب السؤال بطريقة أخرى! 🤔"
-            response["suggestions"] = [
-                "اسأل عن Python",
-                "اسأل عن JavaScript",
-                "اسأل عن C++",
-                "طلب توصية"
-            ]
-        
-        # حفظ في السجل
-        self.conversation_history.append({
-            "user": user_input,
-            "assistant": response["message"],
-            "timestamp": datetime.now().isoformat()
-        })
+            # لا نية ولا لغة: اللغات التي يطابق وصفها أو استخداماتها السؤال
+            results = (self.search(user_input, config.SEARCH_FALLBACK_RESULTS, snapshot,
+                                   config.SEARCH_MIN_SCORE) if user_input else [])
+            if results:
+                kind = "search"
+                response["message"] = "🔎 هذه اللغات تطابق سؤالك:\n" + "\n".join(
+                    f"- **{r['name'].upper()}**: {r['description']}" for r in results)
+                response["results"] = results
+            else:
+                kind = "fallback"
+                response["message"] = "عذراً، لم أفهم سؤالك. جرب السؤال بطريقة أخرى! 🤔"
+                response["suggestions"] = [
+                    "اسأل عن Python",
+                    "اسأل عن JavaScript",
+                    "اسأل عن C++",
+                    "طلب توصية"
+                ]
         
+        response["message"] = clip_response(response["message"])
+        self.metrics.observe_reply(kind, confidence)
         return response
     
-    def get_language_info(self, language: str) -> str:
+    def search(self, query: str, limit: int = 10, snapshot: KnowledgeSnapshot = None,
+               min_score: float = 0.0) -> List[Dict]:
+        """أفضل اللغات لنص البحث حسب BM25"""
+        knowledge_base = (snapshot or self.store.current()).knowledge_base
+        results = []
+        for name, score in self.search_index.search(query, limit):
+            # الفهرس قد يسبق لقطة الطلب بتحديث أثناء إعادة التحميل
+            if score >= min_score and name in knowledge_base:
+                info = knowledge_base[name]
+                results.append({"name": name, "score": round(score, 4),
+                                "description": info.get("description"), "uses": info.get("uses")})
+        return results
+    
+    def get_language_info(self, language: str, snapshot: KnowledgeSnapshot = None) -> str:
         """الحصول على معلومات عن اللغة"""
-        if language in KNOWLEDGE_BASE:
-            info = KNOWLEDGE_BASE[language]
-            msg = f"🔹 **{language.upper()}**\n"
-            msg += f"{info['description']}\n"
-            msg += f"الصعوبة: {info['difficulty']}\n"
-            msg += f"الشهرة: {info['popularity']}"
-            return msg
-        return "لم أجد معلومات عن هذه اللغة!"
+        snapshot = snapshot or self.store.current()
+        return snapshot.language_messages.get(language, "لم أجد معلومات عن هذه اللغة!")
     
-    def get_recommendations(self, preferences: Dict) -> Dict:
-        """توصيات ذكية بناءً على التفضيلات"""
-        name = preferences.get("name", "الصديق")
-        language = preferences.get("language", "")
+    def get_recommendations(self, preferences: Dict, session_id: str = None,
+                            uses: List[str] = None, max_difficulty: int = None,
+                            limit: int = None) -> Dict:
+        """توصيات ذكية بناءً على التفضيلات، مع إكمال الناقص منها من الجلسة
+
+        بدون أهداف (uses أو max_difficulty) ومع لغة مختارة يبقى الرد كما هو؛ وإلا
+        تُرتَّب كل اللغات حسب الأهداف وتُضاف قائمتها في "matches".
+        """
+        if session_id is not None:
+            state = self.user_preferences.update(session_id, **preferences)
+            preferences = state.to_dict()
+        name = preferences.get("name") or "الصديق"
+        language = preferences.get("language") or ""
+        snapshot = self.store.current()
+        recommendations = snapshot.recommendations
         
         recommendation = {
             "greeting": f"مرحباً {name}! 👋",
@@ -184,59 +267,223 @@ class AIAssistant:
             "recommendation": ""
         }
         
-        if language and language in KNOWLEDGE_BASE:
-            lang_data = KNOWLEDGE_BASE[language]
-            recommendation["recommendation"] = f"""
-            اخترت {language} - اختيار رائع! 🎯
-            
-            {lang_data['description']}
-            
-            استخدامات: {', '.join(lang_data['uses'])}
-            
-            مستوى الصعوبة: {lang_data['difficulty']}
-            
-            الموارد الموصى بها:
-            """ + "\n            ".join([f"- {r['name']}" for r in lang_data['resources']])
+        if language and language in recommendations and not (uses or max_difficulty):
+            recommendation["recommendation"] = recommendations[language]
         else:
-            recommendation["recommendation"] = """
-            لم تختر لغة محددة حتى الآن! 
-            كل اللغات مهمة وقيمة حسب الهدف:
-            - Python: الأفضل للمبتدئين والعلوم
-            - JavaScript: أساسي للويب
-            - C++: للأداء العالية والنظم
-            """
+            matches = snapshot.recommender.recommend(uses or (), max_difficulty,
+                                                     limit or config.RECOMMEND_RESULTS)
+            recommendation["recommendation"] = clip_response(render_matches(matches, bool(uses)))
+            recommendation["matches"] = matches
         
         return recommendation
 
 # إنشاء instance من المساعد
-ai_assistant = AIAssistant()
+app_metrics = AppMetrics(config.METRICS_MULTIPROC_DIR)
+app_metrics.start_flushing(config.METRICS_FLUSH_INTERVAL)
+ai_assistant = AIAssistant(knowledge_store, app_metrics)
+if config.SESSION_SNAPSHOT_FILE:
+    ai_assistant.user_preferences.start_snapshotting(config.SESSION_SNAPSHOT_FILE,
+                                                     config.SESSION_SNAPSHOT_INTERVAL)
+if config.KNOWLEDGE_HOT_RELOAD:
+    knowledge_store.start_watching(config.KNOWLEDGE_RELOAD_INTERVAL)
 
 # ======================== API Routes ========================
 
+def get_session_id() -> str:
+    """معرّف جلسة العميل من الترويسة X-Session-Id، أو معرّف جديد يُعاد في نفس الترويسة
+
+    لا يُستخدم عنوان العميل: كل من خلف نفس الوكيل أو NAT كانوا سيتشاركون السجل
+    والتفضيلات (ومنها الاسم).
+    """
+    session_id = request.headers.get('X-Session-Id', '').strip()
+    if session_id and len(session_id) <= 64:
+        return session_id
+    if 'session_id' not in g:
+        g.session_id = uuid.uuid4().hex
+    return g.session_id
+
+# ======================== Instrumentation ========================
+
+@app.before_request
+def start_timer():
+    """بداية قياس زمن الطلب"""
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """تسجيل عدد الطلبات وزمنها لكل مسار"""
+    if 'session_id' in g:
+        response.headers['X-Session-Id'] = g.session_id
+    started = g.pop('started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        app_metrics.observe_request(route, request.method, response.status_code,
+                                    time.perf_counter() - started)
+        if response.status_code >= 500:
+            logger.error("%s %s -> %s", request.method, request.path, response.status_code)
+    return response
+
+# التحليل عند الطلب يغلّف تطبيق WSGI كاملاً حتى يشمل توجيه Flask والترميز
+if config.PROFILE_TOKEN:
+    app.wsgi_app = RequestProfiler(app.wsgi_app, config.PROFILE_TOKEN,
+                                   top=config.PROFILE_TOP_FUNCTIONS,
+                                   sample_interval=config.PROFILE_REQUEST_SAMPLE_INTERVAL)
+stack_sampler = (StackSampler(config.PROFILE_SAMPLER_DIR, config.PROFILE_SAMPLER_INTERVAL,
+                              config.PROFILE_SAMPLER_WINDOW, config.PROFILE_SAMPLER_KEEP)
+                 if config.PROFILE_SAMPLER_DIR else None)
+
+# ======================== Admission Control ========================
+
+rate_limiter = (RateLimiter(config.RATE_LIMIT_REQUESTS, config.RATE_LIMIT_PERIOD,
+                            config.RATE_LIMIT_STORAGE)
+                if config.ENABLE_RATE_LIMITING else None)
+concurrency_limiter = (ConcurrencyLimiter(config.MAX_CONCURRENT_REQUESTS)
+                       if config.MAX_CONCURRENT_REQUESTS else None)
+
+@app.before_request
+def admission_control():
+    """رفض الطلب مبكراً عند تجاوز حد السرعة أو حد الطلبات المتزامنة"""
+    if not request.path.startswith('/api/') or request.method == 'OPTIONS':
+        return None
+    
+    if concurrency_limiter is not None:
+        if not concurrency_limiter.try_acquire():
+            response = jsonify({
+                "status": "error",
+                "message": "الخادم مشغول حالياً، حاول مرة أخرى بعد قليل"
+            })
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        g.admitted = True
+    
+    if rate_limiter is not None:
+        allowed, retry_after = rate_limiter.check(request.remote_addr or "unknown")
+        if not allowed:
+            response = jsonify({
+                "status": "error",
+                "message": f"طلبات كثيرة جداً، حاول بعد {retry_after} ثانية"
+            })
+            response.headers['Retry-After'] = str(retry_after)
+            response.headers['X-RateLimit-Limit'] = str(config.RATE_LIMIT_REQUESTS)
+            return response, 429
+    
+    return None
+
+@app.teardown_request
+def release_admission(error=None):
+    """تحرير مكان الطلب في حد الطلبات المتزامنة"""
+    if g.pop('admitted', False):
+        concurrency_limiter.release()
+
+# الردود الثابتة تُحوَّل إلى bytes مرة واحدة عند بدء التشغيل
+HEALTH = {
+    "status": "online",
+    "message": "AI Server is running",
+    "version": config.API_VERSION
+}
+HEALTH_RESPONSE = PreparedResponse(HEALTH)
+
+SUGGESTIONS = [
+    "ما هي Python؟",
+    "ايهما أفضل Python أم JavaScript؟",
+    "كيف أبدأ مع البرمجة؟",
+    "معلومات عن C++",
+    "ما أفضل لغة للمبتدئين؟"
+]
+
+SUGGESTIONS_RESPONSE = PreparedResponse({
+    "status": "success",
+    "suggestions": SUGGESTIONS
+}, cache_control=f"public, max-age={config.STATIC_CACHE_MAX_AGE}")
+
+LANGUAGE_NOT_FOUND_RESPONSE = PreparedResponse({
+    "status": "error",
+    "message": "لغة غير موجودة!"
+}, status=404)
+
+# مخططات أجسام الطلبات: تُرفض بـ 400 أو 413 قبل الوصول إلى المساعد
+CHAT_REQUEST = Schema(
+    Field('message', required=True, max_length=config.MAX_MESSAGE_LENGTH,
+          empty_message="الرسالة فارغة!"),
+    max_bytes=config.MAX_REQUEST_SIZE)
+BATCH_REQUEST = Schema(
+    Field('messages', list, required=True, max_length=config.MAX_BATCH_SIZE,
+          empty_message="يجب إرسال قائمة رسائل!"),
+    max_bytes=config.MAX_BATCH_REQUEST_SIZE)
+LANGUAGE_REQUEST = Schema(Field('language', max_length=64), max_bytes=config.MAX_REQUEST_SIZE)
+SEARCH_REQUEST = Schema(
+    Field('q', required=True, max_length=config.MAX_MESSAGE_LENGTH, empty_message="نص البحث فارغ!"),
+    max_bytes=config.MAX_REQUEST_SIZE)
+RECOMMEND_REQUEST = Schema(Field('name', max_length=100), Field('language', max_length=64),
+                           Field('uses', kind=list, max_length=config.MAX_RECOMMEND_USES),
+                           Field('difficulty', max_length=32),
+                           max_bytes=config.MAX_REQUEST_SIZE)
+
+@app.errorhandler(RequestError)
+def request_error(error):
+    """رد الطلب المرفوض أثناء فك الترميز"""
+    return jsonify({
+        "status": "error",
+        "message": error.message
+    }), error.status
+
 @app.route('/api/health', methods=['GET'])
 def health():
-    """فحص صحة الخادم"""
-    return jsonify({
-        "status": "online",
-        "message": "AI Server is running",
-        "version": "1.0"
-    }), 200
+    """فحص صحة الخادم، مع حالة كل عامل عند التشغيل بعدة عمليات (launcher.py --production)"""
+    if not config.WORKER_STATUS_DIR:
+        return HEALTH_RESPONSE.to_response()
+    workers = read_statuses(config.WORKER_STATUS_DIR, config.WORKER_TIMEOUT)
+    response = jsonify({
+        **HEALTH,
+        "worker": os.getpid(),
+        "healthy_workers": sum(worker["healthy"] for worker in workers),
+        "workers": workers
+    })
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """معالجة رسالة المحادثة"""
+    user_message = CHAT_REQUEST.decode(request)['message']
+    try:
+        response = ai_assistant.get_response(user_message, get_session_id())
+        return jsonify(response), 200
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"خطأ في المعالجة: {str(e)}"
+        }), 500
+
+@app.route('/api/chat/stream', methods=['GET', 'POST'])
+def chat_stream():
+    """الرد على رسالة كأحداث Server-Sent Events"""
+    if request.method == 'POST':
+        user_message = CHAT_REQUEST.decode(request)['message']
+    else:
+        user_message = CHAT_REQUEST.validate(request.args)['message']
     try:
-        data = request.json
-        user_message = data.get('message', '').strip()
+        events = ai_assistant.stream_response(user_message, get_session_id())
+        # المولّد كسول: أول حدث يُطلب هنا حتى تصل أخطاء التحليل والبناء كرد 500 عادي
+        first = next(events)
         
-        if not user_message:
-            return jsonify({
-                "status": "error",
-                "message": "الرسالة فارغة!"
-            }), 400
+        def generate():
+            # بعد إرسال الترويسات لا يمكن تغيير الحالة، فالخطأ يصل كحدث أخير
+            try:
+                for event, payload in itertools.chain([first], events):
+                    yield f"event: {event}\ndata: {dumps(payload)}\n\n"
+            except Exception as e:
+                logger.exception("chat stream failed")
+                error = {"status": "error", "message": f"خطأ في المعالجة: {str(e)}"}
+                yield f"event: error\ndata: {dumps(error)}\n\n"
+                return
+            yield "event: done\ndata: {}\n\n"
         
-        response = ai_assistant.get_response(user_message)
-        return jsonify(response), 200
+        return Response(generate(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
     
     except Exception as e:
         return jsonify({
@@ -244,41 +491,123 @@ def chat():
             "message": f"خطأ في المعالجة: {str(e)}"
         }), 500
 
-@app.route('/api/language-info', methods=['POST'])
-def language_info():
-    """الحصول على معلومات عن لغة برمجة"""
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """معالجة دفعة من رسائل المحادثة في طلب واحد"""
+    messages = BATCH_REQUEST.decode(request)['messages']
     try:
-        data = request.json
-        language = data.get('language', '').lower()
+        texts = [m.strip() if isinstance(m, str) else '' for m in messages]
+        # نفس حد /api/chat لكل رسالة؛ الرسالة الطويلة تأخذ خطأها ولا تصل إلى المطابقة أو السجل
+        too_long = {
+            "status": "error",
+            "message": f"الحد الأقصى للحقل message هو {config.MAX_MESSAGE_LENGTH} حرفاً"
+        }
+        valid = [i for i, text in enumerate(texts) if text and len(text) <= config.MAX_MESSAGE_LENGTH]
+        answers = ai_assistant.get_responses([texts[i] for i in valid], get_session_id())
         
-        if language not in KNOWLEDGE_BASE:
-            return jsonify({
-                "status": "error",
-                "message": "لغة غير موجودة!"
-            }), 404
+        responses = [too_long if len(text) > config.MAX_MESSAGE_LENGTH else {
+            "status": "error",
+            "message": "الرسالة فارغة!"
+        } for text in texts]
+        for i, answer in zip(valid, answers):
+            responses[i] = answer
         
         return jsonify({
             "status": "success",
-            "data": KNOWLEDGE_BASE[language]
+            "responses": responses
         }), 200
     
     except Exception as e:
         return jsonify({
             "status": "error",
-            "message": str(e)
+            "message": f"خطأ في المعالجة: {str(e)}"
         }), 500
 
+@app.route('/api/language-info', methods=['POST'])
+def language_info():
+    """الحصول على معلومات عن لغة برمجة"""
+    return language_info_response(LANGUAGE_REQUEST.decode(request)['language'] or '')
+
+@app.route('/api/language-info/<language>', methods=['GET'])
+def language_info_get(language):
+    """معلومات اللغة عبر GET حتى يمكن تخزينها في المتصفح و CDN"""
+    return language_info_response(language)
+
+def language_info_response(language: str):
+    """الرد الجاهز للغة أو 404"""
+    payload = knowledge_store.current().language_payloads.get(language.lower())
+    return (payload or LANGUAGE_NOT_FOUND_RESPONSE).to_response()
+
+@app.route('/api/languages', methods=['GET'])
+def languages():
+    """كتالوج اللغات صفحة بصفحة مع مرشحات من الفهارس الثانوية وتحديد الحقول"""
+    args = request.args
+    limit = args.get('limit', str(config.LANGUAGES_PAGE_SIZE))
+    min_popularity = args.get('min_popularity', '0')
+    if not limit.isdigit() or not min_popularity.isdigit():
+        raise RequestError("limit و min_popularity يجب أن يكونا أعداداً صحيحة")
+    
+    catalog = knowledge_store.current().catalog
+    fields = None
+    if 'fields' in args:
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = set(fields) - catalog.fields
+        if unknown:
+            raise RequestError(f"حقول غير معروفة: {', '.join(sorted(unknown))}")
+    
+    items, next_cursor = catalog.query(
+        max(1, min(int(limit), config.MAX_LANGUAGES_PAGE_SIZE)),
+        cursor=args.get('cursor') or None,
+        difficulty=args.get('difficulty') or None,
+        use=args.get('use') or None,
+        min_popularity=int(min_popularity),
+        fields=fields)
+    return jsonify({
+        "status": "success",
+        "languages": items,
+        "next_cursor": next_cursor
+    }), 200
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """بحث نصي في أوصاف اللغات واستخداماتها ومواردها"""
+    query = SEARCH_REQUEST.validate(request.args)['q']
+    limit = request.args.get('limit', str(config.SEARCH_RESULTS))
+    if not limit.isdigit():
+        raise RequestError("limit يجب أن يكون عدداً صحيحاً")
+    
+    results = ai_assistant.search(query, max(1, min(int(limit), config.MAX_SEARCH_RESULTS)))
+    return jsonify({
+        "status": "success",
+        "query": query,
+        "results": results
+    }), 200
+
 @app.route('/api/recommend', methods=['POST'])
 def recommend():
     """الحصول على توصيات ذكية"""
+    data = RECOMMEND_REQUEST.decode(request)
+    uses = data['uses'] or []
+    if not all(isinstance(use, str) and len(use) <= 100 for use in uses):
+        raise RequestError("الحقل uses يجب أن يكون قائمة نصوص قصيرة")
+    max_difficulty = None
+    if data['difficulty']:
+        max_difficulty = difficulty_level(data['difficulty'])
+        if max_difficulty is None:
+            raise RequestError("الحقل difficulty يجب أن يكون سهلة أو متوسطة أو صعبة")
+    limit = request.args.get('limit', str(config.RECOMMEND_RESULTS))
+    if not limit.isdigit():
+        raise RequestError("limit يجب أن يكون عدداً صحيحاً")
     try:
-        data = request.json
+        # الحقول الناقصة تُؤخذ من تفضيلات الجلسة المحفوظة
         preferences = {
-            "name": data.get('name', 'الصديق'),
-            "language": data.get('language', '').lower()
+            "name": data['name'],
+            "language": data['language'].lower() if data['language'] else None
         }
         
-        recommendation = ai_assistant.get_recommendations(preferences)
+        recommendation = ai_assistant.get_recommendations(
+            preferences, get_session_id(), uses=uses, max_difficulty=max_difficulty,
+            limit=max(1, min(int(limit), config.MAX_RECOMMEND_RESULTS)))
         return jsonify({
             "status": "success",
             "data": recommendation
@@ -293,24 +622,48 @@ def recommend():
 @app.route('/api/suggestions', methods=['GET'])
 def suggestions():
     """الحصول على اقتراحات الأسئلة"""
-    suggestions = [
-        "ما هي Python؟",
-        "ايهما أفضل Python أم JavaScript؟",
-        "كيف أبدأ مع البرمجة؟",
-        "معلومات عن C++",
-        "ما أفضل لغة للمبتدئين؟"
-    ]
+    return SUGGESTIONS_RESPONSE.to_response()
+
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    """إحصائيات التشغيل (ذاكرة التخزين المؤقت والسجل)"""
     return jsonify({
         "status": "success",
-        "suggestions": suggestions
+        "cache": ai_assistant.response_cache.stats(),
+        "history": {
+            "sessions": ai_assistant.history.session_count(),
+            "records": len(ai_assistant.history),
+            "log": ai_assistant.history.log.stats() if ai_assistant.history.log else None
+        },
+        "sessions": ai_assistant.user_preferences.stats(),
+        "search": ai_assistant.search_index.stats(),
+        "knowledge_version": knowledge_store.current().version
     }), 200
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """المقاييس بصيغة Prometheus النصية"""
+    return app.response_class(app_metrics.render(),
+                              mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/history', methods=['GET'])
 def history():
-    """الحصول على سجل المحادثة"""
+    """سجل المحادثة صفحة بصفحة: بدون cursor الأحدث، ثم next_cursor للأقدم"""
+    limit = request.args.get('limit', str(config.HISTORY_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    if not limit.isdigit() or (cursor is not None and not cursor.isdigit()):
+        return jsonify({
+            "status": "error",
+            "message": "limit و cursor يجب أن يكونا أعداداً صحيحة"
+        }), 400
+    
+    limit = max(1, min(int(limit), config.MAX_HISTORY_PAGE_SIZE))
+    records, next_cursor = ai_assistant.history.page(
+        get_session_id(), limit, int(cursor) if cursor is not None else None)
     return jsonify({
         "status": "success",
-        "history": ai_assistant.conversation_history[-10:]  # آخر 10 رسائل
+        "history": records,
+        "next_cursor": next_cursor
     }), 200
 
 @app.errorhandler(404)
@@ -329,12 +682,46 @@ def server_error(error):
         "message": "خطأ في الخادم"
     }), 500
 
+def warm_up() -> Dict:
+    """تسخين الفهارس والذاكرة المؤقتة قبل أول طلب (يستدعيها كل عامل في prefork.py)
+
+    الأسئلة المقترحة وسؤال عن كل لغة (حتى WARMUP_MESSAGES) تُحلَّل وتُخزَّن نتائجها في
+    ذاكرة الردود، فتُقرأ صفحات اللقطة المُجمَّعة وفهارس المطابقة التقريبية. وتُحسب
+    مساهمات كلمات البحث، ويُجرَّب الترتيب والكتالوج، ويُبنى جدول توجيه Flask.
+    """
+    started = time.perf_counter()
+    snapshot = knowledge_store.current()
+    languages = list(snapshot.knowledge_base)[:max(0, config.WARMUP_MESSAGES - len(SUGGESTIONS))]
+    messages = SUGGESTIONS + [f"ما هي {language}؟" for language in languages]
+    for message in messages:
+        ai_assistant.analyze(message, snapshot)
+    terms = ai_assistant.search_index.warm()
+    snapshot.recommender.recommend(k=config.RECOMMEND_RESULTS)
+    snapshot.catalog.query(config.LANGUAGES_PAGE_SIZE)
+    app.url_map.update()
+    return {
+        "messages": len(messages),
+        "search_terms": terms,
+        "ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+def setup_logging():
+    """تفعيل السجلات حسب إعدادات LOG_* في config.py"""
+    if not config.ENABLE_LOGGING:
+        return
+    logging.basicConfig(
+        level=getattr(logging, config.LOG_LEVEL, logging.INFO),
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+        handlers=[logging.StreamHandler(), logging.FileHandler(config.LOG_FILE, encoding="utf-8")]
+    )
+
 if __name__ == '__main__':
+    setup_logging()
     print("=" * 50)
     print("🤖 ANDO.5 AI Assistant Server")
     print("=" * 50)
     print("🚀 Server starting on http://localhost:5000")
-    print("📚 Knowledge Base Loaded with 3 Programming Languages")
+    print(f"📚 Knowledge Base Loaded with {len(knowledge_store.current().knowledge_base)} Programming Languages")
     print("=" * 50)
     
     # تشغيل الخادم
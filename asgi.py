@@ -0,0 +1,315 @@
+"""
+نقطة دخول ASGI مع قناة WebSocket للمحادثة
+ASGI entry point with a WebSocket chat channel for ANDO.5 AI
+
+تطبيق ASGI خام بدون مكتبات إضافية:
+- /ws/chat: اتصال WebSocket واحد لكل نافذة محادثة. الاتصال الخامل كوروتين
+  ينتظر فقط، فتتحمل عملية واحدة آلاف الجلسات المفتوحة.
+- كل المسارات الأخرى (ومنها REST الحالية) تمر على تطبيق Flask نفسه عبر جسر
+  WSGI في مجمع خيوط، للعملاء الذين لا يدعمون WebSocket.
+
+بروتوكول القناة (رسائل JSON نصية):
+    العميل: {"type": "chat", "id": 1, "message": "...", "stream": false}
+            {"type": "pong"} أو {"type": "ping"}
+    الخادم: {"type": "reply", "id": 1, ...نفس رد /api/chat}
+            {"type": "meta" | "chunk" | "final" | "done", "id": 1, ...} عند stream
+            {"type": "ping"} نبضة دورية، {"type": "error", "id": ..., "message": ...}
+
+الضغط الخلفي: طابور محدود لكل اتصال؛ عند امتلائه يتوقف الخادم عن قراءة الاتصال
+فيتباطأ العميل عبر TCP بدلاً من تراكم الرسائل في الذاكرة.
+
+التشغيل:
+    pip install uvicorn
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import io
+import logging
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+import config
+from AI import CHAT_REQUEST, ai_assistant, app, app_metrics, rate_limiter
+from codec import RequestError, dumps, dumps_bytes, loads
+
+logger = logging.getLogger("ando5.asgi")
+
+WS_PATH = "/ws/chat"
+# حد جسم طلب HTTP في الجسر قبل تمريره إلى Flask، بنفس حدود مخططات AI.py
+BODY_LIMITS = {"/api/chat/batch": config.MAX_BATCH_REQUEST_SIZE}
+
+_executor = ThreadPoolExecutor(max_workers=config.ASGI_THREADS, thread_name_prefix="asgi-worker")
+
+
+class _State:
+    """حالة العملية: عدد الاتصالات وحد الحسابات المتزامنة (يُنشأ داخل حلقة asyncio)"""
+
+    connections = 0
+    compute_slots: Optional[asyncio.Semaphore] = None
+
+
+async def application(scope, receive, send):
+    """تطبيق ASGI الرئيسي"""
+    if scope["type"] == "websocket":
+        if scope["path"] == WS_PATH:
+            await websocket_chat(scope, receive, send)
+        else:
+            await send({"type": "websocket.close", "code": 1008})
+    elif scope["type"] == "http":
+        await wsgi_bridge(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await lifespan(receive, send)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if ai_assistant.history.log is not None:
+                ai_assistant.history.log.close()
+            _executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# ======================== WebSocket ========================
+
+def _session_id(scope) -> str:
+    """معرّف الجلسة من ?session= أو ترويسة X-Session-Id، وإلا جلسة خاصة بهذا الاتصال"""
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    session_id = (query.get("session") or [""])[0].strip()
+    if not session_id:
+        headers = dict(scope.get("headers") or [])
+        session_id = headers.get(b"x-session-id", b"").decode("latin-1").strip()
+    if session_id and len(session_id) <= 64:
+        return session_id
+    return uuid.uuid4().hex
+
+
+async def websocket_chat(scope, receive, send):
+    """قناة محادثة دائمة: قارئ يملأ طابوراً محدوداً ومعالج يرد بالترتيب"""
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if _State.connections >= config.WS_MAX_CONNECTIONS:
+        # 1013: حاول لاحقاً
+        await send({"type": "websocket.close", "code": 1013})
+        return
+    if _State.compute_slots is None:
+        _State.compute_slots = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS or sys.maxsize)
+
+    await send({"type": "websocket.accept"})
+    _State.connections += 1
+    session_id = _session_id(scope)
+    # الحد لكل عنوان كما في HTTP؛ معرّف الجلسة يختاره العميل فلا يصلح مفتاحاً له
+    client = scope.get("client")
+    client_key = client[0] if client else "unknown"
+    inbox: asyncio.Queue = asyncio.Queue(maxsize=config.WS_MAX_PENDING)
+    last_seen = [time.monotonic()]
+    send_lock = asyncio.Lock()
+
+    async def send_json(payload: Dict) -> None:
+        async with send_lock:
+            await send({"type": "websocket.send", "text": dumps(payload)})
+
+    async def reader():
+        while True:
+            event = await receive()
+            if event["type"] == "websocket.disconnect":
+                return
+            last_seen[0] = time.monotonic()
+            text = event.get("text")
+            if text is None and event.get("bytes") is not None:
+                text = event["bytes"].decode("utf-8", "replace")
+            # put ينتظر عند امتلاء الطابور، فلا نقرأ المزيد حتى يفرغ مكان
+            await inbox.put(text)
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(config.WS_HEARTBEAT_INTERVAL)
+            if time.monotonic() - last_seen[0] > config.WS_IDLE_TIMEOUT:
+                await send({"type": "websocket.close", "code": 1001})
+                return
+            await send_json({"type": "ping"})
+
+    async def worker():
+        while True:
+            text = await inbox.get()
+            await handle_message(text, session_id, client_key, send_json)
+
+    tasks = [asyncio.ensure_future(coro) for coro in (reader(), heartbeat(), worker())]
+    try:
+        # ينتهي الاتصال عند انقطاع العميل أو انتهاء المهلة أو توقف المعالج
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                logger.error("websocket session %s failed", session_id, exc_info=task.exception())
+        if tasks[2] in done:
+            # المعالج لا ينتهي إلا بخطأ، وبدونه تبقى القناة مفتوحة بلا ردود
+            await send({"type": "websocket.close", "code": 1011})
+    except Exception:
+        logger.exception("websocket session %s failed", session_id)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        _State.connections -= 1
+
+
+async def handle_message(text: Optional[str], session_id: str, client_key: str, send_json) -> None:
+    """رسالة واحدة من القناة"""
+    started = time.perf_counter()
+    try:
+        data = loads(text or "")
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        await send_json({"type": "error", "message": "رسالة JSON غير صالحة"})
+        return
+
+    kind = data.get("type", "chat")
+    if kind == "ping":
+        await send_json({"type": "pong"})
+        return
+    if kind == "pong":
+        return
+
+    request_id = data.get("id")
+    if kind != "chat":
+        await send_json({"type": "error", "id": request_id, "message": f"نوع رسالة غير معروف: {kind}"})
+        return
+    try:
+        message = CHAT_REQUEST.validate(data)["message"]
+    except RequestError as e:
+        await send_json({"type": "error", "id": request_id, "message": e.message})
+        return
+
+    loop = asyncio.get_running_loop()
+    if rate_limiter is not None:
+        # check قد ينتظر قفل المحدِّد أو Redis؛ لا يُستدعى على حلقة الأحداث
+        allowed, retry_after = await loop.run_in_executor(_executor, rate_limiter.check, client_key)
+        if not allowed:
+            app_metrics.observe_request(WS_PATH, "WS", 429, time.perf_counter() - started)
+            await send_json({"type": "error", "id": request_id, "retry_after": retry_after,
+                             "message": f"طلبات كثيرة جداً، حاول بعد {retry_after} ثانية"})
+            return
+
+    status = 200
+    # الحسابات المتزامنة محدودة؛ الزائد ينتظر هنا ولا يُرفض
+    async with _State.compute_slots:
+        try:
+            if data.get("stream"):
+                events = ai_assistant.stream_response(message, session_id)
+                while True:
+                    item = await loop.run_in_executor(_executor, next, events, None)
+                    if item is None:
+                        break
+                    event, payload = item
+                    await send_json({"type": event, "id": request_id, **payload})
+                await send_json({"type": "done", "id": request_id})
+            else:
+                response = await loop.run_in_executor(
+                    _executor, ai_assistant.get_response, message, session_id)
+                await send_json({"type": "reply", "id": request_id, **response})
+        except Exception as e:
+            status = 500
+            logger.exception("websocket chat failed")
+            await send_json({"type": "error", "id": request_id,
+                             "message": f"خطأ في المعالجة: {str(e)}"})
+    app_metrics.observe_request(WS_PATH, "WS", status, time.perf_counter() - started)
+
+
+# ======================== WSGI Bridge ========================
+
+def _environ(scope, body: bytes) -> Dict:
+    """بيئة WSGI من نطاق ASGI"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers") or []:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _too_large(send, limit: int):
+    await send({"type": "http.response.start", "status": 413,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body",
+                "body": dumps_bytes({"status": "error", "message": f"حجم الطلب أكبر من الحد ({limit} بايت)"})})
+
+
+async def wsgi_bridge(scope, receive, send):
+    """تمرير طلب HTTP إلى تطبيق Flask في خيط، مع بث أجزاء الرد (SSE) فور جاهزيتها"""
+    limit = BODY_LIMITS.get(scope["path"], config.MAX_REQUEST_SIZE)
+    declared = dict(scope.get("headers") or []).get(b"content-length", b"")
+    # الطلب الكبير يُرفض من Content-Length قبل قراءة أي جزء من الجسم
+    if declared.isdigit() and int(declared) > limit:
+        await _too_large(send, limit)
+        return
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        body += message.get("body", b"")
+        if len(body) > limit:
+            await _too_large(send, limit)
+            return
+        if not message.get("more_body"):
+            break
+
+    started: Dict = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+        return lambda data: None
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_executor, app, _environ(scope, bytes(body)), start_response)
+    chunks = iter(result)
+    try:
+        await send({"type": "http.response.start", "status": started["status"],
+                    "headers": started["headers"]})
+        while True:
+            chunk = await loop.run_in_executor(_executor, next, chunks, None)
+            if chunk is None:
+                break
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        close = getattr(result, "close", None)
+        if close is not None:
+            await loop.run_in_executor(_executor, close)
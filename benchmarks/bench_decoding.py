@@ -0,0 +1,119 @@
+"""
+قياس فك ترميز الطلبات وترميز الردود
+Request decoding and response encoding benchmark for ANDO.5 AI
+
+يقارن المسار القديم لـ /api/chat (request.json ثم except Exception ← 500، بلا حد
+للحجم) مع codec.Schema على حمولات صالحة ومشوهة وكبيرة الحجم. كلا المسارين
+يعيدان رداً ثابتاً بعد التحقق حتى يقاس فك الترميز وحده. ثم يقارن jsonify الافتراضي
+في Flask مع FastJSONProvider على رد محادثة حقيقي. النتيجة JSON فيها رمز الرد
+لكل حالة وزمن الطلب بالميكروثانية ونسبة التسريع.
+
+الاستخدام:
+    python benchmarks/bench_decoding.py [--repeat 5] [--number 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+os.environ.setdefault("ANDO5_HISTORY_LOG", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify, request  # noqa: E402
+
+from AI import CHAT_REQUEST, ai_assistant  # noqa: E402
+from codec import FastJSONProvider, RequestError  # noqa: E402
+
+JSON = "application/json"
+
+CASES = [
+    ("valid", json.dumps({"message": "ما هي Python؟"}), JSON),
+    ("empty_message", json.dumps({"message": "   "}), JSON),
+    ("wrong_type", json.dumps({"message": 42}), JSON),
+    ("not_object", json.dumps(["ما هي Python؟"]), JSON),
+    ("malformed", '{"message": "ما هي Python؟"', JSON),
+    ("form_body", "message=hello", "application/x-www-form-urlencoded"),
+    ("long_message", json.dumps({"message": "بايثون " * 200}), JSON),
+    ("oversized_64k", json.dumps({"message": "x" * 64 * 1024}), JSON),
+    ("oversized_1m", json.dumps({"message": "x" * 1024 * 1024}), JSON),
+]
+
+
+def legacy_app() -> Flask:
+    """/api/chat كما كان قبل codec"""
+    app = Flask("legacy")
+
+    @app.route("/chat", methods=["POST"])
+    def chat():
+        try:
+            data = request.json
+            user_message = data.get("message", "").strip()
+            if not user_message:
+                return jsonify({"status": "error", "message": "الرسالة فارغة!"}), 400
+            return jsonify({"status": "success"}), 200
+        except Exception as e:
+            return jsonify({"status": "error", "message": f"خطأ في المعالجة: {str(e)}"}), 500
+
+    return app
+
+
+def current_app() -> Flask:
+    """/api/chat بنفس مخطط AI.py"""
+    app = Flask("current")
+    app.json = FastJSONProvider(app)
+
+    @app.errorhandler(RequestError)
+    def request_error(error):
+        return jsonify({"status": "error", "message": error.message}), error.status
+
+    @app.route("/chat", methods=["POST"])
+    def chat():
+        CHAT_REQUEST.decode(request)
+        return jsonify({"status": "success"}), 200
+
+    return app
+
+
+def measure(func, repeat: int, number: int) -> float:
+    """أفضل زمن لاستدعاء واحد بالميكروثانية"""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=2000, help="طلبات في كل تكرار")
+    args = parser.parse_args()
+
+    clients = {"old": legacy_app().test_client(), "new": current_app().test_client()}
+    decoding = []
+    for name, body, content_type in CASES:
+        body = body.encode("utf-8")
+        # الحمولات الكبيرة أبطأ بكثير في المسار القديم
+        number = max(10, args.number // (1 + len(body) // 16384))
+        row = {"case": name, "bytes": len(body)}
+        for label, client in clients.items():
+            def post(client=client):
+                return client.post("/chat", data=body, content_type=content_type)
+            row[f"{label}_status"] = post().status_code
+            row[f"{label}_us"] = round(measure(post, args.repeat, number), 1)
+        row["speedup"] = round(row["old_us"] / row["new_us"], 2)
+        decoding.append(row)
+
+    response = ai_assistant.get_response("ما هي Python؟", session_id="bench")
+    providers = {"old": legacy_app(), "new": current_app()}
+    encoding = {"bytes": {}, "us": {}}
+    for label, app in providers.items():
+        with app.app_context():
+            encoding["bytes"][label] = len(app.json.response(response).get_data())
+            encoding["us"][label] = round(measure(lambda: app.json.response(response),
+                                                  args.repeat, args.number * 5), 2)
+    encoding["speedup"] = round(encoding["us"]["old"] / encoding["us"]["new"], 2)
+
+    print(json.dumps({"decoding": decoding, "encoding": encoding}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+قياس ترتيب التوصيات
+Recommendation ranking benchmark for ANDO.5 AI
+
+يبني Recommender لقواعد معارف اصطناعية بأحجام مختلفة (scale × 3 لغات) ويقيس زمن
+بناء مصفوفة الخصائص وزمن طلب التوصية p50/p95/p99 لأهداف عشوائية (1-3 استخدامات
+وحد صعوبة اختياري)، بالمسار المتجه (NumPy) وبحلقة بايثون مع الكومة، ويتحقق من
+تطابق درجات المسارين.
+
+الاستخدام:
+    python benchmarks/bench_recommend.py [--scales 1,100,1000,3334] [--queries 500]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import recommender  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda pct: samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+    return {f"p{pct}_ms": round(pick(pct) * 1000, 3) for pct in (50, 95, 99)}
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1,100,1000,3334")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(13)
+    results = []
+    for scale in [int(s) for s in args.scales.split(",")]:
+        knowledge_base = synthetic.generate(scale)["knowledge_base"]
+        goals = [([synthetic.phrase(rng, rng.randint(1, 2)) for _ in range(rng.randint(1, 3))],
+                  rng.choice([None, 1, 2, 3])) for _ in range(args.queries)]
+
+        row = {"scale": scale, "entries": len(knowledge_base)}
+        rankings = {}
+        for path in ("loop", "vectorized"):
+            if path == "vectorized" and recommender.np is None:
+                continue
+            # نفس العتبة التي تختار المسار في Recommender
+            saved = recommender.NUMPY_MIN_ENTRIES
+            recommender.NUMPY_MIN_ENTRIES = 0 if path == "vectorized" else float("inf")
+            try:
+                build, model = timed(recommender.Recommender, knowledge_base)
+            finally:
+                recommender.NUMPY_MIN_ENTRIES = saved
+            samples, rankings[path] = [], []
+            for uses, max_difficulty in goals:
+                elapsed, matches = timed(model.recommend, uses, max_difficulty, args.k)
+                samples.append(elapsed)
+                rankings[path].append([match["score"] for match in matches])
+            row[path] = {"build_ms": round(build * 1000, 1), **percentiles(samples)}
+        if len(rankings) == 2:
+            row["same_scores"] = rankings["loop"] == rankings["vectorized"]
+        results.append(row)
+        print(f"scale x{scale} done", file=sys.stderr)
+
+    print(json.dumps({"k": args.k, "queries": args.queries, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+قياس بدء التشغيل وذاكرة كل عملية
+Worker startup and memory benchmark for ANDO.5 AI
+
+يقارن تحميل AI.py من knowledge.json (بناء كل الفهارس في كل عملية) مع تحميله من
+لقطة مُجمَّعة (knowledge.py ← .kbs تُفتح بـ mmap). لكل حجم ولكل صيغة تُشغَّل
+عملية جديدة تقيس زمن import AI والذاكرة المقيمة (RSS)، ثم تتفرع إلى عدة عمال
+كما في prefork، يعالج كل عامل رسائل ثم يبلغ عن ذاكرته الخاصة (USS) ونصيبه من
+المشتركة (PSS). قياسات الذاكرة من /proc، أي على Linux فقط.
+
+الاستخدام:
+    python benchmarks/bench_startup.py --scales 1,100,1000 --workers 4 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import synthetic  # noqa: E402
+
+
+def memory() -> Dict[str, float]:
+    """RSS و USS و PSS بالميغابايت لهذه العملية"""
+    fields = {}
+    for name in ("/proc/self/smaps_rollup", "/proc/self/status"):
+        try:
+            with open(name) as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if value.strip().endswith("kB"):
+                        fields.setdefault(key, int(value.split()[0]) / 1024)
+        except OSError:
+            continue
+    return {
+        "rss_mb": round(fields.get("VmRSS", fields.get("Rss", 0.0)), 2),
+        "uss_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 2),
+        "pss_mb": round(fields.get("Pss", 0.0), 2),
+    }
+
+
+def child(args) -> Dict:
+    """تعمل في عملية جديدة: import AI ثم التفرع إلى عمال"""
+    started = time.perf_counter()
+    import AI
+    import_seconds = time.perf_counter() - started
+    result = {"import_ms": round(import_seconds * 1000, 1), **memory(), "workers": []}
+
+    snapshot = AI.knowledge_store.current()
+    messages = synthetic.sample_messages(
+        {"knowledge_base": snapshot.knowledge_base, "intents": snapshot.intents}, args.messages)
+    languages = list(snapshot.knowledge_base)
+
+    pipes = []
+    for _ in range(args.workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for i, message in enumerate(messages):
+                AI.ai_assistant.get_response(message, session_id=f"s{i % 50}")
+                AI.ai_assistant.get_language_info(languages[i % len(languages)])
+            os.write(write_fd, json.dumps(memory()).encode())
+            os._exit(0)
+        os.close(write_fd)
+        pipes.append((pid, read_fd))
+
+    for pid, read_fd in pipes:
+        with os.fdopen(read_fd) as f:
+            result["workers"].append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+
+    workers = result.pop("workers")
+    for key in ("rss_mb", "uss_mb", "pss_mb"):
+        result[f"worker_{key}"] = round(sum(w[key] for w in workers) / len(workers), 2)
+    return result
+
+
+def run(path: str, args) -> Dict:
+    env = dict(os.environ, ANDO5_KNOWLEDGE_FILE=path)
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child",
+         "--workers", str(args.workers), "--messages", str(args.messages)],
+        env=env, check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1,100,1000")
+    parser.add_argument("--workers", type=int, default=4, help="عمال متفرعون لكل عملية")
+    parser.add_argument("--messages", type=int, default=500, help="رسائل يعالجها كل عامل")
+    parser.add_argument("--output", help="ملف JSON للنتائج (الافتراضي: الطباعة)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args)))
+        return
+
+    from knowledge import compile_snapshot
+
+    report = {"python": sys.version.split()[0], "workers": args.workers, "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in [int(s) for s in args.scales.split(",")]:
+            source = os.path.join(tmp, f"knowledge_x{scale}.json")
+            target = os.path.join(tmp, f"knowledge_x{scale}.kbs")
+            synthetic.write(synthetic.generate(scale), source)
+            started = time.perf_counter()
+            compile_snapshot(source, target)
+            compile_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            report["runs"].append({
+                "scale": scale,
+                "json_bytes": os.path.getsize(source),
+                "compiled_bytes": os.path.getsize(target),
+                "compile_ms": compile_ms,
+                "json": run(source, args),
+                "compiled": run(target, args),
+            })
+            print(f"scale x{scale} done", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
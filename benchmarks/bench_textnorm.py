@@ -0,0 +1,106 @@
+"""
+قياس سرعة تطبيع النصوص
+Text normalization microbenchmark for ANDO.5 AI
+
+يقارن clean_text القديم (re.sub غير مُجمَّع ثم lower) مع textnorm.normalize على
+رسائل عربية وإنجليزية مختلطة، ثم يقارن حساب التشابه مع كل الأنماط بالطريقتين:
+القديمة (تنظيف النص والنمط مع كل نمط) والجديدة (تقطيع الرسالة مرة واحدة مع
+أنماط مخزنة). النتيجة JSON فيها عدد العمليات في الثانية ونسبة التسريع.
+
+الاستخدام:
+    python benchmarks/bench_textnorm.py [--repeat 7] [--number 2000]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge import load_snapshot  # noqa: E402
+from textnorm import normalize, tokenize, tokenize_pattern  # noqa: E402
+
+CORPUS = [
+    "السلام عليكم",
+    "ما هي Python؟",
+    "ايهما أفضل JavaScript أم Python؟",
+    "معلومات عن C++ من فضلك...",
+    "أحتاجُ مساعدةً في تعلّم البرمجة",
+    "hello, how are you?",
+    "What is the best language for AI & data science?",
+    "أريد أن أتعلم لغة برمجة جديدة 🤔",
+]
+
+
+def old_clean_text(text: str) -> str:
+    text = text.strip().lower()
+    text = re.sub(r'[^\w\s]', '', text)
+    return text
+
+
+def old_similarity(text: str, pattern: str) -> float:
+    text_words = set(old_clean_text(text).split())
+    pattern_words = set(old_clean_text(pattern).split())
+    if not pattern_words:
+        return 0
+    return len(text_words.intersection(pattern_words)) / len(pattern_words)
+
+
+def new_similarity(text_words, pattern: str) -> float:
+    pattern_words = tokenize_pattern(pattern)
+    if not pattern_words:
+        return 0
+    return len(text_words & pattern_words) / len(pattern_words)
+
+
+def measure(func, repeat: int, number: int) -> float:
+    """أفضل زمن لتشغيل func على كل الرسائل (ثوانٍ لكل رسالة)"""
+    best = min(timeit.repeat(func, repeat=repeat, number=number))
+    return best / (number * len(CORPUS))
+
+
+def compare(name: str, old, new, repeat: int, number: int) -> dict:
+    old_time = measure(old, repeat, number)
+    new_time = measure(new, repeat, number)
+    return {
+        "benchmark": name,
+        "old_ops_per_sec": round(1 / old_time),
+        "new_ops_per_sec": round(1 / new_time),
+        "speedup": round(old_time / new_time, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=2000, help="مرات تشغيل الرسائل في كل تكرار")
+    args = parser.parse_args()
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge.json")
+    patterns = [p for data in load_snapshot(path).intents.values() for p in data["patterns"]]
+
+    def old_scan():
+        for text in CORPUS:
+            for pattern in patterns:
+                old_similarity(text, pattern)
+
+    def new_scan():
+        for text in CORPUS:
+            words = tokenize(text)
+            for pattern in patterns:
+                new_similarity(words, pattern)
+
+    results = [
+        compare("clean_text", lambda: [old_clean_text(t) for t in CORPUS],
+                lambda: [normalize(t) for t in CORPUS], args.repeat, args.number),
+        compare("similarity_scan", old_scan, new_scan, args.repeat, max(1, args.number // 20)),
+    ]
+    print(json.dumps({"messages": len(CORPUS), "patterns": len(patterns), "results": results},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
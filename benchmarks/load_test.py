@@ -0,0 +1,208 @@
+"""
+اختبار الحمل وقياس زمن الاستجابة
+Load testing and latency benchmark for ANDO.5 AI
+
+يشغّل تطبيق Flask داخل العملية (test client) وعبر HTTP حقيقي (خادم werkzeug
+متعدد الخيوط على منفذ محلي) بمستويات تزامن محددة، مع قواعد معارف اصطناعية
+أكبر من الحالية بـ 10× و 100× و 1000×. النتيجة JSON فيها الإنتاجية و
+p50/p95/p99 لكل نقطة API.
+
+الاستخدام:
+    python benchmarks/load_test.py --scales 1,10,100,1000 --concurrency 1,8,32 \\
+        --requests 500 --modes inprocess,http --output bench.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+from urllib.parse import quote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import synthetic  # noqa: E402
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """المئين بطريقة أقرب رتبة"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def endpoints(messages: List[str], languages: List[str]) -> Dict[str, Callable[[int], tuple]]:
+    """كل نقطة API ← دالة تبني الطلب رقم i (الطريقة، المسار، الجسم)"""
+    return {
+        "GET /api/health": lambda i: ("GET", "/api/health", None),
+        "GET /api/suggestions": lambda i: ("GET", "/api/suggestions", None),
+        "GET /api/language-info/<lang>": lambda i: (
+            "GET", f"/api/language-info/{languages[i % len(languages)]}", None),
+        "POST /api/chat": lambda i: ("POST", "/api/chat", {"message": messages[i % len(messages)]}),
+        "POST /api/chat/batch": lambda i: ("POST", "/api/chat/batch", {
+            "messages": [messages[(i * 20 + k) % len(messages)] for k in range(20)]}),
+        "GET /api/search": lambda i: ("GET", f"/api/search?q={quote(messages[i % len(messages)])}", None),
+        "POST /api/recommend": lambda i: ("POST", "/api/recommend", {
+            "name": "أحمد", "language": languages[i % len(languages)]}),
+    }
+
+
+def drive(send: Callable, build: Callable, total: int, concurrency: int) -> Dict:
+    """إرسال total طلب من concurrency خيط وقياس زمن كل طلب"""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        local, local_errors = [], 0
+        session = send()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            method, path, body = build(i)
+            start = time.perf_counter()
+            status = session(method, path, body)
+            local.append(time.perf_counter() - start)
+            if status >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors[0],
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def inprocess_session(app):
+    """عميل Flask داخل العملية لكل خيط"""
+    def make():
+        client = app.test_client()
+
+        def send(method, path, body):
+            return client.open(path, method=method, json=body).status_code
+        return send
+    return make
+
+
+def http_session(port: int):
+    """اتصال HTTP دائم لكل خيط"""
+    def make():
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+
+        def send(method, path, body):
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        return send
+    return make
+
+
+def run_scale(args) -> List[Dict]:
+    """قياس كل النقاط لقاعدة معارف واحدة (تعمل في عملية فرعية)"""
+    import AI
+    from werkzeug.serving import make_server
+
+    snapshot = AI.knowledge_store.current()
+    data = {"knowledge_base": snapshot.knowledge_base, "intents": snapshot.intents}
+    messages = synthetic.sample_messages(data, 2000)
+    languages = list(snapshot.knowledge_base)
+    routes = endpoints(messages, languages)
+
+    server = None
+    results = []
+    for mode in args.modes.split(","):
+        if mode == "http":
+            server = make_server("127.0.0.1", 0, AI.app, threaded=True)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            make = http_session(server.server_port)
+        else:
+            make = inprocess_session(AI.app)
+
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            for name, build in routes.items():
+                drive(make, build, min(50, args.requests), concurrency)  # إحماء
+                result = drive(make, build, args.requests, concurrency)
+                result.update({"mode": mode, "concurrency": concurrency, "endpoint": name})
+                results.append(result)
+
+        if server is not None:
+            server.shutdown()
+            server = None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="1,10,100,1000")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=500, help="طلبات لكل نقطة ومستوى تزامن")
+    parser.add_argument("--modes", default="inprocess,http")
+    parser.add_argument("--output", help="ملف JSON للنتائج (الافتراضي: الطباعة)")
+    parser.add_argument("--run-scale", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scale:
+        print(json.dumps(run_scale(args)))
+        return
+
+    report = {"python": sys.version.split()[0], "runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in [int(s) for s in args.scales.split(",")]:
+            data = synthetic.generate(scale)
+            path = os.path.join(tmp, f"knowledge_x{scale}.json")
+            synthetic.write(data, path)
+            # عملية مستقلة لكل حجم حتى يُحمَّل AI.py مع قاعدته من البداية
+            env = dict(os.environ, ANDO5_KNOWLEDGE_FILE=path)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-scale",
+                 "--concurrency", args.concurrency, "--requests", str(args.requests),
+                 "--modes", args.modes],
+                env=env, check=True, capture_output=True, text=True).stdout
+            report["runs"].append({
+                "scale": scale,
+                "languages": len(data["knowledge_base"]),
+                "patterns": sum(len(i["patterns"]) for i in data["intents"].values()),
+                "results": json.loads(output.strip().splitlines()[-1]),
+            })
+            print(f"scale x{scale} done", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
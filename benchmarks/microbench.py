@@ -0,0 +1,231 @@
+"""
+قياس دقيق لمسار المطابقة مع خط أساس محفوظ
+Matching hot-path microbenchmarks with stored baselines for ANDO.5 AI
+
+يستدعي clean_text و calculate_similarity و find_best_intent و extract_language و
+get_response مباشرة (بدون خادم) على رسائل عربية وإنجليزية واقعية، وعلى قاعدة
+معارف ونوايا اصطناعية أكبر بـ --scale مرة. لكل قياس:
+
+- ops_per_sec: أفضل نتيجة من --repeat تشغيلات (كل تشغيل --min-time ثانية على الأقل)
+- alloc_peak_bytes: أكبر ذاكرة يحجزها استدعاء واحد فوق ما قبله (tracemalloc)
+- retained_blocks_per_1k: كتل الذاكرة التي تبقى بعد 1000 استدعاء (تسرب أو ذاكرة مؤقتة تنمو)
+
+--save يكتب النتائج في ملف خط الأساس، و --check يقارن بها ويخرج بالرمز 1 إذا تراجع
+أي قياس متتبَّع أكثر من --threshold (السرعة والذاكرة) أو زادت الكتل المتبقية أكثر من
+--blocks-slack، بعد إعادة قياس المتراجع --retries مرة. خط الأساس يخص الجهاز الذي سُجل عليه؛ أعد تسجيله عند تغيير الجهاز.
+
+الاستخدام:
+    python benchmarks/microbench.py [--filter get_response] [--scale 100]
+    python benchmarks/microbench.py --save
+    python benchmarks/microbench.py --check [--threshold 0.2]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Sequence
+
+os.environ.setdefault("ANDO5_HISTORY_LOG", "")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import synthetic  # noqa: E402
+from AI import AIAssistant  # noqa: E402
+from bench_textnorm import CORPUS  # noqa: E402
+from knowledge import KnowledgeStore  # noqa: E402
+from metrics import AppMetrics  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+THRESHOLD = 0.2
+BLOCKS_SLACK = 2.0
+
+# رسائل بلا نية ولا لغة تمر بالمطابقة التقريبية والبحث
+NOISE = ["ابغى اتعلم برمجه", "شنو احسن لغه", "recommend something fast", "بايثن ولا جافا"]
+
+
+class Benchmark:
+    """دالة تُستدعى على كل عنصر في مجموعة مدخلات"""
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[tuple]):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+
+    def run(self) -> None:
+        func = self.func
+        for args in self.inputs:
+            func(*args)
+
+
+def assistant_for(data: Dict, directory: str, label: str) -> AIAssistant:
+    """مساعد مستقل فوق قاعدة معارف مكتوبة في ملف مؤقت"""
+    path = os.path.join(directory, f"{label}.json")
+    synthetic.write(data, path)
+    return AIAssistant(KnowledgeStore(path), AppMetrics())
+
+
+def build(scale: int, directory: str) -> List[Benchmark]:
+    base = synthetic.load_base()
+    large = synthetic.generate(scale)
+    assistants = {"base": assistant_for(base, directory, "base"),
+                  f"x{scale}": assistant_for(large, directory, f"x{scale}")}
+    corpora = {"base": CORPUS + NOISE,
+               f"x{scale}": synthetic.sample_messages(large, 200)}
+
+    patterns = [p for intent in base["intents"].values() for p in intent["patterns"]]
+    any_assistant = assistants["base"]
+    benchmarks = [
+        Benchmark("clean_text/mixed", any_assistant.clean_text, [(m,) for m in CORPUS + NOISE]),
+        Benchmark("calculate_similarity/mixed", any_assistant.calculate_similarity,
+                  [(m, p) for m in CORPUS for p in patterns]),
+    ]
+    for label, assistant in assistants.items():
+        messages = corpora[label]
+        benchmarks += [
+            Benchmark(f"find_best_intent/{label}", assistant.find_best_intent, [(m,) for m in messages]),
+            Benchmark(f"extract_language/{label}", assistant.extract_language, [(m,) for m in messages]),
+            # جلسات متعددة كما في الخادم؛ الأسئلة المتكررة تمر بذاكرة الردود
+            Benchmark(f"get_response/{label}", assistant.get_response,
+                      [(m, f"bench-{i % 16}") for i, m in enumerate(messages)]),
+        ]
+    return benchmarks
+
+
+def measure(benchmark: Benchmark, repeat: int, min_time: float) -> Dict:
+    benchmark.run()  # تسخين الذاكرة المؤقتة والاستيراد الكسول
+    timer = timeit.Timer(benchmark.run)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    ops = len(benchmark.inputs) * number / best
+
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    calls = 0
+    while calls < 1000:
+        benchmark.run()
+        calls += len(benchmark.inputs)
+    gc.collect()
+    retained = (sys.getallocatedblocks() - blocks) * 1000 / calls
+
+    tracemalloc.start()
+    peak = 0
+    try:
+        for args in benchmark.inputs:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            benchmark.func(*args)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(ops, 1),
+        "alloc_peak_bytes": peak,
+        "retained_blocks_per_1k": round(retained, 2),
+    }
+
+
+def best(first: Dict, second: Dict) -> Dict:
+    """أفضل قيمة لكل مقياس من تشغيلين"""
+    return {
+        "ops_per_sec": max(first["ops_per_sec"], second["ops_per_sec"]),
+        "alloc_peak_bytes": min(first["alloc_peak_bytes"], second["alloc_peak_bytes"]),
+        "retained_blocks_per_1k": min(first["retained_blocks_per_1k"], second["retained_blocks_per_1k"]),
+    }
+
+
+def regressions(results: Dict, baseline: Dict, threshold: float, blocks_slack: float) -> List[str]:
+    """وصف كل قياس تراجع عن خط الأساس"""
+    found = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            found.append(f"{name}: {current['ops_per_sec']:.0f} ops/s < {base['ops_per_sec']:.0f} "
+                         f"({current['ops_per_sec'] / base['ops_per_sec'] - 1:+.0%})")
+        # هامش ثابت حتى لا تفشل القياسات الصغيرة جداً بفرق بضعة بايتات
+        if current["alloc_peak_bytes"] > base["alloc_peak_bytes"] * (1 + threshold) + 512:
+            found.append(f"{name}: peak {current['alloc_peak_bytes']} B > {base['alloc_peak_bytes']} B")
+        if current["retained_blocks_per_1k"] > base["retained_blocks_per_1k"] + blocks_slack:
+            found.append(f"{name}: retains {current['retained_blocks_per_1k']} blocks/1k calls "
+                         f"> {base['retained_blocks_per_1k']}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=100, help="حجم القاعدة الاصطناعية مقارنة بالحالية")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="أقل زمن لكل تشغيل بالثواني")
+    parser.add_argument("--filter", default="", help="تشغيل القياسات التي يحتوي اسمها على هذا النص فقط")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="حفظ النتائج كخط أساس")
+    parser.add_argument("--check", action="store_true", help="المقارنة بخط الأساس والفشل عند التراجع")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="أقصى تراجع مسموح (0.2 = 20%%)")
+    parser.add_argument("--retries", type=int, default=2, help="إعادة قياس المتراجع قبل الفشل")
+    parser.add_argument("--blocks-slack", type=float, default=BLOCKS_SLACK,
+                        help="أقصى زيادة في الكتل المتبقية لكل 1000 استدعاء")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            sys.exit(f"baseline was recorded with --scale {baseline.get('scale')}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarks = {b.name: b for b in build(args.scale, directory) if args.filter in b.name}
+        results = {}
+        for name, benchmark in benchmarks.items():
+            results[name] = measure(benchmark, args.repeat, args.min_time)
+            print(f"{name}: {results[name]}", file=sys.stderr)
+
+        # الجهاز قد ينشغل لحظياً: القياس المتراجع يُعاد قبل الحكم عليه ويُحفظ أفضلها
+        for _ in range(args.retries if baseline else 0):
+            flagged = {line.split(":")[0] for line in
+                       regressions(results, baseline["benchmarks"], args.threshold, args.blocks_slack)}
+            for name in sorted(flagged):
+                print(f"re-measuring {name}", file=sys.stderr)
+                results[name] = best(results[name], measure(benchmarks[name], args.repeat, args.min_time))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "scale": args.scale,
+        "recorded": time.strftime("%Y-%m-%d"),
+        "benchmarks": results,
+    }
+
+    if args.save:
+        # حفظ القياسات المُشغَّلة فقط مع إبقاء بقية خط الأساس
+        if args.filter and os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                report["benchmarks"] = {**json.load(f)["benchmarks"], **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if baseline:
+        missing = sorted(set(baseline["benchmarks"]) - set(results))
+        found = regressions(results, baseline["benchmarks"], args.threshold, args.blocks_slack)
+        report["regressions"] = found
+        report["not_run"] = [name for name in missing if args.filter in name]
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if baseline and report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+اختبار ضغط متعدد الخيوط لـ AIAssistant
+Multi-threaded stress test for ANDO.5 AI
+
+يشغّل get_response من عدد متزايد من الخيوط، ويطبع الإنتاجية لكل عدد خيوط بصيغة
+JSON، ثم يتحقق من أن كل رسالة حُفظت في سجل جلستها بالترتيب دون فقد أو تلف.
+
+الاستخدام:
+    python benchmarks/stress_threads.py [--messages 2000] [--threads 1,2,4,8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AI import AIAssistant, knowledge_store  # noqa: E402
+from history import HistoryStore  # noqa: E402
+
+MESSAGES = [
+    "السلام عليكم",
+    "ما هي Python؟",
+    "ايهما أفضل JavaScript أم Python؟",
+    "معلومات عن C++",
+    "احتاج مساعدة",
+    "hello",
+]
+
+
+def run(threads: int, per_thread: int) -> dict:
+    """تشغيل جولة واحدة والتحقق من السجل"""
+    # السعة تكفي كل الرسائل حتى يمكن التحقق منها كاملة دون إخراج
+    assistant = AIAssistant(knowledge_store)
+    assistant.history = HistoryStore(per_thread, 16 * threads * per_thread)
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        session_id = f"stress-{index}"
+        barrier.wait()
+        for i in range(per_thread):
+            assistant.get_response(f"{MESSAGES[i % len(MESSAGES)]} #{i}", session_id)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    errors = 0
+    for n in range(threads):
+        records = assistant.history.recent(f"stress-{n}", per_thread)
+        expected = [f"{MESSAGES[i % len(MESSAGES)]} #{i}" for i in range(per_thread)]
+        if [r["user"] for r in records] != expected:
+            errors += 1
+
+    total = threads * per_thread
+    return {
+        "threads": threads,
+        "requests": total,
+        "seconds": round(elapsed, 4),
+        "throughput": round(total / elapsed, 1),
+        "history_records": len(assistant.history),
+        "lost_records": total - len(assistant.history),
+        "corrupted_sessions": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=2000, help="رسائل لكل خيط")
+    parser.add_argument("--threads", default="1,2,4,8", help="أعداد الخيوط مفصولة بفواصل")
+    args = parser.parse_args()
+
+    results = [run(int(n), args.messages) for n in args.threads.split(",")]
+    print(json.dumps({"results": results}, indent=2))
+
+    if any(r["lost_records"] or r["corrupted_sessions"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+مولّد بيانات اصطناعية لقاعدة المعارف
+Synthetic KNOWLEDGE_BASE / INTENTS generator for ANDO.5 benchmarks
+
+يضخّم knowledge.json الحالي بمعامل (10×، 100×، 1000×) مع الحفاظ على المحتوى
+الأصلي، ليمكن قياس أداء المطابقة مع نمو المحتوى.
+
+الاستخدام:
+    python benchmarks/synthetic.py --scale 100 --output /tmp/knowledge_x100.json
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ARABIC_WORDS = [
+    "برمجة", "تعلم", "أفضل", "لغة", "مشروع", "تطوير", "تطبيق", "موقع", "بيانات",
+    "ذكاء", "اصطناعي", "ألعاب", "خادم", "واجهة", "سريع", "سهل", "صعب", "مبتدئ",
+    "محترف", "كتاب", "دورة", "شرح", "مثال", "خوارزمية", "قاعدة", "شبكة", "أمن",
+    "هاتف", "سحابة", "روبوت", "تحليل", "نظام", "أداء", "مكتبة", "إطار", "اختبار",
+]
+ENGLISH_WORDS = [
+    "code", "learn", "best", "language", "project", "build", "app", "web", "data",
+    "ai", "game", "server", "frontend", "fast", "easy", "hard", "beginner", "pro",
+    "book", "course", "example", "algorithm", "database", "network", "security",
+    "mobile", "cloud", "robot", "analysis", "system", "performance", "library",
+]
+DIFFICULTIES = ["سهلة", "متوسطة", "صعبة"]
+
+
+def load_base() -> Dict:
+    """قاعدة المعارف الحالية من knowledge.json"""
+    with open(os.path.join(ROOT, "knowledge.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def phrase(rng: random.Random, words: int) -> str:
+    """عبارة عشوائية تخلط العربية والإنجليزية"""
+    return " ".join(rng.choice(ARABIC_WORDS if rng.random() < 0.6 else ENGLISH_WORDS)
+                    for _ in range(words))
+
+
+def generate(scale: int, seed: int = 5) -> Dict:
+    """قاعدة معارف ونوايا أكبر من الحالية بـ scale مرة"""
+    rng = random.Random(seed)
+    base = load_base()
+    knowledge_base = dict(base["knowledge_base"])
+    intents = dict(base["intents"])
+
+    base_languages = len(knowledge_base)
+    for i in range(base_languages * (scale - 1)):
+        name = f"lang{i}"
+        knowledge_base[name] = {
+            "description": phrase(rng, rng.randint(4, 10)),
+            "uses": [phrase(rng, rng.randint(1, 3)) for _ in range(rng.randint(2, 5))],
+            "resources": [{"name": f"{name} docs {r}", "url": f"https://example.com/{name}/{r}"}
+                          for r in range(rng.randint(1, 3))],
+            "difficulty": rng.choice(DIFFICULTIES),
+            "popularity": "⭐" * rng.randint(1, 5),
+            "aliases": [f"{name}lang", f"لغة{i}"],
+        }
+
+    base_intents = len(intents)
+    for i in range(base_intents * (scale - 1)):
+        intents[f"intent{i}"] = {
+            "patterns": [phrase(rng, rng.randint(1, 3)) for _ in range(rng.randint(3, 8))],
+            "responses": [phrase(rng, rng.randint(5, 12)) for _ in range(rng.randint(1, 3))],
+        }
+
+    return {"knowledge_base": knowledge_base, "intents": intents}
+
+
+def sample_messages(data: Dict, count: int, seed: int = 7) -> List[str]:
+    """رسائل محادثة واقعية: أنماط معروفة، أسماء لغات، وضوضاء"""
+    rng = random.Random(seed)
+    patterns = [p for intent in data["intents"].values() for p in intent["patterns"]]
+    languages = list(data["knowledge_base"])
+    messages = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.5:
+            text = rng.choice(patterns)
+        elif roll < 0.8:
+            text = f"{rng.choice(patterns)} {rng.choice(languages)}؟"
+        else:
+            text = phrase(rng, rng.randint(2, 8))
+        messages.append(text)
+    return messages
+
+
+def write(data: Dict, path: str) -> None:
+    """حفظ البيانات بصيغة knowledge.json"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    data = generate(args.scale)
+    write(data, args.output)
+    print(json.dumps({
+        "scale": args.scale,
+        "languages": len(data["knowledge_base"]),
+        "intents": len(data["intents"]),
+        "patterns": sum(len(i["patterns"]) for i in data["intents"].values()),
+        "output": args.output,
+    }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
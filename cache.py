@@ -0,0 +1,131 @@
+"""
+ذاكرة تخزين مؤقت LRU مع مدة صلاحية
+Bounded LRU + TTL cache for ANDO.5 AI
+
+الطلبات المتزامنة لنفس المفتاح غير الموجود تُدمج في حساب واحد (single-flight).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Flight:
+    """حساب جارٍ ينتظره باقي الطلبات على نفس المفتاح"""
+
+    __slots__ = ("event", "value", "error", "generation")
+
+    def __init__(self, generation: int):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+        self.generation = generation
+
+
+class _CacheShard:
+    """جزء من الذاكرة بقفل وعدادات خاصة به"""
+
+    __slots__ = ("data", "inflight", "generation", "lock", "hits", "misses", "merged")
+
+    def __init__(self):
+        self.data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.inflight: Dict[Hashable, _Flight] = {}
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+
+
+class LRUCache:
+    """ذاكرة محدودة الحجم تُخرج الأقل استخداماً وتنتهي عناصرها بعد ttl ثانية
+
+    المفاتيح موزعة على أجزاء مستقلة حتى لا تتنافس الخيوط على قفل واحد.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shards: int = 8):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._shard_size = max(1, maxsize // shards)
+        self._shards = [_CacheShard() for _ in range(shards)]
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """القيمة المخزنة، أو حسابها مرة واحدة مهما تعدد الطالبون"""
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            entry = shard.data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                shard.data.move_to_end(key)
+                shard.hits += 1
+                return entry[1]
+            flight = shard.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = shard.inflight[key] = _Flight(shard.generation)
+                shard.misses += 1
+            else:
+                shard.merged += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        completed = False
+        try:
+            flight.value = compute()
+            completed = True
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            # KeyboardInterrupt و SystemExit لا يمران بـ except أعلاه: لا قيمة ولا خطأ محفوظ
+            if not completed and flight.error is None:
+                flight.error = RuntimeError("cache computation was interrupted")
+            with shard.lock:
+                shard.inflight.pop(key, None)
+                # لا نخزن نتيجة بدأ حسابها قبل آخر مسح
+                if completed and flight.generation == shard.generation:
+                    shard.data[key] = (time.monotonic() + self.ttl, flight.value)
+                    shard.data.move_to_end(key)
+                    while len(shard.data) > self._shard_size:
+                        shard.data.popitem(last=False)
+            flight.event.set()
+        return flight.value
+
+    def clear(self) -> None:
+        """مسح كل العناصر (مثلاً بعد تغيير قاعدة المعارف)"""
+        for shard in self._shards:
+            with shard.lock:
+                shard.data.clear()
+                shard.generation += 1
+
+    def __len__(self) -> int:
+        return sum(len(shard.data) for shard in self._shards)
+
+    @property
+    def hits(self) -> int:
+        return sum(shard.hits for shard in self._shards)
+
+    @property
+    def misses(self) -> int:
+        return sum(shard.misses for shard in self._shards)
+
+    @property
+    def merged(self) -> int:
+        return sum(shard.merged for shard in self._shards)
+
+    def stats(self) -> Dict:
+        """عدادات الإصابة والإخفاق"""
+        hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": hits,
+            "misses": misses,
+            "merged": self.merged,
+            "hit_rate": hits / total if total else 0.0
+        }
@@ -0,0 +1,113 @@
+"""
+فهرس كتالوج اللغات مع الفهارس الثانوية
+Language catalog with secondary indexes for ANDO.5 AI
+
+يُبنى مع كل لقطة من قاعدة المعارف: اللغات مرتبة بالاسم، ولكل قيمة صعوبة ولكل
+استخدام ولكل حد أدنى للشهرة قائمة مرتبة بمواقع اللغات (array). الاستعلام يبدأ من
+أقصر قائمة تطابق المرشحات، من بعد المؤشر (اسم آخر لغة في الصفحة السابقة)، ويتوقف
+عند امتلاء الصفحة؛ فلا يمر أي طلب على كل القاعدة.
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from textnorm import fold
+
+
+def index_key(value: str) -> str:
+    """مفتاح الفهرس: بدون تشكيل وبتوحيد الهمزات والتاء المربوطة ("سهله" = "سهلة")"""
+    return " ".join(fold(value).split())
+
+
+def popularity_level(value) -> int:
+    """عدد النجوم في "⭐⭐⭐" أو رقم مباشرة"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return value.count("⭐") or (int(value) if value.isdigit() else 0)
+    return 0
+
+
+class LanguageCatalog:
+    """قائمة اللغات مرتبة مع فهارس الصعوبة والاستخدامات والشهرة"""
+
+    def __init__(self, knowledge_base: Dict[str, Dict]):
+        self.names: List[str] = sorted(knowledge_base)
+        self._info = [knowledge_base[name] for name in self.names]
+        # الاسم مفتاح السجل ويُعاد دائماً، فطلبه في fields مسموح
+        self.fields = frozenset(field for info in self._info for field in info) | {"name"}
+
+        by_difficulty: Dict[str, array] = {}
+        by_use: Dict[str, array] = {}
+        levels = array("B")
+        self._difficulties: List[Optional[str]] = []
+        self._uses: List[frozenset] = []
+        for position, info in enumerate(self._info):
+            difficulty = info.get("difficulty")
+            difficulty = index_key(difficulty) if isinstance(difficulty, str) else None
+            if difficulty is not None:
+                by_difficulty.setdefault(difficulty, array("I")).append(position)
+            self._difficulties.append(difficulty)
+            uses = frozenset(index_key(use) for use in info.get("uses", ()) if isinstance(use, str))
+            for use in uses:
+                by_use.setdefault(use, array("I")).append(position)
+            self._uses.append(uses)
+            levels.append(min(255, max(0, popularity_level(info.get("popularity")))))
+
+        self.by_difficulty = by_difficulty
+        self.by_use = by_use
+        self._levels = levels
+        # لكل مستوى: مواقع اللغات التي شهرتها >= المستوى
+        self.by_min_popularity = {
+            level: array("I", (p for p, value in enumerate(levels) if value >= level))
+            for level in range(1, max(levels, default=0) + 1)
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def query(self, limit: int, cursor: Optional[str] = None, difficulty: Optional[str] = None,
+              use: Optional[str] = None, min_popularity: int = 0,
+              fields: Optional[Iterable[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """صفحة من اللغات المطابقة بعد cursor ومؤشر الصفحة التالية"""
+        difficulty = index_key(difficulty) if difficulty else None
+        use = index_key(use) if use else None
+
+        candidates: List[array] = []
+        if difficulty is not None:
+            candidates.append(self.by_difficulty.get(difficulty, array("I")))
+        if use is not None:
+            candidates.append(self.by_use.get(use, array("I")))
+        if min_popularity > 0:
+            candidates.append(self.by_min_popularity.get(min_popularity, array("I")))
+        # أقصر قائمة تحدد المرشحين، وبقية المرشحات تُفحص من أعمدة الموقع
+        positions = min(candidates, key=len) if candidates else range(len(self.names))
+
+        start = 0
+        if cursor is not None:
+            # المواقع مرتبة مثل الأسماء، فالمؤشر يبقى صالحاً بعد إعادة التحميل
+            after = bisect_right(self.names, cursor)
+            start = bisect_right(positions, after - 1)
+
+        page: List[int] = []
+        for i in range(start, len(positions)):
+            position = positions[i]
+            if difficulty is not None and self._difficulties[position] != difficulty:
+                continue
+            if use is not None and use not in self._uses[position]:
+                continue
+            if self._levels[position] < min_popularity:
+                continue
+            page.append(position)
+            if len(page) > limit:
+                break
+
+        next_cursor = self.names[page[limit - 1]] if len(page) > limit else None
+        return [self.item(position, fields) for position in page[:limit]], next_cursor
+
+    def item(self, position: int, fields: Optional[Iterable[str]] = None) -> Dict:
+        info = self._info[position]
+        if fields is None:
+            return {"name": self.names[position], **info}
+        return {"name": self.names[position], **{f: info[f] for f in fields if f in info}}
@@ -9,9 +9,29 @@ class ChatbotAI {
         this.isOpen = false;
         this.messages = [];
         this.isLoading = false;
+        this.sessionId = this.getSessionId();
+        this.useStreaming = true;
+        // قناة WebSocket دائمة عند تشغيل الخادم بـ asgi.py، وإلا REST/SSE
+        this.wsUrl = this.apiUrl.replace(/^http/, 'ws').replace(/\/api$/, '/ws/chat');
+        this.socket = null;
+        this.socketFailed = false;
+        this.socketRequests = new Map();
+        this.nextRequestId = 1;
         this.init();
     }
 
+    getSessionId() {
+        // معرّف ثابت للجلسة حتى يعيد الخادم سجل هذا المستخدم فقط
+        let id = sessionStorage.getItem('chatbotSessionId');
+        if(!id) {
+            id = (window.crypto && crypto.randomUUID)
+                ? crypto.randomUUID()
+                : Date.now().toString(36) + Math.random().toString(36).slice(2);
+            sessionStorage.setItem('chatbotSessionId', id);
+        }
+        return id;
+    }
+
     init() {
         // إنشاء عناصر الـ Chatbot
         this.createChatbotUI();
@@ -108,29 +128,12 @@ class ChatbotAI {
         this.isLoading = true;
 
         try {
-            // إرسال الرسالة للـ API
-            const response = await this.callAPI('/chat', {
-                message: message
-            });
-
-            // إزالة مؤشر التحميل
-            this.removeTypingIndicator();
-
-            if(response.status === 'success') {
-                // إضافة الرد الذكي
-                this.addMessage(response.message, 'ai', true);
-
-                // إذا كانت هناك بيانات إضافية (معلومات لغة)
-                if(response.data) {
-                    this.displayLanguageInfo(response.data);
-                }
-
-                // إذا كانت هناك اقتراحات
-                if(response.suggestions) {
-                    this.updateSuggestions(response.suggestions);
-                }
+            if(window.WebSocket && !this.socketFailed && await this.connectSocket()) {
+                await this.socketMessage(message);
+            } else if(this.useStreaming && window.ReadableStream && window.TextDecoder) {
+                await this.streamMessage(message);
             } else {
-                this.addMessage('عذراً، حدث خطأ في المعالجة 😞', 'ai', true);
+                await this.requestMessage(message);
             }
         } catch(error) {
             console.error('Chatbot Error:', error);
@@ -141,6 +144,164 @@ class ChatbotAI {
         this.isLoading = false;
     }
 
+    async requestMessage(message) {
+        // إرسال الرسالة للـ API
+        const response = await this.callAPI('/chat', {
+            message: message
+        });
+
+        // إزالة مؤشر التحميل
+        this.removeTypingIndicator();
+
+        if(response.status === 'success') {
+            // إضافة الرد الذكي
+            this.addMessage(response.message, 'ai', true);
+            this.showResponseExtras(response);
+        } else {
+            this.addMessage('عذراً، حدث خطأ في المعالجة 😞', 'ai', true);
+        }
+    }
+
+    async streamMessage(message) {
+        // استقبال الرد كأحداث SSE وعرض الرسالة أثناء وصولها
+        const response = await fetch(`${this.apiUrl}/chat/stream`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Session-Id': this.sessionId
+            },
+            body: JSON.stringify({ message: message })
+        });
+
+        if(response.status === 404 || response.status === 405 || (response.ok && !response.body)) {
+            // الخادم أو المتصفح لا يدعم البث: الرجوع إلى الطلب العادي
+            return this.requestMessage(message);
+        }
+        if(!response.ok) {
+            // رفض الخادم الطلب (حد السرعة أو الحمل أو الحجم): إعادة إرساله تزيد الحمل ولن تنجح
+            const error = await response.json().catch(() => ({}));
+            this.removeTypingIndicator();
+            this.addMessage(error.message || 'عذراً، حدث خطأ في المعالجة 😞', 'ai', true);
+            return;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        const state = { bubble: null, text: '' };
+
+        while(true) {
+            const { value, done } = await reader.read();
+            if(done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                block.split('\n').forEach(line => {
+                    if(line.startsWith('event:')) event = line.slice(6).trim();
+                    else if(line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                this.handleStreamEvent(state, event, data ? JSON.parse(data) : {});
+            }
+        }
+
+        this.removeTypingIndicator();
+    }
+
+    handleStreamEvent(state, event, payload) {
+        // أحداث البث نفسها من SSE أو من WebSocket
+        if(event === 'meta') {
+            this.removeTypingIndicator();
+            state.bubble = this.addMessage('', 'ai', true);
+        } else if(event === 'chunk' && state.bubble) {
+            state.text += payload.text;
+            state.bubble.innerHTML = this.formatMessage(state.text);
+            this.messages[this.messages.length - 1].text = state.text;
+            const messagesContainer = document.getElementById('chatbotMessages');
+            messagesContainer.scrollTop = messagesContainer.scrollHeight;
+        } else if(event === 'final') {
+            this.showResponseExtras(payload);
+        } else if(event === 'error') {
+            // فشل البث بعد بدئه: ما وصل من الرد يبقى وتُعرض رسالة الخطأ بعده
+            this.removeTypingIndicator();
+            this.addMessage('عذراً، حدث خطأ في المعالجة 😞', 'ai', true);
+        }
+    }
+
+    connectSocket() {
+        // فتح القناة مرة واحدة وإعادة استخدامها؛ عند الفشل نعود إلى REST نهائياً
+        if(this.socket && this.socket.readyState === WebSocket.OPEN) {
+            return Promise.resolve(true);
+        }
+        return new Promise(resolve => {
+            const socket = new WebSocket(`${this.wsUrl}?session=${encodeURIComponent(this.sessionId)}`);
+            socket.onopen = () => {
+                this.socket = socket;
+                resolve(true);
+            };
+            socket.onerror = () => {
+                if(this.socket !== socket) {
+                    this.socketFailed = true;
+                    resolve(false);
+                }
+            };
+            socket.onclose = () => {
+                if(this.socket === socket) this.socket = null;
+                // الطلبات المعلقة تفشل فتعرض رسالة الخطأ المعتادة
+                this.socketRequests.forEach(request => request.reject(new Error('WebSocket closed')));
+                this.socketRequests.clear();
+            };
+            socket.onmessage = (event) => this.onSocketMessage(JSON.parse(event.data));
+        });
+    }
+
+    onSocketMessage(payload) {
+        if(payload.type === 'ping') {
+            this.socket.send(JSON.stringify({ type: 'pong' }));
+            return;
+        }
+        const request = this.socketRequests.get(payload.id);
+        if(!request) return;
+
+        if(payload.type === 'error') {
+            this.socketRequests.delete(payload.id);
+            this.removeTypingIndicator();
+            this.addMessage('عذراً، حدث خطأ في المعالجة 😞', 'ai', true);
+            request.resolve();
+        } else if(payload.type === 'done') {
+            this.socketRequests.delete(payload.id);
+            this.removeTypingIndicator();
+            request.resolve();
+        } else {
+            this.handleStreamEvent(request.state, payload.type, payload);
+        }
+    }
+
+    socketMessage(message) {
+        const id = this.nextRequestId++;
+        return new Promise((resolve, reject) => {
+            this.socketRequests.set(id, { resolve, reject, state: { bubble: null, text: '' } });
+            this.socket.send(JSON.stringify({ type: 'chat', id: id, message: message, stream: true }));
+        });
+    }
+
+    showResponseExtras(response) {
+        // إذا كانت هناك بيانات إضافية (معلومات لغة)
+        if(response.data) {
+            this.displayLanguageInfo(response.data);
+        }
+
+        // إذا كانت هناك اقتراحات
+        if(response.suggestions) {
+            this.updateSuggestions(response.suggestions);
+        }
+    }
+
     addMessage(text, sender = 'ai', isHTML = false) {
         const messagesContainer = document.getElementById('chatbotMessages');
         const messageDiv = document.createElement('div');
@@ -163,6 +324,8 @@ class ChatbotAI {
 
         // حفظ الرسالة
         this.messages.push({ text, sender, timestamp: new Date() });
+
+        return bubble;
     }
 
     formatMessage(text) {
@@ -245,7 +408,8 @@ class ChatbotAI {
         const options = {
             method: data ? 'POST' : 'GET',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'X-Session-Id': this.sessionId
             }
         };
 
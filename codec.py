@@ -0,0 +1,143 @@
+"""
+فك ترميز الطلبات وترميز الردود JSON
+Bounded request decoding and fast JSON encoding for ANDO.5 AI
+
+- Schema: يرفض الطلب الكبير من Content-Length قبل قراءة الجسم (413)، ثم يقرأ
+  max_bytes على الأكثر ويتحقق من JSON ومن نوع كل حقل وطوله (400 أو 413) قبل
+  أن يصل الطلب إلى منطق المساعد.
+- dumps/dumps_bytes: مسار ترميز واحد لكل الردود (jsonify والبث والردود المُجهَّزة)،
+  بـ orjson إن وُجد وإلا json القياسي بمرمِّز مُعدّ مسبقاً.
+"""
+
+import json
+from typing import Any, Dict, Mapping, Optional, Type
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson اختياري: يُستخدم json القياسي بدونه
+    orjson = None
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+KIND_NAMES = {str: "نصاً", list: "قائمة"}
+
+
+def dumps_bytes(data: Any) -> bytes:
+    """JSON مضغوط UTF-8 بدون escape للحروف العربية"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # أنواع لا يعرفها orjson (مثل الأعداد الكبيرة جداً)
+    return _ENCODER.encode(data).encode("utf-8")
+
+
+def dumps(data: Any) -> str:
+    return dumps_bytes(data).decode("utf-8")
+
+
+def loads(raw) -> Any:
+    """تحليل JSON من bytes أو نص؛ يرفع ValueError للمدخل غير الصالح"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class FastJSONProvider(JSONProvider):
+    """مزود JSON لـ Flask حتى تمر jsonify بنفس مسار الترميز"""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        return dumps(obj)
+
+    def loads(self, s, **kwargs) -> Any:
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        data = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(data), mimetype=self.mimetype)
+
+
+class RequestError(Exception):
+    """طلب مرفوض قبل المعالجة، مع رمز HTTP ورسالة للعميل"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class Field:
+    """حقل نصي أو قائمة في جسم الطلب: النوع والإلزام والطول الأقصى"""
+
+    __slots__ = ("name", "kind", "required", "max_length", "empty_message")
+
+    def __init__(self, name: str, kind: Type = str, required: bool = False,
+                 max_length: Optional[int] = None, empty_message: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        # عدد الحروف للنص وعدد العناصر للقائمة
+        self.max_length = max_length
+        self.empty_message = empty_message or f"الحقل {name} مطلوب"
+
+    def parse(self, value: Any) -> Any:
+        if value is None:
+            if self.required:
+                raise RequestError(self.empty_message)
+            return None
+        if not isinstance(value, self.kind):
+            raise RequestError(f"الحقل {self.name} يجب أن يكون {KIND_NAMES[self.kind]}")
+        if self.kind is str:
+            value = value.strip()
+
+        if not value:
+            if self.required:
+                raise RequestError(self.empty_message)
+            return None
+        if self.max_length is not None and len(value) > self.max_length:
+            unit = "حرفاً" if self.kind is str else "عنصراً"
+            raise RequestError(f"الحد الأقصى للحقل {self.name} هو {self.max_length} {unit}", 413)
+        return value
+
+
+class Schema:
+    """مخطط جسم طلب JSON بحجم أقصى بالبايت؛ الحقول غير المعروفة تُتجاهل"""
+
+    def __init__(self, *fields: Field, max_bytes: int):
+        self.fields = {field.name: field for field in fields}
+        self.max_bytes = max_bytes
+
+    def decode(self, request) -> Dict[str, Any]:
+        """قراءة جسم طلب Flask والتحقق منه؛ يرفع RequestError"""
+        length = request.content_length
+        if length is not None and length > self.max_bytes:
+            raise RequestError(f"حجم الطلب أكبر من الحد ({self.max_bytes} بايت)", 413)
+        if request.mimetype and not request.is_json:
+            raise RequestError("Content-Type يجب أن يكون application/json")
+
+        # بدون Content-Length (chunked) لا نقرأ أكثر من الحد + 1
+        body = bytearray()
+        while len(body) <= self.max_bytes:
+            chunk = request.stream.read(self.max_bytes + 1 - len(body))
+            if not chunk:
+                break
+            body += chunk
+        if len(body) > self.max_bytes:
+            raise RequestError(f"حجم الطلب أكبر من الحد ({self.max_bytes} بايت)", 413)
+        if not body.strip():
+            return self.validate({})
+        try:
+            data = loads(bytes(body))
+        except ValueError:
+            raise RequestError("جسم الطلب ليس JSON صالحاً") from None
+        if not isinstance(data, dict):
+            raise RequestError("جسم الطلب يجب أن يكون كائن JSON")
+        return self.validate(data)
+
+    def validate(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        """التحقق من قاموس محلل مسبقاً (معاملات GET أو رسالة WebSocket)"""
+        return {name: field.parse(data.get(name)) for name, field in self.fields.items()}
@@ -0,0 +1,231 @@
+"""
+صيغة اللقطة المُجمَّعة لقاعدة المعارف
+Ahead-of-time compiled knowledge snapshot format for ANDO.5 AI
+
+ملف ثنائي واحد بأقسام مسماة: جدول نصوص وبايتات (كلمات وأسماء ورسائل مُجهَّزة)،
+ومصفوفات uint32 (قوائم الترحيل، جدول تجزئة الكلمات، آلة Aho-Corasick). يُفتح
+بـ mmap للقراءة فقط وتُقرأ المصفوفات مباشرة من الصفحات المشتركة دون نسخ، فتتشارك
+العمليات المتفرعة (prefork) نفس الذاكرة الفعلية.
+
+البنية (little-endian، كل قسم يبدأ عند مضاعف 8):
+    MAGIC, FORMAT_VERSION, عدد الأقسام, إصدار المصدر (12 حرفاً)
+    لكل قسم: الاسم (16 بايت)، الإزاحة، الطول
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from collections import abc
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+MAGIC = b"ANDO5KB\x00"
+# يُزاد عند أي تغيير في الصيغة أو في textnorm يغيّر الكلمات المخزنة
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sII12s")
+_ENTRY = struct.Struct("<16sQQ")
+_NONE = 0xFFFFFFFF
+
+assert array("I").itemsize == 4
+
+
+def is_compiled(path: str) -> bool:
+    """هل الملف لقطة مُجمَّعة (وليس JSON)؟"""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class BlobBuilder:
+    """جدول نصوص وبايتات يُكتب مرة واحدة مع إزالة التكرار (interning)"""
+
+    def __init__(self):
+        self._ids: Dict[bytes, int] = {}
+        self.offsets = array("I", [0])
+        self.data = bytearray()
+
+    def add(self, value: Union[str, bytes, None]) -> int:
+        if value is None:
+            return _NONE
+        raw = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+        blob_id = self._ids.get(raw)
+        if blob_id is None:
+            blob_id = self._ids[raw] = len(self.offsets) - 1
+            self.data += raw
+            self.offsets.append(len(self.data))
+        return blob_id
+
+
+def hash_table(keys: Sequence[bytes]) -> array:
+    """جدول تجزئة بعنونة مفتوحة: الخانة = رقم المفتاح + 1 (صفر للفارغة)"""
+    size = 1
+    while size < 2 * len(keys):
+        size *= 2
+    table = array("I", [0]) * size
+    mask = size - 1
+    for key_id, key in enumerate(keys):
+        slot = zlib.crc32(key) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = key_id + 1
+    return table
+
+
+def write(path: str, source_version: str, sections: Dict[str, Union[bytes, array, List[int]]]) -> None:
+    """كتابة الأقسام بالترتيب؛ المصفوفات تُحوَّل إلى uint32 little-endian"""
+    payloads = []
+    for name, value in sections.items():
+        if not isinstance(value, (bytes, bytearray)):
+            value = value if isinstance(value, array) else array("I", value)
+            if sys.byteorder != "little":
+                value = array("I", value)
+                value.byteswap()
+            value = value.tobytes()
+        payloads.append((name.encode("ascii"), bytes(value)))
+
+    offset = _HEADER.size + _ENTRY.size * len(payloads)
+    entries = []
+    for name, data in payloads:
+        offset += -offset % 8
+        entries.append((name, offset, len(data)))
+        offset += len(data)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(payloads), source_version.encode("ascii")))
+        for entry in entries:
+            f.write(_ENTRY.pack(*entry))
+        for (name, start, length), (_, data) in zip(entries, payloads):
+            f.write(b"\x00" * (start - f.tell()))
+            f.write(data)
+
+
+class SnapshotFile:
+    """لقطة مفتوحة بـ mmap؛ الأقسام memoryview فوق الصفحات المشتركة"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, count, source_version = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled knowledge snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        if sys.byteorder != "little":
+            raise ValueError("compiled snapshots are little-endian; load the JSON source instead")
+        self.source_version = source_version.decode("ascii")
+        self._sections: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, start, length = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+            self._sections[name.rstrip(b"\x00").decode("ascii")] = view[start:start + length]
+
+    def raw(self, name: str) -> memoryview:
+        return self._sections[name]
+
+    def u32(self, name: str) -> memoryview:
+        """قسم مصفوفة uint32 كـ memoryview يُفهرس بأعداد صحيحة"""
+        return self._sections[name].cast("I")
+
+    def blobs(self) -> "BlobTable":
+        return BlobTable(self.u32("blob_offsets"), self.raw("blob_data"))
+
+
+class BlobTable:
+    """قراءة جدول BlobBuilder من الملف"""
+
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self.offsets = offsets
+        self.data = data
+
+    def raw(self, blob_id: int) -> Optional[memoryview]:
+        if blob_id == _NONE:
+            return None
+        return self.data[self.offsets[blob_id]:self.offsets[blob_id + 1]]
+
+    def bytes(self, blob_id: int) -> Optional[bytes]:
+        raw = self.raw(blob_id)
+        return None if raw is None else raw.tobytes()
+
+    def text(self, blob_id: int) -> Optional[str]:
+        raw = self.raw(blob_id)
+        return None if raw is None else str(raw, "utf-8")
+
+
+class CompiledPostings(abc.Mapping):
+    """كلمة ← أرقام الأنماط، بجدول تجزئة وقوائم CSR من الملف
+
+    الكلمات هي أول len(self) عنصر في جدول النصوص، فرقم الكلمة = رقم النص.
+    """
+
+    def __init__(self, blobs: BlobTable, table: memoryview, offsets: memoryview, ids: memoryview):
+        self._blobs = blobs
+        self._table = table
+        self._offsets = offsets
+        self._ids = ids
+        self._mask = len(table) - 1
+
+    def token_id(self, token: str) -> Optional[int]:
+        key = token.encode("utf-8")
+        table, blobs = self._table, self._blobs
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            entry = table[slot]
+            if not entry:
+                return None
+            if blobs.raw(entry - 1) == key:
+                return entry - 1
+            slot = (slot + 1) & self._mask
+
+    def arrays(self) -> Tuple[memoryview, memoryview]:
+        """(الإزاحات، أرقام الأنماط) للمسار المتجه"""
+        return self._offsets, self._ids
+
+    def __getitem__(self, token: str) -> memoryview:
+        token_id = self.token_id(token)
+        if token_id is None:
+            raise KeyError(token)
+        return self._ids[self._offsets[token_id]:self._offsets[token_id + 1]]
+
+    def __contains__(self, token) -> bool:
+        return isinstance(token, str) and self.token_id(token) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for token_id in range(len(self)):
+            yield self._blobs.text(token_id)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class IndexedNames(abc.Sequence):
+    """تسلسل أسماء عبر مصفوفة أرقام (نية كل نمط دون قائمة بايثون لكل عملية)"""
+
+    def __init__(self, indexes: memoryview, names: Sequence[str]):
+        self._indexes = indexes
+        self._names = names
+
+    def __getitem__(self, i):
+        return self._names[self._indexes[i]]
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+
+class LazyMap(abc.Mapping):
+    """مفتاح ← قيمة تُبنى من صف في جداول الملف عند الطلب"""
+
+    def __init__(self, index: Dict[str, int], decode: Callable[[int], object]):
+        self._index = index
+        self._decode = decode
+
+    def __getitem__(self, key: str):
+        return self._decode(self._index[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
@@ -3,6 +3,8 @@
 Configuration file for ANDO.5 AI Server
 """
 
+import os
+
 # ===== Flask Settings =====
 DEBUG = True
 HOST = '0.0.0.0'
@@ -21,8 +23,16 @@ CORS_ORIGINS = [
 
 # ===== API Settings =====
 API_VERSION = '1.0'
-MAX_REQUEST_SIZE = 1024  # بالبايت
-MAX_CONVERSATION_HISTORY = 50  # عدد الرسائل المحفوظة
+MAX_REQUEST_SIZE = 8 * 1024  # أقصى جسم طلب بالبايت (رسالة بطول MAX_MESSAGE_LENGTH مع \uXXXX لكل حرف)
+MAX_CONVERSATION_HISTORY = 50  # عدد الرسائل المحفوظة لكل جلسة
+MAX_HISTORY_RECORDS = 100000  # الحد الأقصى لكل الرسائل في الذاكرة
+HISTORY_PAGE_SIZE = 10  # عدد الرسائل الافتراضي في صفحة /api/history
+MAX_HISTORY_PAGE_SIZE = 100  # أقصى قيمة لـ limit في /api/history
+LANGUAGES_PAGE_SIZE = 20  # عدد اللغات الافتراضي في صفحة /api/languages
+MAX_LANGUAGES_PAGE_SIZE = 100  # أقصى قيمة لـ limit في /api/languages
+MAX_BATCH_SIZE = 1000  # أقصى عدد رسائل في طلب /api/chat/batch
+MAX_BATCH_REQUEST_SIZE = 1024 * 1024  # أقصى جسم طلب /api/chat/batch بالبايت
+STATIC_CACHE_MAX_AGE = 300  # مدة تخزين الردود الثابتة في المتصفح/CDN بالثواني
 
 # ===== Language Support =====
 SUPPORTED_LANGUAGES = ['python', 'javascript', 'cpp']
@@ -30,20 +40,82 @@ DEFAULT_LANGUAGE = 'python'
 
 # ===== AI Settings =====
 MIN_CONFIDENCE_THRESHOLD = 0.3  # الحد الأدنى لثقة الإجابة
-MAX_RESPONSE_LENGTH = 1000  # الحد الأقصى لطول الرسالة
+FUZZY_MATCHING = True  # مطابقة تقريبية للأخطاء الإملائية والسوابق العربية
+FUZZY_BUDGET_MS = 2  # أقصى زمن للمطابقة التقريبية لكل رسالة
+FUZZY_MAX_CANDIDATES = 8  # أقصى عدد مرشحين لكل كلمة غير معروفة
+SEARCH_RESULTS = 10  # عدد النتائج الافتراضي في /api/search
+MAX_SEARCH_RESULTS = 50  # أقصى قيمة لـ limit في /api/search
+SEARCH_FALLBACK_RESULTS = 3  # نتائج البحث في رد المحادثة عند عدم فهم السؤال
+SEARCH_MIN_SCORE = 0.5  # أدنى درجة BM25 لنتيجة في رد المحادثة
+RECOMMEND_RESULTS = 3  # عدد اللغات الافتراضي في توصيات /api/recommend
+MAX_RECOMMEND_RESULTS = 20  # أقصى قيمة لـ limit في /api/recommend
+MAX_RECOMMEND_USES = 10  # أقصى عدد أهداف في الحقل uses
+MAX_MESSAGE_LENGTH = 1000  # الحد الأقصى لطول رسالة المستخدم ونص البحث بالحروف
+MAX_RESPONSE_LENGTH = 4000  # الحد الأقصى لطول رد المساعد بالحروف (الزائد يُقص)
+RESPONSE_CACHE_SIZE = 1024  # عدد الأسئلة المخزنة مؤقتاً
+RESPONSE_CACHE_TTL = 300  # مدة صلاحية العنصر بالثواني
 
 # ===== Security Settings =====
 ENABLE_RATE_LIMITING = False  # تفعيل تحديد السرعة
 RATE_LIMIT_REQUESTS = 100  # عدد الطلبات
 RATE_LIMIT_PERIOD = 60  # بالثواني
+RATE_LIMIT_STORAGE = os.environ.get('ANDO5_RATE_LIMIT_STORAGE', 'memory')  # 'memory' لعملية واحدة أو مسار ملف SQLite مشترك بين العمليات
+MAX_CONCURRENT_REQUESTS = 64  # الحد الأقصى للطلبات المتزامنة لكل عملية (0 لإلغائه)
+
+# ===== ASGI / WebSocket =====
+ASGI_THREADS = 32  # خيوط تنفيذ منطق المساعد وتطبيق Flask تحت asgi.py
+WS_MAX_CONNECTIONS = 10000  # أقصى اتصالات WebSocket مفتوحة لكل عملية
+WS_MAX_PENDING = 8  # رسائل غير معالجة لكل اتصال قبل إيقاف القراءة منه
+WS_HEARTBEAT_INTERVAL = 25  # فترة نبضة ping بالثواني
+WS_IDLE_TIMEOUT = 300  # إغلاق الاتصال بعد هذه المدة دون رسائل من العميل
 
 # ===== Logging Settings =====
 LOG_LEVEL = 'INFO'  # DEBUG, INFO, WARNING, ERROR
 LOG_FILE = 'ando5_ai.log'
 ENABLE_LOGGING = True
 
+# ===== Metrics Settings =====
+METRICS_MULTIPROC_DIR = os.environ.get('ANDO5_METRICS_DIR')  # مجلد مشترك لتجميع مقاييس عدة عمليات
+METRICS_FLUSH_INTERVAL = 5  # فترة كتابة مقاييس العملية بالثواني
+
+# ===== Profiling =====
+PROFILE_TOKEN = os.environ.get('ANDO5_PROFILE_TOKEN')  # رمز ترويسة X-Profile لتحليل طلب واحد (فارغ لتعطيله)
+PROFILE_TOP_FUNCTIONS = 25  # عدد الدوال في ملخص التحليل
+PROFILE_REQUEST_SAMPLE_INTERVAL = 0.001  # فترة العينات عند X-Profile-Mode: sample بالثواني
+PROFILE_SAMPLER_DIR = os.environ.get('ANDO5_PROFILE_DIR')  # مجلد ملفات المكدسات المطوية (فارغ لتعطيل العينات الخلفية)
+PROFILE_SAMPLER_INTERVAL = 0.05  # فترة العينات الخلفية بالثواني (20 عينة في الثانية)
+PROFILE_SAMPLER_WINDOW = 60  # مدة كل ملف عينات بالثواني
+PROFILE_SAMPLER_KEEP = 60  # عدد الملفات المحفوظة لكل عملية
+
+# ===== Session Preferences =====
+SESSION_TTL = 3600  # مدة بقاء تفضيلات الجلسة بعد آخر استخدام بالثواني
+SESSION_MEMORY_BUDGET = 16 * 1024 * 1024  # أقصى ذاكرة لتفضيلات كل الجلسات بالبايت
+SESSION_SNAPSHOT_FILE = os.environ.get('ANDO5_SESSION_SNAPSHOT')  # ملف حفظ الجلسات لإعادة التشغيل الدافئ (اختياري)
+SESSION_SNAPSHOT_INTERVAL = 60  # فترة حفظ الجلسات بالثواني
+
+# ===== Conversation Log =====
+HISTORY_LOG_FILE = os.environ.get('ANDO5_HISTORY_LOG', '')  # ملف SQLite لسجل المحادثات الدائم (اختياري، مسار مطلق مُفضَّل)
+HISTORY_LOG_FLUSH_INTERVAL = 1.0  # أقصى تأخير قبل كتابة الرسائل على القرص بالثواني
+HISTORY_LOG_BATCH_SIZE = 256  # الكتابة فوراً عند تجمع هذا العدد
+HISTORY_LOG_DURABILITY = 'normal'  # 'off' أو 'normal' أو 'full' (fsync مع كل دفعة)
+HISTORY_LOG_RETENTION_DAYS = 30  # حذف الرسائل الأقدم من هذا العدد من الأيام (0 للاحتفاظ بها دائماً)
+HISTORY_LOG_PRUNE_INTERVAL = 3600  # فترة حذف الرسائل المنتهية بالثواني
+
 # ===== Knowledge Base =====
-KNOWLEDGE_BASE_FILE = 'knowledge.json'  # يمكن حفظ القاعدة في ملف
+KNOWLEDGE_BASE_FILE = os.environ.get('ANDO5_KNOWLEDGE_FILE', 'knowledge.json')  # يمكن حفظ القاعدة في ملف
+KNOWLEDGE_HOT_RELOAD = True  # إعادة تحميل الملف تلقائياً عند تعديله
+KNOWLEDGE_RELOAD_INTERVAL = 2.0  # فترة فحص الملف بالثواني
+
+# ===== Pre-fork Workers (launcher.py --production) =====
+WORKERS = int(os.environ.get('ANDO5_WORKERS', '0'))  # عدد العمال (0 = عامل لكل نواة)
+WORKER_STATUS_DIR = os.environ.get('ANDO5_WORKER_DIR')  # يضبطه المشغل؛ حالة كل عامل في /api/health
+WORKER_HEARTBEAT_INTERVAL = 2.0  # فترة كتابة حالة العامل بالثواني
+WORKER_TIMEOUT = 30  # عامل جاهز بلا نبضة لهذه المدة يُعاد تشغيله
+WORKER_BOOT_TIMEOUT = 60  # أقصى زمن للاستيراد والتسخين قبل أن يصبح العامل جاهزاً
+WORKER_GRACEFUL_TIMEOUT = 30  # أقصى انتظار للطلبات الجارية عند إيقاف عامل
+WORKER_KEEPALIVE = 5  # إغلاق اتصال keep-alive الخامل بعد هذه المدة بالثواني
+LISTEN_BACKLOG = 2048  # طابور الاتصالات المنتظرة على المقبس المشترك
+WARMUP_MESSAGES = 500  # أقصى عدد أسئلة يحللها العامل قبل استقبال الطلبات
 
 # ===== Production Settings =====
 PRODUCTION = False  # غيّر إلى True في الإنتاج
@@ -0,0 +1,137 @@
+"""
+المطابقة التقريبية لكلمات الأنماط
+Typo- and morphology-tolerant token lookup for ANDO.5 AI
+
+فهرس ثنائيات حروف (bigrams) فوق مفردات الأنماط يحدد عدداً محدوداً من المرشحين
+لكل كلمة غير معروفة، ثم تُحسب مسافة التحرير لهؤلاء فقط. الكلمات العربية تُوحَّد
+(الألف والهمزات والتاء المربوطة والتشكيل) وتُجرَّد من السوابق الشائعة (وال، بال...).
+"""
+
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from textnorm import fold
+
+# الأطول أولاً حتى تُجرَّد "وال" قبل "و"
+PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال", "و", "ب", "ل", "ف", "ك")
+
+# أكثر ثنائيات الحروف شيوعاً لا تميز بين المرشحين، فلا تُمسح قوائمها كاملة
+MAX_GRAM_POSTINGS = 2000
+
+
+def stem(token: str) -> str:
+    """تجريد سابقة واحدة مع إبقاء حرفين على الأقل"""
+    for prefix in PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def bigrams(word: str) -> List[str]:
+    padded = f"^{word}$"
+    return [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+def max_distance(word: str) -> int:
+    """عدد الأخطاء المسموح حسب طول الكلمة"""
+    if len(word) < 3:
+        return 0
+    return 1 if len(word) < 6 else 2
+
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    """مسافة Levenshtein مع التوقف المبكر عند تجاوز limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if current[j] < row_min:
+                row_min = current[j]
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """فهرس تقريبي لمفردات الأنماط"""
+
+    def __init__(self, vocabulary: Iterable[str], max_candidates: int = 8):
+        self.max_candidates = max_candidates
+        self._folded: Dict[str, List[str]] = {}
+        self._stems: Dict[str, List[str]] = {}
+        for token in vocabulary:
+            folded = fold(token)
+            self._folded.setdefault(folded, []).append(token)
+            self._stems.setdefault(stem(folded), []).append(token)
+
+        self._stem_list = list(self._stems)
+        self._grams: Dict[str, List[int]] = {}
+        for stem_id, word in enumerate(self._stem_list):
+            for gram in set(bigrams(word)):
+                self._grams.setdefault(gram, []).append(stem_id)
+
+    def lookup(self, token: str) -> List[Tuple[str, float]]:
+        """كلمات المفردات القريبة من token مع وزن التشابه (0..1]"""
+        folded = fold(token)
+        exact = self._folded.get(folded)
+        if exact:
+            return [(t, 1.0) for t in exact]
+
+        word = stem(folded)
+        same_stem = self._stems.get(word)
+        if same_stem:
+            return [(t, 0.9) for t in same_stem]
+
+        limit = max_distance(word)
+        if limit == 0:
+            return []
+
+        # مرشحون يشتركون في عدد كافٍ من الثنائيات (كل تعديل يُفسد اثنين على الأكثر)
+        grams = set(bigrams(word))
+        needed = len(grams) - 2 * limit
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            postings = self._grams.get(gram, ())
+            if len(postings) > MAX_GRAM_POSTINGS:
+                needed -= 1
+                continue
+            for stem_id in postings:
+                shared[stem_id] = shared.get(stem_id, 0) + 1
+        needed = max(1, needed)
+
+        candidates = heapq.nlargest(
+            self.max_candidates,
+            (item for item in shared.items() if item[1] >= needed),
+            key=lambda item: item[1])
+
+        matches = []
+        for stem_id, _ in candidates:
+            candidate = self._stem_list[stem_id]
+            distance = bounded_distance(word, candidate, limit)
+            if distance <= limit:
+                weight = 0.9 * (1 - distance / max(len(word), len(candidate)))
+                matches.extend((t, weight) for t in self._stems[candidate])
+        return matches
+
+    def expand(self, tokens: Iterable[str], known: Dict, budget: float) -> Optional[Dict[str, float]]:
+        """أفضل وزن لكل كلمة من المفردات، ضمن ميزانية زمنية بالثواني"""
+        deadline = time.perf_counter() + budget
+        weights: Dict[str, float] = {}
+        found = False
+        for token in tokens:
+            if token in known:
+                weights[token] = 1.0
+                continue
+            if time.perf_counter() > deadline:
+                continue
+            for vocab_token, weight in self.lookup(token):
+                if weight > weights.get(vocab_token, 0.0):
+                    weights[vocab_token] = weight
+                    found = True
+        return weights if found else None
@@ -0,0 +1,139 @@
+"""
+سجل المحادثات المحدود لكل جلسة
+Bounded per-session conversation history for ANDO.5 AI
+
+كل جلسة لها مخزن دائري بسعة ثابتة من سجلات مضغوطة (__slots__) بطابع زمني رقمي،
+مع حد أقصى عام لعدد السجلات يُخرج الجلسات الأقدم خمولاً أولاً. يمكن ربطه بسجل
+دائم (historylog.ConversationLog) تُنسخ إليه كل رسالة وتُقرأ منه الصفحات.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class HistoryRecord:
+    """رسالة واحدة في السجل"""
+
+    __slots__ = ("user", "assistant", "timestamp")
+
+    def __init__(self, user: str, assistant: str, timestamp: float):
+        self.user = user
+        self.assistant = assistant
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict:
+        """الشكل المُرسل عبر الـ API (التاريخ يُنسَّق عند القراءة فقط)"""
+        return {
+            "user": self.user,
+            "assistant": self.assistant,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+
+class RingBuffer:
+    """مخزن دائري بسعة ثابتة يستبدل الأقدم عند الامتلاء"""
+
+    __slots__ = ("_items", "_start", "_size", "last_access")
+
+    def __init__(self, capacity: int):
+        self._items: List[Optional[HistoryRecord]] = [None] * capacity
+        self._start = 0
+        self._size = 0
+        self.last_access = time.monotonic()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, item: HistoryRecord) -> bool:
+        """إضافة عنصر؛ تعيد True إذا ازداد الحجم (لم يُستبدل عنصر قديم)"""
+        capacity = len(self._items)
+        if self._size < capacity:
+            self._items[(self._start + self._size) % capacity] = item
+            self._size += 1
+            return True
+        self._items[self._start] = item
+        self._start = (self._start + 1) % capacity
+        return False
+
+    def last(self, count: int) -> List[HistoryRecord]:
+        """آخر count عناصر من الأقدم إلى الأحدث"""
+        capacity = len(self._items)
+        count = min(count, self._size)
+        first = self._start + self._size - count
+        return [self._items[(first + i) % capacity] for i in range(count)]
+
+
+class _Shard:
+    """جزء من الجلسات بقفل خاص به"""
+
+    __slots__ = ("sessions", "total", "max_records", "lock")
+
+    def __init__(self, max_records: int):
+        self.sessions: "OrderedDict[str, RingBuffer]" = OrderedDict()
+        self.total = 0
+        self.max_records = max_records
+        self.lock = threading.Lock()
+
+
+class HistoryStore:
+    """سجلات الجلسات مرتبة حسب آخر استخدام، موزعة على أجزاء بأقفال مستقلة
+
+    كل جلسة تنتمي لجزء واحد حسب معرّفها، فلا تتنافس الجلسات المختلفة على نفس
+    القفل، وكل جزء يُخرج الجلسات الأقدم خمولاً ضمن حصته من الحد العام.
+    """
+
+    def __init__(self, per_session: int, max_records: int, shards: int = 16, log=None):
+        self.per_session = per_session
+        self.max_records = max_records
+        self.log = log
+        share = max(max_records // shards, per_session)
+        self._shards = [_Shard(share) for _ in range(shards)]
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def append(self, session_id: str, user: str, assistant: str) -> None:
+        """إضافة رسالة إلى سجل الجلسة"""
+        record = HistoryRecord(user, assistant, time.time())
+        if self.log is not None:
+            self.log.append(session_id, record)
+        shard = self._shard(session_id)
+        with shard.lock:
+            sessions = shard.sessions
+            buffer = sessions.get(session_id)
+            if buffer is None:
+                buffer = sessions[session_id] = RingBuffer(self.per_session)
+            else:
+                sessions.move_to_end(session_id)
+            buffer.last_access = time.monotonic()
+            if buffer.append(record):
+                shard.total += 1
+            # إخراج الجلسات الأقدم خمولاً حتى العودة تحت حصة الجزء
+            while shard.total > shard.max_records and len(sessions) > 1:
+                _, evicted = sessions.popitem(last=False)
+                shard.total -= len(evicted)
+
+    def recent(self, session_id: str, count: int) -> List[Dict]:
+        """آخر count رسائل من جلسة واحدة"""
+        shard = self._shard(session_id)
+        with shard.lock:
+            buffer = shard.sessions.get(session_id)
+            records = buffer.last(count) if buffer is not None else []
+        return [r.to_dict() for r in records]
+
+    def page(self, session_id: str, limit: int,
+             cursor: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        """صفحة من السجل الدائم إن وُجد، وإلا آخر limit رسائل من الذاكرة دون صفحات أقدم"""
+        if self.log is not None:
+            return self.log.page(session_id, limit, cursor)
+        return ([] if cursor is not None else self.recent(session_id, limit)), None
+
+    def __len__(self) -> int:
+        return sum(shard.total for shard in self._shards)
+
+    def session_count(self) -> int:
+        """عدد الجلسات المحفوظة"""
+        return sum(len(shard.sessions) for shard in self._shards)
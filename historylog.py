@@ -0,0 +1,224 @@
+"""
+سجل المحادثات الدائم بكتابة مؤجلة
+Durable write-behind conversation log for ANDO.5 AI
+
+الطلب يضيف الرسالة إلى طابور في الذاكرة ويعود فوراً، وخيط كاتب في الخلفية
+يجمع الرسائل ويكتبها في SQLite (وضع WAL) بمعاملة واحدة لكل دفعة (group commit)
+كل flush_interval ثانية أو عند امتلاء الدفعة. القراءة صفحة بصفحة بمؤشر
+(cursor) على فهرس (الجلسة، الترتيب)، فتظهر الرسائل لكل العمليات وبعد إعادة التشغيل.
+الرسائل الأقدم من retention ثانية يحذفها نفس الكاتب كل prune_interval ثانية.
+الصفحة الأحدث تضم أيضاً رسائل هذه العملية التي لم تُكتب بعد، فتظهر الرسالة فور الرد.
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from history import HistoryRecord
+
+logger = logging.getLogger(__name__)
+
+# مستوى المتانة ← PRAGMA synchronous في وضع WAL:
+# off: بلا fsync، normal: fsync عند نقاط التفتيش فقط، full: fsync مع كل دفعة
+DURABILITY_LEVELS = {"off": "OFF", "normal": "NORMAL", "full": "FULL"}
+
+
+class ConversationLog:
+    """سجل دائم لكل الجلسات بكتابة مؤجلة على دفعات"""
+
+    def __init__(self, path: str, flush_interval: float = 1.0, batch_size: int = 256,
+                 durability: str = "normal", max_pending: int = 10000,
+                 retention: float = 0, prune_interval: float = 3600):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"durability must be one of {sorted(DURABILITY_LEVELS)}")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.durability = durability
+        self.max_pending = max_pending
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS messages ("
+                     "id INTEGER PRIMARY KEY AUTOINCREMENT, session TEXT NOT NULL, "
+                     "ts REAL NOT NULL, user TEXT NOT NULL, assistant TEXT NOT NULL)")
+        # id يزيد بترتيب الكتابة، فهو ترتيب زمني للجلسة ومؤشر ثابت للصفحات
+        conn.execute("CREATE INDEX IF NOT EXISTS messages_session ON messages (session, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS messages_ts ON messages (ts)")
+
+        self._start()
+        # خيط الكاتب لا ينتقل مع fork، فكل عامل متفرع يبدأ طابوره وكاتبه الخاص
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._start)
+        atexit.register(self.close)
+
+    def _start(self) -> None:
+        self._pending: deque = deque()
+        self._inflight: List[Tuple] = []  # الدفعة التي يكتبها الكاتب الآن
+        self._cond = threading.Condition()
+        # يُمسك أثناء كتابة الدفعة، فالقراءة تحته ترى كل رسالة إما في الطابور أو في القاعدة
+        self._commit_lock = threading.Lock()
+        self._closed = False
+        self._flush_requested = False
+        self._enqueued = 0
+        self._processed = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.pruned = 0
+        self._writer = threading.Thread(target=self._run, name="history-log-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={DURABILITY_LEVELS[self.durability]}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def append(self, session_id: str, record: HistoryRecord) -> None:
+        """إضافة رسالة إلى الطابور دون انتظار القرص (تُهمل إذا امتلأ الطابور)"""
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append((session_id, record.timestamp, record.user, record.assistant))
+            self._enqueued += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        conn = self._connect()
+        next_prune = 0.0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: (self._closed or self._flush_requested
+                                             or len(self._pending) >= self.batch_size),
+                                    timeout=self.flush_interval)
+                batch = self._inflight = list(self._pending)
+                self._pending.clear()
+                self._flush_requested = False
+                closed = self._closed
+
+            if batch:
+                with self._commit_lock:
+                    self._write(conn, batch)
+            if closed:
+                return
+            if self.retention and time.monotonic() >= next_prune:
+                self._prune(conn)
+                next_prune = time.monotonic() + self.prune_interval
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple]) -> None:
+        """كتابة دفعة في معاملة واحدة"""
+        ok = True
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT INTO messages (session, ts, user, assistant) "
+                                 "VALUES (?, ?, ?, ?)", batch)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            logger.exception("conversation log write failed, dropping %d messages", len(batch))
+            ok = False
+        with self._cond:
+            if ok:
+                self.written += len(batch)
+                self.batches += 1
+            else:
+                self.dropped += len(batch)
+            self._processed += len(batch)
+            self._inflight = []
+            self._cond.notify_all()
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """حذف الرسائل الأقدم من مدة الاحتفاظ"""
+        try:
+            deleted = conn.execute("DELETE FROM messages WHERE ts < ?",
+                                   (time.time() - self.retention,)).rowcount
+        except sqlite3.Error:
+            logger.exception("conversation log pruning failed")
+            return
+        with self._cond:
+            self.pruned += deleted
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """انتظار كتابة كل ما أُضيف حتى الآن؛ تعيد False عند انتهاء المهلة"""
+        with self._cond:
+            target = self._enqueued
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._processed >= target or self._closed, timeout)
+
+    def close(self) -> None:
+        """كتابة الطابور المتبقي وإيقاف الكاتب"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join(timeout=max(5.0, self.flush_interval * 2))
+
+    def _queued(self, session_id: str) -> List[Tuple]:
+        """رسائل الجلسة التي لم تُكتب بعد (ts, user, assistant) من الأقدم إلى الأحدث"""
+        with self._cond:
+            return [item[1:] for item in chain(self._inflight, self._pending) if item[0] == session_id]
+
+    def _rows(self, session_id: str, limit: int, cursor: Optional[int]) -> List[Tuple]:
+        sql = "SELECT id, ts, user, assistant FROM messages WHERE session = ?"
+        params: list = [session_id]
+        if cursor is not None:
+            sql += " AND id < ?"
+            params.append(cursor)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+        return self._connect().execute(sql, params).fetchall()
+
+    def page(self, session_id: str, limit: int,
+             cursor: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        """صفحة من رسائل الجلسة (من الأقدم إلى الأحدث) ومؤشر الصفحة الأقدم التالية
+
+        الصفحة الأحدث (بدون cursor) تضم رسائل الطابور، والمؤشر يبقى رقم آخر صف مكتوب
+        فيها؛ فإذا ملأت رسائل الطابور وحدها الصفحة تُكتب أولاً حتى لا يتجاوزها المؤشر.
+        """
+        queued: List[Tuple] = []
+        if cursor is None and len(self._queued(session_id)) >= limit:
+            self.flush(timeout=max(5.0, self.flush_interval * 2))
+        with self._commit_lock:
+            if cursor is None:
+                # ما زال ممتلئاً بعد الكتابة (جلسة نشطة جداً): الأحدث فقط
+                queued = self._queued(session_id)
+                queued = queued[max(0, len(queued) - limit + 1):]
+            take = limit - len(queued)
+            rows = self._rows(session_id, take, cursor)
+
+        next_cursor = rows[take - 1][0] if len(rows) > take else None
+        items = [(ts, user, assistant) for _, ts, user, assistant in rows[:take]] + queued
+        # رسائل العمليات الأخرى قد تتداخل زمنياً مع طابور هذه العملية
+        items.sort(key=lambda item: item[0])
+        records = [HistoryRecord(user, assistant, ts).to_dict() for ts, user, assistant in items]
+        return records, next_cursor
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "pruned": self.pruned,
+            }
@@ -0,0 +1,300 @@
+"""
+مخزن قاعدة المعارف مع إعادة التحميل الساخن
+Knowledge Store with atomic hot reload for ANDO.5 AI
+
+تُحمَّل KNOWLEDGE_BASE و INTENTS من ملف JSON، وتُبنى الفهارس المشتقة في
+الخلفية، ثم تُستبدل اللقطة (Snapshot) كاملة بإسناد مرجع واحد. الطلبات الجارية
+تحتفظ باللقطة التي بدأت بها ولا تنتظر أي قفل أثناء إعادة البناء.
+
+يمكن أيضاً تجميع الملف مسبقاً إلى لقطة ثنائية (compiled.py) تُحمَّل بـ mmap:
+    python knowledge.py knowledge.json knowledge.kbs
+ثم ANDO5_KNOWLEDGE_FILE=knowledge.kbs.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+import compiled
+import config
+from catalog import LanguageCatalog
+from matcher import AUTOMATON_ARRAYS, CompiledLanguageMatcher, IntentMatcher, LanguageMatcher
+from prepared import PreparedResponse
+from recommender import Recommender
+
+# أعمدة جدول اللغات في اللقطة المُجمَّعة
+LANGUAGE_COLUMNS = ("name", "message", "recommendation", "body", "gzip_body", "etag")
+
+logger = logging.getLogger(__name__)
+
+
+def render_language_info(language: str, info: Dict) -> str:
+    """نص معلومات اللغة كما يظهر في المحادثة"""
+    msg = f"🔹 **{language.upper()}**\n"
+    msg += f"{info['description']}\n"
+    msg += f"الصعوبة: {info['difficulty']}\n"
+    msg += f"الشهرة: {info['popularity']}"
+    return msg
+
+
+def render_recommendation(language: str, info: Dict) -> str:
+    """نص التوصية للغة مختارة"""
+    return f"""
+            اخترت {language} - اختيار رائع! 🎯
+            
+            {info['description']}
+            
+            استخدامات: {', '.join(info['uses'])}
+            
+            مستوى الصعوبة: {info['difficulty']}
+            
+            الموارد الموصى بها:
+            """ + "\n            ".join([f"- {r['name']}" for r in info['resources']])
+
+
+def _matcher_options() -> Dict:
+    return {
+        "fuzzy_below": config.MIN_CONFIDENCE_THRESHOLD if config.FUZZY_MATCHING else None,
+        "fuzzy_budget": config.FUZZY_BUDGET_MS / 1000,
+        "max_candidates": config.FUZZY_MAX_CANDIDATES,
+    }
+
+
+def _payload_cache_control() -> str:
+    return f"public, max-age={config.STATIC_CACHE_MAX_AGE}"
+
+
+class KnowledgeSnapshot:
+    """لقطة ثابتة من قاعدة المعارف وكل الفهارس المشتقة منها"""
+
+    __slots__ = ("knowledge_base", "intents", "version", "catalog", "recommender",
+                 "intent_matcher", "language_matcher",
+                 "language_messages", "recommendations", "language_payloads")
+
+    def __init__(self, knowledge_base: Dict, intents: Dict, version: str):
+        self.knowledge_base = knowledge_base
+        self.intents = intents
+        self.version = version
+        self.catalog = LanguageCatalog(knowledge_base)
+        self.recommender = Recommender(knowledge_base)
+        self.intent_matcher = IntentMatcher(intents, **_matcher_options())
+        self.language_matcher = LanguageMatcher(knowledge_base)
+        # النصوص الثابتة لكل لغة تُجهَّز مرة واحدة لكل لقطة
+        self.language_messages = {lang: render_language_info(lang, info)
+                                  for lang, info in knowledge_base.items()}
+        self.recommendations = {lang: render_recommendation(lang, info)
+                                for lang, info in knowledge_base.items()}
+        # ردود /api/language-info جاهزة كـ bytes مع ETag
+        cache_control = _payload_cache_control()
+        self.language_payloads = {
+            lang: PreparedResponse({"status": "success", "data": info}, cache_control=cache_control)
+            for lang, info in knowledge_base.items()
+        }
+
+    @classmethod
+    def from_compiled(cls, path: str) -> "KnowledgeSnapshot":
+        """لقطة فوق ملف مُجمَّع: الفهارس والرسائل تُقرأ من mmap عند الحاجة"""
+        snap = compiled.SnapshotFile(path)
+        blobs = snap.blobs()
+        data = json.loads(str(snap.raw("source"), "utf-8"))
+
+        self = cls.__new__(cls)
+        self.knowledge_base = data["knowledge_base"]
+        self.intents = data["intents"]
+        self.version = snap.source_version
+        self.catalog = LanguageCatalog(self.knowledge_base)
+        self.recommender = Recommender(self.knowledge_base)
+
+        intent_names = [blobs.text(i) for i in snap.u32("intent_names")]
+        postings = compiled.CompiledPostings(
+            blobs, snap.u32("vocab_hash"), snap.u32("post_offsets"), snap.u32("post_ids"))
+        self.intent_matcher = IntentMatcher.from_compiled(
+            postings, compiled.IndexedNames(snap.u32("pattern_intent"), intent_names),
+            snap.u32("pattern_size"), **_matcher_options())
+
+        self.language_matcher = CompiledLanguageMatcher(
+            {name: snap.u32("ac_" + name) for name in AUTOMATON_ARRAYS},
+            [blobs.text(i) for i in snap.u32("ac_keys")])
+
+        rows = snap.u32("languages")
+        width = len(LANGUAGE_COLUMNS)
+        index = {blobs.text(rows[row * width]): row for row in range(len(rows) // width)}
+        cache_control = _payload_cache_control()
+
+        def column(name: str, row: int) -> int:
+            return rows[row * width + LANGUAGE_COLUMNS.index(name)]
+
+        self.language_messages = compiled.LazyMap(
+            index, lambda row: blobs.text(column("message", row)))
+        self.recommendations = compiled.LazyMap(
+            index, lambda row: blobs.text(column("recommendation", row)))
+        self.language_payloads = compiled.LazyMap(index, lambda row: PreparedResponse.from_parts(
+            blobs.bytes(column("body", row)), blobs.bytes(column("gzip_body", row)),
+            blobs.text(column("etag", row)), cache_control=cache_control))
+        return self
+
+
+def _read_source(path: str):
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw.decode("utf-8"))
+    knowledge_base = data.get("knowledge_base")
+    intents = data.get("intents")
+    if not isinstance(knowledge_base, dict) or not isinstance(intents, dict):
+        raise ValueError("knowledge file must contain 'knowledge_base' and 'intents' objects")
+    return raw, knowledge_base, intents
+
+
+def load_snapshot(path: str) -> KnowledgeSnapshot:
+    """قراءة الملف (JSON أو لقطة مُجمَّعة) وبناء لقطة جديدة كاملة"""
+    if compiled.is_compiled(path):
+        return KnowledgeSnapshot.from_compiled(path)
+    raw, knowledge_base, intents = _read_source(path)
+    version = hashlib.sha1(raw).hexdigest()[:12]
+    return KnowledgeSnapshot(knowledge_base, intents, version)
+
+
+def compile_snapshot(source: str, output: str) -> KnowledgeSnapshot:
+    """تجميع ملف JSON إلى لقطة ثنائية (كتابة ذرية حتى يلتقطها المراقب كاملة)"""
+    raw, knowledge_base, intents = _read_source(source)
+    snapshot = KnowledgeSnapshot(knowledge_base, intents, hashlib.sha1(raw).hexdigest()[:12])
+    matcher = snapshot.intent_matcher
+
+    # الكلمات أولاً حتى يكون رقم الكلمة هو رقم نصها
+    blobs = compiled.BlobBuilder()
+    vocab = [token.encode("utf-8") for token in matcher.postings]
+    for token in vocab:
+        blobs.add(token)
+    post_offsets, post_ids = [0], []
+    for ids in matcher.postings.values():
+        post_ids.extend(ids)
+        post_offsets.append(len(post_ids))
+
+    intent_ids = {intent: i for i, intent in enumerate(intents)}
+    languages = []
+    for lang in knowledge_base:
+        payload = snapshot.language_payloads[lang]
+        languages.extend(blobs.add(value) for value in (
+            lang, snapshot.language_messages[lang], snapshot.recommendations[lang],
+            payload.body, payload.gzip_body, payload.etag))
+
+    automaton, keys = snapshot.language_matcher.export()
+    sections = {
+        "vocab_hash": compiled.hash_table(vocab),
+        "post_offsets": post_offsets,
+        "post_ids": post_ids,
+        "pattern_intent": [intent_ids[intent] for intent in matcher.pattern_intents],
+        "pattern_size": matcher.pattern_sizes,
+        "intent_names": [blobs.add(intent) for intent in intents],
+        "languages": languages,
+        "ac_keys": [blobs.add(key) for key in keys],
+        **{"ac_" + name: values for name, values in automaton.items()},
+        "source": raw,
+    }
+    sections["blob_offsets"] = blobs.offsets
+    sections["blob_data"] = bytes(blobs.data)
+
+    tmp = f"{output}.tmp"
+    compiled.write(tmp, snapshot.version, sections)
+    os.replace(tmp, output)
+    return snapshot
+
+
+class KnowledgeStore:
+    """يحتفظ باللقطة الحالية ويراقب الملف لإعادة تحميله"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot = load_snapshot(path)
+        self._stat = self._file_stat()
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[KnowledgeSnapshot], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def current(self) -> KnowledgeSnapshot:
+        """اللقطة الحالية (قراءة مرجع واحد، بدون قفل)"""
+        return self._snapshot
+
+    def add_listener(self, callback: Callable[[KnowledgeSnapshot], None]) -> None:
+        """تسجيل دالة تُستدعى بعد كل تبديل ناجح للقطة"""
+        self._listeners.append(callback)
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def reload(self) -> bool:
+        """إعادة البناء ثم التبديل الذري؛ تُبقي اللقطة القديمة عند الفشل"""
+        with self._reload_lock:
+            stat = self._file_stat()
+            try:
+                snapshot = load_snapshot(self.path)
+            except (OSError, ValueError) as e:
+                logger.warning("knowledge reload failed, keeping version %s: %s",
+                               self._snapshot.version, e)
+                self._stat = stat
+                return False
+            except Exception:
+                # مدخل ناقص أو بنوع خاطئ (KeyError/TypeError أثناء البناء)
+                logger.exception("knowledge reload failed, keeping version %s",
+                                 self._snapshot.version)
+                self._stat = stat
+                return False
+            self._stat = stat
+            if snapshot.version == self._snapshot.version:
+                return False
+            self._snapshot = snapshot
+
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception:
+                logger.exception("knowledge reload listener failed")
+        logger.info("knowledge base reloaded (version %s)", snapshot.version)
+        return True
+
+    def check(self) -> bool:
+        """إعادة التحميل فقط إذا تغير الملف منذ آخر فحص"""
+        if self._file_stat() == self._stat:
+            return False
+        return self.reload()
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """تشغيل خيط خلفي يفحص الملف كل interval ثانية"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                # ملف تالف واحد لا يوقف المراقبة حتى إعادة تشغيل العملية
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception("knowledge watcher check failed")
+
+        self._watcher = threading.Thread(target=watch, name="knowledge-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """إيقاف خيط المراقبة"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        self._stop.clear()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python knowledge.py SOURCE.json OUTPUT.kbs")
+    result = compile_snapshot(sys.argv[1], sys.argv[2])
+    print(f"compiled {sys.argv[1]} -> {sys.argv[2]} (version {result.version}, "
+          f"{len(result.intent_matcher)} patterns, {len(result.knowledge_base)} languages)")
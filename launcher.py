@@ -7,10 +7,13 @@ ANDO.5 AI Quick Launcher
 استخدم هذا الملف لتشغيل الخادم والاختبارات بسهولة
 """
 
+import argparse
+import logging
 import os
 import sys
 import subprocess
 import platform
+import tempfile
 import time
 
 class Colors:
@@ -43,6 +46,7 @@ def print_menu():
     print(f"  {Colors.GREEN}3{Colors.ENDC} - تثبيت المكتبات (Install Requirements)")
     print(f"  {Colors.GREEN}4{Colors.ENDC} - فتح المتصفح (Open Browser)")
     print(f"  {Colors.GREEN}5{Colors.ENDC} - عرض المعلومات (Show Info)")
+    print(f"  {Colors.GREEN}6{Colors.ENDC} - تشغيل الإنتاج بعدة عمليات (Run Production Server)")
     print(f"  {Colors.GREEN}0{Colors.ENDC} - خروج (Exit)\n")
 
 def run_server():
@@ -55,6 +59,39 @@ def run_server():
     except Exception as e:
         print(f"{Colors.RED}❌ خطأ: {e}{Colors.ENDC}")
 
+def run_production(workers: int = 0, host: str = None, port: int = None):
+    """تشغيل الإنتاج: عمال متفرعون على مقبس واحد مع الإشراف وإعادة التشغيل المتدرجة"""
+    if not hasattr(os, 'fork'):
+        print(f"{Colors.RED}❌ وضع الإنتاج يحتاج نظاماً يدعم fork (Linux أو macOS){Colors.ENDC}")
+        return
+    import config
+    from prefork import Arbiter, default_workers
+    
+    workers = workers or config.WORKERS or default_workers()
+    host = host or config.HOST
+    port = port or config.PORT
+    # مجلد مشترك لحالة العمال ومقاييسهم، يرثه كل عامل من البيئة
+    run_dir = tempfile.mkdtemp(prefix='ando5-')
+    status_dir = os.environ.setdefault('ANDO5_WORKER_DIR', os.path.join(run_dir, 'workers'))
+    metrics_dir = os.environ.setdefault('ANDO5_METRICS_DIR', os.path.join(run_dir, 'metrics'))
+    # دلاء الذاكرة منفصلة في كل عامل فتسمح بـ workers ضعف الحد؛ الملف المشترك يبقيه حداً واحداً
+    if workers > 1 and config.RATE_LIMIT_STORAGE == 'memory':
+        os.environ['ANDO5_RATE_LIMIT_STORAGE'] = os.path.join(run_dir, 'ratelimit.db')
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(process)d] %(message)s")
+    print(f"\n{Colors.BOLD}{Colors.BLUE}🚀 تشغيل الإنتاج: {workers} عمال على http://{host}:{port}{Colors.ENDC}")
+    print(f"{Colors.CYAN}🔄 إعادة تشغيل بلا انقطاع: kill -HUP {os.getpid()}{Colors.ENDC}\n")
+    try:
+        Arbiter(host, port, workers, status_dir,
+                backlog=config.LISTEN_BACKLOG,
+                boot_timeout=config.WORKER_BOOT_TIMEOUT,
+                timeout=config.WORKER_TIMEOUT,
+                graceful_timeout=config.WORKER_GRACEFUL_TIMEOUT,
+                metrics_dir=metrics_dir).run()
+        print(f"\n{Colors.YELLOW}⏸️ تم إيقاف الخادم{Colors.ENDC}")
+    except Exception as e:
+        print(f"{Colors.RED}❌ خطأ: {e}{Colors.ENDC}")
+
 def test_api():
     """اختبار الـ API"""
     print(f"\n{Colors.BOLD}{Colors.BLUE}🧪 اختبار الـ API...{Colors.ENDC}\n")
@@ -129,7 +166,7 @@ def main():
         print_header()
         print_menu()
         
-        choice = input(f"{Colors.BOLD}{Colors.YELLOW}اختر (0-5): {Colors.ENDC}").strip()
+        choice = input(f"{Colors.BOLD}{Colors.YELLOW}اختر (0-6): {Colors.ENDC}").strip()
         
         if choice == '1':
             run_server()
@@ -141,6 +178,8 @@ def main():
             open_browser()
         elif choice == '5':
             show_info()
+        elif choice == '6':
+            run_production()
         elif choice == '0':
             print(f"\n{Colors.GREEN}👋 وداعاً!{Colors.ENDC}\n")
             break
@@ -150,8 +189,17 @@ def main():
         input(f"\n{Colors.YELLOW}اضغط Enter للمتابعة...{Colors.ENDC}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="ANDO.5 AI Quick Launcher")
+    parser.add_argument('--production', action='store_true', help="تشغيل الإنتاج مباشرة بدون القائمة")
+    parser.add_argument('--workers', type=int, default=0, help="عدد العمال (الافتراضي عامل لكل نواة)")
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    args = parser.parse_args()
     try:
-        main()
+        if args.production:
+            run_production(args.workers, args.host, args.port)
+        else:
+            main()
     except KeyboardInterrupt:
         print(f"\n\n{Colors.YELLOW}⏸️ تم الإيقاف من قبل المستخدم{Colors.ENDC}\n")
     except Exception as e:
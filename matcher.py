@@ -0,0 +1,318 @@
+"""
+محرك مطابقة النوايا المُجمَّع مسبقاً
+Compiled Intent Matcher for ANDO.5 AI
+
+يُبنى الفهرس مرة واحدة من INTENTS عند بدء التشغيل (أو يُقرأ جاهزاً من لقطة
+مُجمَّعة)، ثم يُقيَّم كل طلب بتقطيع النص مرة واحدة وتقييم الأنماط التي تشترك
+معه في كلمة فقط.
+"""
+
+import bisect
+from typing import Dict, FrozenSet, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from fuzzy import FuzzyIndex
+from textnorm import fold, tokenize, tokenize_pattern
+
+try:
+    import numpy as np
+except ImportError:  # NumPy اختياري: يُستخدم المسار البسيط بدونه
+    np = None
+
+
+class IntentMatcher:
+    """فهرس مقلوب: كلمة ← (نية، نمط) مع مجموعات كلمات الأنماط المُطبَّعة مسبقاً
+
+    إذا لم تتجاوز المطابقة الدقيقة fuzzy_below، تُعاد المحاولة بمطابقة تقريبية
+    (أخطاء إملائية وسوابق عربية) ضمن ميزانية زمنية fuzzy_budget بالثواني.
+    """
+
+    def __init__(self, intents: Dict, fuzzy_below: Optional[float] = None,
+                 fuzzy_budget: float = 0.002, max_candidates: int = 8):
+        # الأنماط مرتبة حسب ترتيب INTENTS للحفاظ على نفس نتيجة التعادل
+        self.pattern_intents: List[str] = []
+        self.pattern_tokens: List[FrozenSet[str]] = []
+        self.postings: Dict[str, List[int]] = {}
+
+        for intent, data in intents.items():
+            for pattern in data["patterns"]:
+                tokens = tokenize_pattern(pattern)
+                pattern_id = len(self.pattern_intents)
+                self.pattern_intents.append(intent)
+                self.pattern_tokens.append(tokens)
+                for token in tokens:
+                    self.postings.setdefault(token, []).append(pattern_id)
+        self.pattern_sizes: Sequence[int] = [len(tokens) for tokens in self.pattern_tokens]
+        self._setup(fuzzy_below, fuzzy_budget, max_candidates)
+
+    @classmethod
+    def from_compiled(cls, postings: Mapping[str, Sequence[int]], pattern_intents: Sequence[str],
+                      pattern_sizes: Sequence[int], fuzzy_below: Optional[float] = None,
+                      fuzzy_budget: float = 0.002, max_candidates: int = 8) -> "IntentMatcher":
+        """مطابق فوق جداول جاهزة من لقطة مُجمَّعة (بدون تقطيع الأنماط)"""
+        self = cls.__new__(cls)
+        self.pattern_intents = pattern_intents
+        self.pattern_tokens = None
+        self.postings = postings
+        self.pattern_sizes = pattern_sizes
+        self._setup(fuzzy_below, fuzzy_budget, max_candidates)
+        return self
+
+    def _setup(self, fuzzy_below: Optional[float], fuzzy_budget: float, max_candidates: int) -> None:
+        # كل الحالة تُبنى هنا ولا تتغير بعدها، فتُقرأ من عدة خيوط بدون أقفال
+        self._csr = self._posting_arrays() if np is not None else None
+        self.fuzzy_below = fuzzy_below
+        self.fuzzy_budget = fuzzy_budget
+        self.fuzzy = (FuzzyIndex(self.postings, max_candidates)
+                      if fuzzy_below is not None else None)
+
+    def __len__(self) -> int:
+        return len(self.pattern_intents)
+
+    def match(self, text: str) -> Tuple[Optional[str], float]:
+        """أفضل نية للنص مع درجة الثقة"""
+        return self.match_tokens(tokenize(text))
+
+    def match_tokens(self, tokens: FrozenSet[str]) -> Tuple[Optional[str], float]:
+        """أفضل نية لمجموعة كلمات مُقطَّعة مسبقاً"""
+        overlap: Dict[int, int] = {}
+        postings = self.postings
+        for token in tokens:
+            for pattern_id in postings.get(token, ()):
+                overlap[pattern_id] = overlap.get(pattern_id, 0) + 1
+        return self._fuzzy_fallback(tokens, self._best(overlap))
+
+    def _fuzzy_fallback(self, tokens: FrozenSet[str],
+                        result: Tuple[Optional[str], float]) -> Tuple[Optional[str], float]:
+        """إعادة التقييم تقريبياً عندما لا تكفي المطابقة الدقيقة"""
+        if self.fuzzy is None or result[1] > self.fuzzy_below:
+            return result
+        weights = self.fuzzy.expand(tokens, self.postings, self.fuzzy_budget)
+        if weights is None:
+            return result
+
+        overlap: Dict[int, float] = {}
+        for token, weight in weights.items():
+            for pattern_id in self.postings[token]:
+                overlap[pattern_id] = overlap.get(pattern_id, 0) + weight
+        fuzzy_result = self._best(overlap)
+        return fuzzy_result if fuzzy_result[1] > result[1] else result
+
+    def _best(self, overlap: Dict[int, float]) -> Tuple[Optional[str], float]:
+        """النمط ذو أعلى درجة (تداخل ÷ عدد كلمات النمط)"""
+        best_id = -1
+        best_score = 0
+        for pattern_id, count in overlap.items():
+            score = count / self.pattern_sizes[pattern_id]
+            # عند التعادل يفوز النمط الأسبق كما في المسح الكامل
+            if score > best_score or (score == best_score and pattern_id < best_id):
+                best_score = score
+                best_id = pattern_id
+
+        if best_id < 0:
+            return None, 0
+        return self.pattern_intents[best_id], best_score
+
+    def match_batch(self, texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        """مطابقة دفعة من الرسائل دفعة واحدة بنفس نتائج match"""
+        token_sets = [tokenize(text) for text in texts]
+        if self._csr is None or not self.pattern_sizes:
+            return [self.match_tokens(tokens) for tokens in token_sets]
+        results = self._match_batch_numpy(token_sets)
+        return [self._fuzzy_fallback(tokens, result)
+                for tokens, result in zip(token_sets, results)]
+
+    def _posting_arrays(self):
+        """قوائم الترحيل كمصفوفات CSR (دالة رقم العمود، الإزاحات، الأنماط، الأحجام)"""
+        sizes = np.array(self.pattern_sizes, dtype=np.float64)
+        if not isinstance(self.postings, dict):
+            # اللقطة المُجمَّعة تخزنها CSR أصلاً فتُقرأ من الملف دون نسخ
+            offsets, flat = self.postings.arrays()
+            return (self.postings.token_id, np.asarray(offsets, dtype=np.int64),
+                    np.frombuffer(flat, dtype=np.uint32), sizes)
+        vocab = {token: i for i, token in enumerate(self.postings)}
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in self.postings.values()])
+        flat = np.fromiter((pid for ids in self.postings.values() for pid in ids),
+                           dtype=np.int64, count=int(offsets[-1]))
+        return vocab.get, offsets, flat, sizes
+
+    def _match_batch_numpy(self, token_sets: List[FrozenSet[str]]) -> List[Tuple[Optional[str], float]]:
+        # مصفوفة رسائل × كلمات متفرقة مضروبة في مصفوفة كلمات × أنماط:
+        # كل زوج (رسالة، نمط) مشترك يُعد مرة لكل كلمة مشتركة
+        column, offsets, flat, sizes = self._csr
+        rows, cols = [], []
+        for row, tokens in enumerate(token_sets):
+            for token in tokens:
+                col = column(token)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+
+        results: List[Tuple[Optional[str], float]] = [(None, 0)] * len(token_sets)
+        if not rows:
+            return results
+
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        lengths = offsets[cols + 1] - offsets[cols]
+        starts = np.repeat(offsets[cols] - np.cumsum(lengths) + lengths, lengths)
+        pattern_ids = flat[starts + np.arange(int(lengths.sum()))]
+        message_ids = np.repeat(rows, lengths)
+
+        n_patterns = len(self.pattern_sizes)
+        keys, counts = np.unique(message_ids * n_patterns + pattern_ids, return_counts=True)
+        message_ids, pattern_ids = np.divmod(keys, n_patterns)
+        scores = counts / sizes[pattern_ids]
+
+        # لكل رسالة: أعلى درجة ثم أصغر رقم نمط (نفس قاعدة التعادل)
+        order = np.lexsort((pattern_ids, -scores, message_ids))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = message_ids[order][1:] != message_ids[order][:-1]
+        for idx in order[first]:
+            results[int(message_ids[idx])] = (self.pattern_intents[int(pattern_ids[idx])],
+                                              float(scores[idx]))
+        return results
+
+
+# أسماء مصفوفات الآلة كما تُصدَّر إلى اللقطة المُجمَّعة
+AUTOMATON_ARRAYS = ("edge_ptr", "edge_chars", "edge_next", "fail", "out_ptr", "out_len", "out_key")
+
+
+class LanguageMatcher:
+    """آلة Aho-Corasick لاستخراج أسماء اللغات وأسمائها البديلة في مرور واحد"""
+
+    def __init__(self, knowledge_base: Dict):
+        # كل عقدة: انتقالات، رابط الفشل، والمطابقات المنتهية عندها (الطول، المفتاح)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for key, entry in knowledge_base.items():
+            for term in [key] + list(entry.get("aliases", [])):
+                self._add(fold(term), key)
+        self._link()
+
+    def _add(self, term: str, key: str) -> None:
+        """إضافة مصطلح إلى شجرة البادئات"""
+        if not term:
+            return
+        node = 0
+        for char in term:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(term), key))
+
+    def _link(self) -> None:
+        """حساب روابط الفشل بالعرض أولاً ودمج المخرجات"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def export(self) -> Tuple[Dict[str, List[int]], List[str]]:
+        """الآلة كمصفوفات أعداد (الانتقالات مرتبة حسب رقم الحرف) وقائمة المفاتيح"""
+        keys: Dict[str, int] = {}
+        arrays: Dict[str, List[int]] = {name: [] for name in AUTOMATON_ARRAYS}
+        arrays["edge_ptr"].append(0)
+        arrays["out_ptr"].append(0)
+        for node, edges in enumerate(self._goto):
+            for char, child in sorted(edges.items()):
+                arrays["edge_chars"].append(ord(char))
+                arrays["edge_next"].append(child)
+            arrays["edge_ptr"].append(len(arrays["edge_chars"]))
+            arrays["fail"].append(self._fail[node])
+            for length, key in self._out[node]:
+                arrays["out_len"].append(length)
+                arrays["out_key"].append(keys.setdefault(key, len(keys)))
+            arrays["out_ptr"].append(len(arrays["out_len"]))
+        return arrays, list(keys)
+
+    @staticmethod
+    def _is_boundary(char: str) -> bool:
+        # الحروف اللاتينية الملاصقة تعني أن المطابقة جزء من كلمة أخرى (js داخل json)
+        return not ('a' <= char <= 'z')
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """كل الإشارات غير المتداخلة (البداية، النهاية، المفتاح) مع تفضيل الأطول
+
+        المواضع محسوبة في النص بعد fold (قد يكون أقصر بحذف التشكيل).
+        """
+        text = fold(text)
+        candidates = []
+        for end, outputs in self._scan(text):
+            for length, key in outputs:
+                start = end - length
+                if start > 0 and not self._is_boundary(text[start - 1]):
+                    continue
+                if end < len(text) and not self._is_boundary(text[end]):
+                    continue
+                candidates.append((start, end, key))
+
+        # الأبعد يساراً ثم الأطول، دون تداخل
+        candidates.sort(key=lambda m: (m[0], m[0] - m[1]))
+        matches = []
+        last_end = 0
+        for start, end, key in candidates:
+            if start >= last_end:
+                matches.append((start, end, key))
+                last_end = end
+        return matches
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, List[Tuple[int, str]]]]:
+        """(موضع النهاية، المطابقات المنتهية عنده) لكل حرف تنتهي عنده مطابقة"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                yield end, out[node]
+
+    def find(self, text: str) -> Optional[str]:
+        """أول لغة مذكورة في النص"""
+        matches = self.find_all(text)
+        return matches[0][2] if matches else None
+
+
+class CompiledLanguageMatcher(LanguageMatcher):
+    """نفس الآلة فوق مصفوفات export() كما قُرئت من لقطة مُجمَّعة (بحث ثنائي في الانتقالات)"""
+
+    def __init__(self, arrays: Mapping[str, Sequence[int]], keys: Sequence[str]):
+        self._arrays = arrays
+        self._keys = keys
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, List[Tuple[int, str]]]]:
+        arrays, keys = self._arrays, self._keys
+        edge_ptr, edge_chars, edge_next = arrays["edge_ptr"], arrays["edge_chars"], arrays["edge_next"]
+        fail, out_ptr, out_len, out_key = arrays["fail"], arrays["out_ptr"], arrays["out_len"], arrays["out_key"]
+        node = 0
+        for end, char in enumerate(text, 1):
+            code = ord(char)
+            while True:
+                hi = edge_ptr[node + 1]
+                i = bisect.bisect_left(edge_chars, code, edge_ptr[node], hi)
+                if i < hi and edge_chars[i] == code:
+                    node = edge_next[i]
+                    break
+                if not node:
+                    break
+                node = fail[node]
+            lo, hi = out_ptr[node], out_ptr[node + 1]
+            if lo != hi:
+                yield end, [(out_len[i], keys[out_key[i]]) for i in range(lo, hi)]
@@ -0,0 +1,261 @@
+"""
+مقاييس التشغيل بصيغة Prometheus
+Prometheus-style metrics for ANDO.5 AI
+
+عدادات ومدرجات تكرارية (Histograms) خفيفة في ذاكرة العملية. مع عدة عمليات
+تكتب كل عملية حالتها في مجلد مشترك، ويجمع /api/metrics ملفات كل العمليات.
+المشرف يفرغ المجلد عند بدئه ويدمج ملف كل عملية تخرج في ملف واحد للعمليات المنتهية،
+فلا تتراكم ملفات العمال القدامى ولا تنقص العدادات عند إعادة تشغيل عامل.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CONFIDENCE_BUCKETS = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger(__name__)
+
+STATE_PATTERN = "metrics_*.json"
+RETIRED_STATE = "metrics_retired.json"
+
+
+class Counter:
+    """عداد تراكمي لكل مجموعة تسميات"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dump(self) -> Dict:
+        with self._lock:
+            return {"values": [[list(map(list, k)), v] for k, v in self.values.items()]}
+
+    def merge(self, state: Dict) -> None:
+        for labels, value in state["values"]:
+            key = tuple(tuple(pair) for pair in labels)
+            self.values[key] = self.values.get(key, 0) + value
+
+    def render(self) -> Iterable[str]:
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram:
+    """مدرج تكراري بحدود ثابتة لكل مجموعة تسميات"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        # لكل تسمية: [عدادات الحدود..., +Inf] ثم المجموع
+        self.values: Dict[Labels, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def dump(self) -> Dict:
+        with self._lock:
+            return {"values": [[list(map(list, k)), list(counts), total]
+                               for k, (counts, total) in self.values.items()]}
+
+    def merge(self, state: Dict) -> None:
+        for labels, counts, total in state["values"]:
+            key = tuple(tuple(pair) for pair in labels)
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            for i, count in enumerate(counts):
+                entry[0][i] += count
+            entry[1] += total
+
+    def render(self) -> Iterable[str]:
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(key)} {cumulative}"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class AppMetrics:
+    """كل مقاييس الخادم في مكان واحد"""
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self.requests = Counter("ando5_http_requests_total", "HTTP requests by route, method and status")
+        self.errors = Counter("ando5_http_errors_total", "HTTP responses with status >= 500 by route")
+        self.latency = Histogram("ando5_http_request_duration_seconds", "Request latency by route")
+        self.stages = Histogram("ando5_chat_stage_duration_seconds", "get_response time by stage")
+        self.confidence = Histogram("ando5_chat_confidence", "Intent confidence of chat replies",
+                                    CONFIDENCE_BUCKETS)
+        self.replies = Counter("ando5_chat_replies_total", "Chat replies by kind (language, intent, fallback)")
+        self.families = [self.requests, self.errors, self.latency,
+                         self.stages, self.confidence, self.replies]
+        self.multiproc_dir = multiproc_dir
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        """تسجيل طلب HTTP منتهٍ"""
+        self.requests.inc(route=route, method=method, status=str(status))
+        if status >= 500:
+            self.errors.inc(route=route)
+        self.latency.observe(seconds, route=route)
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        """تسجيل زمن مرحلة من مراحل get_response"""
+        self.stages.observe(seconds, stage=stage)
+
+    def observe_reply(self, kind: str, confidence: float) -> None:
+        """تسجيل نوع الرد ودرجة الثقة"""
+        self.replies.inc(kind=kind)
+        self.confidence.observe(confidence)
+
+    def _state_path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics_{pid}.json")
+
+    def flush(self) -> None:
+        """كتابة حالة هذه العملية في المجلد المشترك (استبدال ذري)"""
+        if not self.multiproc_dir:
+            return
+        path = self._state_path(os.getpid())
+        # خيط الكتابة الدورية وطلبات /api/metrics قد يكتبون في نفس اللحظة
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.dump(), fh)
+        os.replace(tmp, path)
+
+    def dump(self) -> Dict:
+        """حالة كل المقاييس كقاموس قابل للتحويل إلى JSON"""
+        return {family.name: family.dump() for family in self.families}
+
+    def start_flushing(self, interval: float) -> None:
+        """خيط خلفي يكتب الحالة دورياً حتى تظهر في تجميع العمليات الأخرى"""
+        if not self.multiproc_dir:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                # خطأ قرص واحد لا يوقف الخيط، وإلا تختفي عدادات العملية من التجميع
+                try:
+                    self.flush()
+                except OSError:
+                    logger.exception("metrics flush failed")
+
+        threading.Thread(target=loop, name="metrics-flush", daemon=True).start()
+        # آخر ما سُجل منذ الكتابة الدورية الأخيرة، قبل أن يدمجه المشرف
+        atexit.register(self.flush)
+
+    def render(self) -> str:
+        """نص Prometheus لهذه العملية أو لكل العمليات"""
+        # نسخ فارغة تُدمج فيها الحالات حتى لا نقرأ قواميس تتغير أثناء الطلبات
+        families = [type(f)(f.name, f.help, *([f.buckets] if isinstance(f, Histogram) else []))
+                    for f in self.families]
+        by_name = {f.name: f for f in families}
+
+        if not self.multiproc_dir:
+            states = [self.dump()]
+        else:
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("metrics flush failed")
+            states = []
+            for path in glob.glob(os.path.join(self.multiproc_dir, STATE_PATTERN)):
+                try:
+                    with open(path, encoding="utf-8") as fh:
+                        states.append(json.load(fh))
+                except (OSError, ValueError):
+                    continue
+
+        for state in states:
+            for name, family_state in state.items():
+                if name in by_name:
+                    by_name[name].merge(family_state)
+
+        lines = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+def clear_multiproc_dir(directory: str) -> None:
+    """حذف حالات العمليات السابقة (تشغيل سابق أو عمال لم يُدمجوا)"""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "metrics_*.json*")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def retire_process(directory: str, pid: int) -> None:
+    """دمج حالة عملية منتهية في ملف العمليات المنتهية وحذف ملفها"""
+    path = os.path.join(directory, f"metrics_{pid}.json")
+    retired_path = os.path.join(directory, RETIRED_STATE)
+    merged = AppMetrics()
+    by_name = {family.name: family for family in merged.families}
+    for source in (retired_path, path):
+        try:
+            with open(source, encoding="utf-8") as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for name, family_state in state.items():
+            if name in by_name:
+                by_name[name].merge(family_state)
+    tmp = f"{retired_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(merged.dump(), fh)
+    os.replace(tmp, retired_path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,487 @@
+"""
+تشغيل الإنتاج بعدة عمليات متفرعة
+Pre-fork multi-worker server with warm-up and rolling reload for ANDO.5 AI
+
+- Arbiter: العملية المشرفة. تفتح مقبس الاستماع مرة واحدة وتتفرع منه N عمال (عامل
+  لكل نواة افتراضياً) يقبلون الاتصالات منه مباشرة. تعيد تشغيل العامل الذي ينهار أو
+  تتوقف نبضاته، ومع SIGHUP تعيد تشغيل العمال واحداً تلو الآخر: العامل الجديد يسخن
+  ويبلغ أنه جاهز قبل أن يُطلب من القديم التوقف، فلا يبقى المقبس بلا عامل. SIGTERM
+  أو SIGINT يوقف الكل بهدوء.
+- Worker: يستورد AI بعد التفرع (فتلتقط إعادة التشغيل الكود الجديد، ولكل عامل خيوطه)
+  ويسخن الفهارس والذاكرة المؤقتة (AI.warm_up) قبل أول اتصال. مع SIGTERM يتوقف عن
+  القبول وينهي الطلبات الجارية ثم يخرج، فلا يُقطع طلب أثناء إعادة التشغيل.
+- كل عامل يكتب حالته كل WORKER_HEARTBEAT_INTERVAL في ملف JSON في مجلد مشترك،
+  ويعرض /api/health حالة كل العمال منه (read_statuses).
+- مع metrics_dir يفرغ المشرف مجلد المقاييس عند بدئه ويدمج ملف كل عامل يخرج
+  (metrics.retire_process)، فلا تبقى عدادات تشغيل سابق ولا ملفات عمال منتهين.
+
+يحتاج os.fork، أي Linux أو macOS.
+"""
+
+import atexit
+import importlib
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+from metrics import clear_multiproc_dir, retire_process
+
+logger = logging.getLogger(__name__)
+
+STATUS_PREFIX = "worker-"
+
+
+def default_workers() -> int:
+    """عامل لكل نواة"""
+    return os.cpu_count() or 1
+
+
+def status_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"{STATUS_PREFIX}{pid}.json")
+
+
+def write_status(directory: str, status: Dict) -> None:
+    """كتابة ذرية حتى لا تقرأ /api/health ملفاً نصف مكتوب"""
+    path = status_path(directory, status["pid"])
+    # النبضة ومعالج SIGTERM قد يكتبان في نفس اللحظة
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp, path)
+
+
+def read_statuses(directory: str, timeout: float) -> List[Dict]:
+    """حالة كل العمال مرتبة بالرقم؛ healthy للعامل الجاهز الذي نبضته أحدث من timeout"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    now = time.time()
+    statuses = []
+    for name in names:
+        if not (name.startswith(STATUS_PREFIX) and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            continue  # عامل أُزيل ملفه للتو
+        age = now - status.get("heartbeat", 0)
+        status["heartbeat_age"] = round(age, 3)
+        status["healthy"] = status.get("state") == "ready" and age < timeout
+        statuses.append(status)
+    return sorted(statuses, key=lambda status: (status.get("index", 0), status.get("started", 0)))
+
+
+class _RequestHandler(WSGIRequestHandler):
+    """اتصال keep-alive يُغلق بعد مهلة الخمول (timeout)، أو بعد طلبه الحالي أثناء التصريف"""
+
+    protocol_version = "HTTP/1.1"
+
+    def handle_one_request(self) -> None:
+        # يبقى الطلب السابق في raw_requestline إذا انتهت المهلة قبل قراءة سطر جديد
+        self.raw_requestline = b""
+        super().handle_one_request()
+        if self.raw_requestline:
+            self.server.count_request()
+        if self.server.draining:
+            self.close_connection = True
+
+    def log_request(self, code="-", size="-") -> None:
+        pass  # عدد الطلبات وزمنها في /metrics؛ سطر لكل طلب يبطئ العامل
+
+    def log_error(self, format: str, *args) -> None:
+        # انتهاء مهلة خمول keep-alive أمر عادي وليس خطأ
+        if not format.startswith("Request timed out"):
+            super().log_error(format, *args)
+
+
+class WorkerServer(ThreadedWSGIServer):
+    """خادم WSGI متعدد الخيوط فوق مقبس المشرف، يعدّ الاتصالات الجارية حتى يمكن تصريفها"""
+
+    def __init__(self, listener: socket.socket, app, keepalive: float):
+        handler = type("RequestHandler", (_RequestHandler,), {"timeout": keepalive})
+        host, port = listener.getsockname()[:2]
+        super().__init__(host, port, app, handler, fd=listener.fileno())
+        self.draining = False
+        self.connections = 0
+        self.requests = 0
+        self._idle = threading.Condition()
+
+    def get_request(self):
+        request = super().get_request()
+        # كل اتصال مقبول ينتهي بـ shutdown_request مرة واحدة، في خيطه أو بعد خطأ
+        with self._idle:
+            self.connections += 1
+        return request
+
+    def shutdown_request(self, request) -> None:
+        super().shutdown_request(request)
+        with self._idle:
+            self.connections -= 1
+            self._idle.notify_all()
+
+    def count_request(self) -> None:
+        with self._idle:
+            self.requests += 1
+
+    def drain(self, timeout: float) -> bool:
+        """انتظار انتهاء الاتصالات المقبولة؛ False إذا بقي بعضها بعد المهلة"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self.connections:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+
+class Worker:
+    """عملية عامل واحدة بعد التفرع"""
+
+    def __init__(self, index: int, listener: socket.socket, ready_fd: int, status_dir: str):
+        self.index = index
+        self.listener = listener
+        self.ready_fd = ready_fd
+        self.status_dir = status_dir
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.state = "booting"
+        self.warmup: Dict = {}
+        self.server: Optional[WorkerServer] = None
+        self.store = None
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_term)
+        # المشرف ينسق الإيقاف وإعادة التشغيل؛ Ctrl+C في الطرفية يصل لكل المجموعة
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        # config مستورد في المشرف؛ يُعاد تحميله حتى تلتقط إعادة التشغيل تعديلاته
+        import config
+        importlib.reload(config)
+        import AI
+
+        self.store = AI.knowledge_store
+        self.warmup = AI.warm_up()
+        self.server = WorkerServer(self.listener, AI.app, config.WORKER_KEEPALIVE)
+        if self.state == "booting":
+            self.state = "ready"
+        stop_heartbeat = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(config.WORKER_HEARTBEAT_INTERVAL, stop_heartbeat),
+                         name="worker-heartbeat", daemon=True).start()
+        self.write_status()
+        os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+        if self.state == "ready":
+            self.server.serve_forever(poll_interval=0.5)
+        drained = self.server.drain(config.WORKER_GRACEFUL_TIMEOUT)
+        if not drained:
+            logger.warning("worker %d stopped with %d open connections", self.pid, self.server.connections)
+        stop_heartbeat.set()
+        self.server.server_close()
+        return 0
+
+    def _on_term(self, signum, frame) -> None:
+        self.state = "draining"
+        server = self.server
+        if server is not None and not server.draining:
+            server.draining = True
+            # shutdown ينتظر انتهاء serve_forever، فلا يُستدعى من خيطها
+            threading.Thread(target=server.shutdown, daemon=True).start()
+        try:
+            self.write_status()
+        except OSError:
+            pass
+
+    def _heartbeat(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                self.write_status()
+            except OSError as e:
+                logger.warning("worker %d status not written: %s", self.pid, e)
+
+    def write_status(self) -> None:
+        server = self.server
+        write_status(self.status_dir, {
+            "pid": self.pid,
+            "index": self.index,
+            "state": self.state,
+            "started": self.started,
+            "heartbeat": time.time(),
+            "warmup": self.warmup,
+            "knowledge_version": self.store.current().version if self.store else None,
+            "requests": server.requests if server else 0,
+            "connections": server.connections if server else 0,
+        })
+
+
+class _WorkerProcess:
+    """ما يعرفه المشرف عن عامل"""
+
+    __slots__ = ("pid", "index", "ready_fd", "started", "ready", "failed")
+
+    def __init__(self, pid: int, index: int, ready_fd: int):
+        self.pid = pid
+        self.index = index
+        self.ready_fd: Optional[int] = ready_fd
+        self.started = time.monotonic()
+        self.ready = False
+        self.failed = False
+
+
+class Arbiter:
+    """العملية المشرفة: مقبس مشترك وعمال متفرعون وإشراف وإعادة تشغيل متدرجة"""
+
+    def __init__(self, host: str, port: int, workers: int, status_dir: str, backlog: int = 2048,
+                 boot_timeout: float = 60.0, timeout: float = 30.0, graceful_timeout: float = 30.0,
+                 metrics_dir: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.size = max(1, workers)
+        self.status_dir = status_dir
+        self.backlog = backlog
+        self.boot_timeout = boot_timeout
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.metrics_dir = metrics_dir
+        self.workers: Dict[int, _WorkerProcess] = {}
+        # عمال طُلب منهم التوقف (إعادة تشغيل) ولم يخرجوا بعد؛ خروجهم لا يُعوَّض
+        self._retiring: Dict[int, _WorkerProcess] = {}
+        self._pending: Dict[int, float] = {}  # رقم العامل ← موعد إعادة تشغيله
+        self._stopping = False
+        self._reload_requested = False
+        self.listener: Optional[socket.socket] = None
+
+    def listen(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, self.port))
+        listener.listen(self.backlog)
+        # كل العمال يستيقظون على اتصال واحد؛ من يخسر السباق يعود لحلقته بدل أن يعلق في accept
+        listener.setblocking(False)
+        return listener
+
+    def run(self) -> None:
+        self.listener = self.listen()
+        os.makedirs(self.status_dir, exist_ok=True)
+        for name in os.listdir(self.status_dir):
+            if name.startswith(STATUS_PREFIX):
+                os.remove(os.path.join(self.status_dir, name))
+        if self.metrics_dir:
+            clear_multiproc_dir(self.metrics_dir)
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+        try:
+            booted = [self.spawn(index) for index in range(self.size)]
+            ready = sum(self.wait_ready(worker, self.boot_timeout) for worker in booted)
+            if not ready:
+                raise RuntimeError("no worker started; see the log above")
+            logger.info("serving on %s:%d with %d workers", self.host, self.port, ready)
+            while not self._stopping:
+                self.sleep(1.0)
+                self.reap()
+                self.check_timeouts()
+                self.spawn_pending()
+                if self._reload_requested and not self._stopping:
+                    self._reload_requested = False
+                    self.rolling_reload()
+        finally:
+            self.stop()
+
+    def _on_signal(self, signum, frame) -> None:
+        if signum == signal.SIGHUP:
+            self._reload_requested = True
+        elif signum in (signal.SIGTERM, signal.SIGINT):
+            self._stopping = True
+        try:
+            os.write(self._wake_w, b"!")
+        except BlockingIOError:
+            pass  # الأنبوب ممتلئ، فالحلقة ستستيقظ على أي حال
+
+    def spawn(self, index: int) -> _WorkerProcess:
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            os.close(ready_r)
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            for worker in list(self.workers.values()) + list(self._retiring.values()):
+                if worker.ready_fd is not None:
+                    os.close(worker.ready_fd)
+            code = 1
+            try:
+                code = Worker(index, self.listener, ready_w, self.status_dir).run()
+            except BaseException:
+                logger.exception("worker %d failed", os.getpid())
+            finally:
+                # الخروج من هنا وليس بفك مكدس حلقة المشرف الموروث، بعد دوال atexit الخاصة
+                # بالعامل (كتابة سجل المحادثات وحفظ الجلسات)
+                try:
+                    atexit._run_exitfuncs()
+                finally:
+                    os._exit(code)
+
+        os.close(ready_w)
+        worker = _WorkerProcess(pid, index, ready_r)
+        self.workers[pid] = worker
+        return worker
+
+    def sleep(self, timeout: float) -> None:
+        """انتظار إشارة أو رسالة جاهزية من عامل"""
+        booting = {worker.ready_fd: worker for worker in self.workers.values() if worker.ready_fd is not None}
+        try:
+            readable, _, _ = select.select([self._wake_r, *booting], [], [], timeout)
+        except InterruptedError:
+            return
+        for fd in readable:
+            if fd == self._wake_r:
+                try:
+                    while os.read(self._wake_r, 64):
+                        pass
+                except BlockingIOError:
+                    pass
+                continue
+            worker = booting[fd]
+            if os.read(fd, 1):
+                worker.ready = True
+            else:
+                worker.failed = True  # خرج العامل قبل أن يصبح جاهزاً
+            os.close(fd)
+            worker.ready_fd = None
+
+    def wait_ready(self, worker: _WorkerProcess, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not (worker.ready or worker.failed or self._stopping):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.sleep(min(remaining, 1.0))
+        return worker.ready
+
+    def reap(self) -> None:
+        """جمع العمال الذين خرجوا وجدولة بديل لكل من خرج دون أن يُطلب منه"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            retired = pid in self._retiring
+            worker = self._retiring.pop(pid, None) or self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            if worker.ready_fd is not None:
+                os.close(worker.ready_fd)
+                worker.ready_fd = None
+            self._cleanup(pid)
+            if retired or self._stopping:
+                continue
+            code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            logger.warning("worker %d (pid %d) exited with code %d, restarting", worker.index, pid, code)
+            # العامل الذي ينهار أثناء الإقلاع سينهار غالباً مرة أخرى، فلا يُعاد فوراً
+            self._pending[worker.index] = time.monotonic() + (0.0 if worker.ready else 1.0)
+
+    def _cleanup(self, pid: int) -> None:
+        """حذف ملف حالة العامل المنتهي ودمج مقاييسه"""
+        try:
+            os.remove(status_path(self.status_dir, pid))
+        except FileNotFoundError:
+            pass
+        if self.metrics_dir:
+            try:
+                retire_process(self.metrics_dir, pid)
+            except OSError:
+                logger.exception("could not merge metrics of worker pid %d", pid)
+
+    def spawn_pending(self) -> None:
+        now = time.monotonic()
+        for index, when in list(self._pending.items()):
+            if when <= now:
+                del self._pending[index]
+                self.spawn(index)
+
+    def check_timeouts(self) -> None:
+        """إيقاف العامل العالق: إقلاع أطول من boot_timeout أو نبضة أقدم من timeout"""
+        now = time.time()
+        for worker in list(self.workers.values()):
+            if not worker.ready:
+                if not worker.failed and time.monotonic() - worker.started > self.boot_timeout:
+                    logger.error("worker %d (pid %d) did not boot in %ss", worker.index, worker.pid,
+                                 self.boot_timeout)
+                    self.kill(worker.pid, signal.SIGKILL)
+                continue
+            try:
+                age = now - os.path.getmtime(status_path(self.status_dir, worker.pid))
+            except OSError:
+                continue
+            if age > self.timeout:
+                logger.error("worker %d (pid %d) missed heartbeats for %.0fs", worker.index, worker.pid, age)
+                self.kill(worker.pid, signal.SIGKILL)
+
+    def rolling_reload(self) -> None:
+        """استبدال العمال واحداً تلو الآخر؛ يتوقف إذا لم يصبح العامل الجديد جاهزاً"""
+        logger.info("rolling reload of %d workers", len(self.workers))
+        for pid, old in list(self.workers.items()):
+            if pid not in self.workers:
+                continue  # خرج أثناء إعادة التشغيل وعُوِّض
+            new = self.spawn(old.index)
+            if not self.wait_ready(new, self.boot_timeout):
+                if self._stopping:
+                    return
+                logger.error("replacement worker %d failed to start, keeping the running workers", new.pid)
+                self.retire(new, signal.SIGKILL)
+                return
+            self.retire(old, signal.SIGTERM)
+        logger.info("rolling reload finished")
+
+    def retire(self, worker: _WorkerProcess, signum: int) -> None:
+        self.workers.pop(worker.pid, None)
+        self._retiring[worker.pid] = worker
+        self.kill(worker.pid, signum)
+
+    def kill(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def stop(self) -> None:
+        """إيقاف كل العمال بهدوء، ثم بالقوة بعد graceful_timeout"""
+        self._stopping = True
+        for worker in list(self.workers.values()):
+            self.retire(worker, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._retiring and time.monotonic() < deadline:
+            self.sleep(0.2)
+            self.reap()
+        for pid in list(self._retiring):
+            self.kill(pid, signal.SIGKILL)
+        for pid in list(self._retiring):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self._retiring.pop(pid, None)
+            self._cleanup(pid)
+        if self.listener is not None:
+            self.listener.close()
+        logger.info("all workers stopped")
@@ -0,0 +1,63 @@
+"""
+ردود JSON مُجهَّزة مسبقاً مع ETag
+Pre-serialized JSON responses with strong ETags for ANDO.5 AI
+
+تُحوَّل البيانات الثابتة إلى bytes (ونسخة gzip اختيارية) مرة واحدة، ويحصل الطلب
+المشروط الذي يطابق ETag على 304 دون أي تحويل.
+"""
+
+import gzip
+import hashlib
+from typing import Dict, Optional
+
+from flask import Response, request
+
+from codec import dumps_bytes
+
+# لا فائدة من ضغط الردود الصغيرة جداً
+GZIP_MIN_SIZE = 256
+
+
+class PreparedResponse:
+    """رد JSON ثابت بصيغة bytes مع ETag"""
+
+    __slots__ = ("body", "gzip_body", "etag", "status", "cache_control")
+
+    def __init__(self, data: Dict, status: int = 200, cache_control: str = "no-cache"):
+        self.body = dumps_bytes(data)
+        self.gzip_body = gzip.compress(self.body, mtime=0) if len(self.body) >= GZIP_MIN_SIZE else None
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.status = status
+        self.cache_control = cache_control
+
+    @classmethod
+    def from_parts(cls, body: bytes, gzip_body: Optional[bytes], etag: str,
+                   status: int = 200, cache_control: str = "no-cache") -> "PreparedResponse":
+        """رد من أجزاء محسوبة مسبقاً (من لقطة مُجمَّعة) دون تحويل أو ضغط"""
+        self = cls.__new__(cls)
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = etag
+        self.status = status
+        self.cache_control = cache_control
+        return self
+
+    def to_response(self) -> Response:
+        """الرد المناسب لترويسات الطلب الحالي (304 أو gzip أو النص الكامل)"""
+        use_gzip = self.gzip_body is not None and "gzip" in request.headers.get("Accept-Encoding", "")
+        # لكل تمثيل ETag مختلف كما يشترط ETag القوي
+        etag = self.etag + "-gz" if use_gzip else self.etag
+
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(self.gzip_body if use_gzip else self.body,
+                                status=self.status, mimetype="application/json")
+            if use_gzip:
+                response.headers["Content-Encoding"] = "gzip"
+
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = self.cache_control
+        if self.gzip_body is not None:
+            response.vary.add("Accept-Encoding")
+        return response
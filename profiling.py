@@ -0,0 +1,259 @@
+"""
+تحليل أداء الطلبات عند الطلب وعينات المكدس الخلفية
+On-demand request profiling and background stack sampling for ANDO.5 AI
+
+- RequestProfiler: وسيط WSGI حول تطبيق Flask. الطلب الذي يحمل الرمز الإداري في
+  ترويسة X-Profile (أو ?profile=) يُحلَّل كاملاً، من توجيه Flask حتى آخر بايت في
+  الرد، بـ cProfile أو بأخذ عينات من مكدس خيطه، ويعود ملخص التحليل بدلاً من الرد.
+  لا يُركَّب الوسيط أصلاً بدون رمز، فلا كلفة على الطلبات العادية.
+- StackSampler: خيط يأخذ عينات منخفضة المعدل من مكدسات كل الخيوط ويكتبها دورياً
+  بصيغة المكدسات المطوية (collapsed stacks) التي يقرؤها flamegraph.pl و speedscope.
+"""
+
+import atexit
+import cProfile
+import glob
+import hmac
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+def frame_label(code) -> str:
+    """اسم إطار في المكدس المطوي (بدون ';' لأنه فاصل الإطارات)"""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def collapse(frame, root: Optional[str] = None) -> str:
+    """مكدس الإطار من الخارج إلى الداخل: a;b;c"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    if root is not None:
+        labels.append(root)
+    return ";".join(reversed(labels))
+
+
+def summarize_stacks(stacks: Counter, top: int) -> List[Dict]:
+    """أكثر الدوال ظهوراً في العينات: شاملة (في أي مكان بالمكدس) وذاتية (في القمة)"""
+    inclusive: Counter = Counter()
+    own: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for label in set(frames):
+            inclusive[label] += count
+    total = sum(stacks.values()) or 1
+    return [{"function": label,
+             "samples": count,
+             "self_samples": own[label],
+             "percent": round(100 * count / total, 1)}
+            for label, count in inclusive.most_common(top)]
+
+
+class _ThreadSampler:
+    """أخذ عينات من مكدس خيط واحد أثناء طلب"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+
+class RequestProfiler:
+    """وسيط WSGI يحلل الطلبات التي تحمل الرمز الإداري ويعيد ملخصاً JSON"""
+
+    def __init__(self, wsgi_app: Callable, token: str, top: int = 25, sample_interval: float = 0.001):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.top = top
+        self.sample_interval = sample_interval
+        # cProfile واحد فقط في كل مرة؛ الطلبات المتزامنة الأخرى تُحلَّل بالعينات
+        self._cprofile_lock = threading.Lock()
+
+    def requested_mode(self, environ: Dict) -> Optional[str]:
+        """وضع التحليل المطلوب، أو None إذا لم يُطلب أو كان الرمز خاطئاً"""
+        token = environ.get("HTTP_X_PROFILE")
+        mode = environ.get("HTTP_X_PROFILE_MODE")
+        if token is None:
+            if "profile=" not in environ.get("QUERY_STRING", ""):
+                return None
+            query = parse_qs(environ["QUERY_STRING"])
+            token = (query.get("profile") or [""])[0]
+            mode = mode or (query.get("profile_mode") or [None])[0]
+        if not hmac.compare_digest(token.encode(), self.token.encode()):
+            return None
+        return mode if mode in PROFILE_MODES else "cprofile"
+
+    def __call__(self, environ: Dict, start_response: Callable) -> Iterable[bytes]:
+        mode = self.requested_mode(environ)
+        if mode is None:
+            return self.wsgi_app(environ, start_response)
+        return self.profile(environ, mode)(environ, start_response)
+
+    def profile(self, environ: Dict, mode: str) -> Callable:
+        """تشغيل الطلب كاملاً تحت المحلل وإعادة تطبيق WSGI صغير يرسل الملخص"""
+        captured: Dict = {}
+
+        def capture_response(status, headers, exc_info=None):
+            captured["status"] = status
+            captured["headers"] = headers
+            return lambda data: None
+
+        profiler = None
+        sampler = None
+        if mode == "cprofile" and self._cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+        else:
+            mode = "sample"
+            sampler = _ThreadSampler(threading.get_ident(), self.sample_interval)
+
+        started_wall = time.perf_counter()
+        started_cpu = time.thread_time()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            else:
+                sampler.start()
+            result = self.wsgi_app(environ, capture_response)
+            try:
+                # استهلاك الرد كاملاً حتى يشمل التحليل البث والترميز
+                body = b"".join(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._cprofile_lock.release()
+            else:
+                sampler.stop()
+        wall_ms = (time.perf_counter() - started_wall) * 1000
+
+        summary = {
+            "mode": mode,
+            "wall_ms": round(wall_ms, 3),
+            "cpu_ms": round((time.thread_time() - started_cpu) * 1000, 3),
+        }
+        if profiler is not None:
+            summary["functions"] = self._cprofile_summary(profiler)
+        else:
+            summary["samples"] = sum(sampler.stacks.values())
+            summary["functions"] = summarize_stacks(sampler.stacks, self.top)
+
+        content_type = dict((k.lower(), v) for k, v in captured.get("headers", ())).get("content-type", "")
+        try:
+            original = json.loads(body) if content_type.startswith("application/json") else body.decode("utf-8")
+        except ValueError:
+            original = body.decode("utf-8", "replace")
+        payload = json.dumps({
+            "status": "success",
+            "profile": summary,
+            "response": {"status": captured.get("status"), "content_type": content_type, "body": original},
+        }, ensure_ascii=False).encode("utf-8")
+
+        def send_summary(environ, start_response):
+            start_response("200 OK", [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(payload))),
+                ("Cache-Control", "no-store"),
+                ("Server-Timing", f"app;dur={wall_ms:.3f}"),
+            ])
+            return [payload]
+
+        return send_summary
+
+    def _cprofile_summary(self, profiler: cProfile.Profile) -> List[Dict]:
+        """أعلى الدوال حسب الزمن التراكمي"""
+        stats = pstats.Stats(profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        return [{
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "self_ms": round(self_time * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        } for (filename, line, name), (_, calls, self_time, cumulative, _) in rows]
+
+
+class StackSampler:
+    """عينات خلفية منخفضة المعدل من كل الخيوط إلى ملفات مكدسات مطوية"""
+
+    def __init__(self, directory: str, interval: float = 0.05, window: float = 60.0, keep: int = 60):
+        self.directory = directory
+        self.interval = interval
+        self.window = window
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        self._start()
+        # الخيط لا ينتقل مع fork، فكل عامل متفرع يأخذ عيناته في ملفاته الخاصة
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._start)
+        atexit.register(self.write)
+
+    def _start(self) -> None:
+        self.stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        next_write = time.monotonic() + self.window
+        while True:
+            time.sleep(self.interval)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            samples = [collapse(frame, names.get(ident, str(ident)).replace(";", ","))
+                       for ident, frame in sys._current_frames().items() if ident != own]
+            with self._lock:
+                self.stacks.update(samples)
+            if time.monotonic() >= next_write:
+                next_write += self.window
+                self.write()
+
+    def write(self) -> Optional[str]:
+        """كتابة النافذة الحالية في ملف جديد وبدء نافذة فارغة؛ تعيد المسار"""
+        with self._lock:
+            stacks, self.stacks = self.stacks, Counter()
+        if not stacks:
+            return None
+        pid = os.getpid()
+        path = os.path.join(self.directory, f"stacks-{pid}-{int(time.time())}.folded")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+
+        # حذف أقدم ملفات هذه العملية فوق keep
+        files = sorted(glob.glob(os.path.join(self.directory, f"stacks-{pid}-*.folded")),
+                       key=os.path.getmtime)
+        for old in files[:-self.keep]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return path
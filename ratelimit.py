@@ -0,0 +1,126 @@
+"""
+تحديد معدل الطلبات والتحكم في القبول
+Rate limiting and admission control for ANDO.5 AI
+
+دلو رموز (Token Bucket) لكل عميل بتكلفة O(1) لكل طلب. التخزين إما في الذاكرة
+(عملية واحدة) أو في SQLite مشترك حتى تبقى العدادات صحيحة بين عدة عمليات.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class MemoryBuckets:
+    """دلاء في ذاكرة العملية، موزعة على أجزاء بأقفال مستقلة"""
+
+    def __init__(self, capacity: float, rate: float, max_keys: int = 100000, shards: int = 16):
+        self.capacity = capacity
+        self.rate = rate
+        self._max_keys = max(1, max_keys // shards)
+        self._shards = [(OrderedDict(), threading.Lock()) for _ in range(shards)]
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        """أخذ رمز واحد؛ تعيد (مسموح، ثواني الانتظار)"""
+        buckets, lock = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, last = buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            buckets[key] = (tokens, now)
+            buckets.move_to_end(key)
+            # العملاء الأقدم خمولاً لديهم دلاء ممتلئة غالباً، فحذفهم آمن
+            while len(buckets) > self._max_keys:
+                buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+class SQLiteBuckets:
+    """دلاء في ملف SQLite مشترك بين عمليات الخادم"""
+
+    def __init__(self, capacity: float, rate: float, path: str):
+        self.capacity = capacity
+        self.rate = rate
+        self.path = path
+        # الدلو الخامل أطول من زمن الامتلاء الكامل ممتلئ، فحذفه لا يغير النتيجة
+        self.idle_after = capacity / rate
+        self._next_prune = 0.0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets "
+                         "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (updated)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        """أخذ رمز واحد داخل معاملة حصرية قصيرة"""
+        conn = self._connect()
+        # الوقت الحقيقي وليس monotonic لأنه مشترك بين العمليات
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, last = row if row else (self.capacity, now)
+            tokens = min(self.capacity, tokens + max(0.0, now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                         (key, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if now >= self._next_prune:
+            # مرة كل فترة امتلاء لكل عملية، وإلا يبقى صف لكل عنوان مر بالخادم
+            self._next_prune = now + self.idle_after
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.idle_after,))
+        return allowed, 0.0 if allowed else (1 - tokens) / self.rate
+
+
+class RateLimiter:
+    """تحديد عدد طلبات كل عميل خلال فترة زمنية"""
+
+    def __init__(self, limit: int, period: float, storage: str = "memory"):
+        self.limit = limit
+        self.period = period
+        rate = limit / period
+        if storage == "memory":
+            self.buckets = MemoryBuckets(limit, rate)
+        else:
+            self.buckets = SQLiteBuckets(limit, rate, storage)
+
+    def check(self, key: str) -> Tuple[bool, int]:
+        """(مسموح، قيمة Retry-After بالثواني الصحيحة)"""
+        allowed, wait = self.buckets.acquire(key)
+        return allowed, 0 if allowed else max(1, math.ceil(wait))
+
+
+class ConcurrencyLimiter:
+    """حد أقصى للطلبات المتزامنة يرفض الزائد فوراً بدلاً من وضعه في طابور"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def try_acquire(self) -> bool:
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._semaphore.release()
@@ -0,0 +1,175 @@
+"""
+ترتيب اللغات حسب أهداف المستخدم
+Scored top-k recommendation engine for ANDO.5 AI
+
+كل لقطة من قاعدة المعارف تُحوَّل إلى مصفوفة خصائص: عمود لكل كلمة في الاستخدامات
+(يُخزَّن كمواقع اللغات التي تحتويها لأن المصفوفة متناثرة)، وعمود كثيف للشهرة
+والسهولة. أهداف المستخدم (الاستخدامات المطلوبة وأقصى صعوبة مقبولة) تصبح متجه أوزان
+على هذه الأعمدة، والدرجة جمع متجه يتبعه اختيار أفضل k بـ argpartition. مع القواعد
+الصغيرة أو بدون NumPy يُحسب نفس المجموع بحلقة بايثون وكومة.
+"""
+
+import heapq
+import math
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog import index_key, popularity_level
+from search import terms
+
+try:
+    import numpy as np
+except ImportError:  # NumPy اختياري: يُستخدم مسار الكومة وحده بدونه
+    np = None
+
+DIFFICULTY_LEVELS = {index_key(name): level for name, level in {
+    "سهلة": 1, "easy": 1, "متوسطة": 2, "medium": 2, "صعبة": 3, "hard": 3,
+}.items()}
+MAX_DIFFICULTY = 3
+MAX_POPULARITY = 5
+
+# وزن كل خاصية: تطابق الاستخدامات هو الأساس، والشهرة والسهولة للمفاضلة بين المتقاربين
+WEIGHTS = {"uses": 1.0, "popularity": 0.3, "ease": 0.2}
+
+# تحت هذا العدد من اللغات تكون حلقة بايثون أسرع من تجهيز مصفوفات NumPy
+NUMPY_MIN_ENTRIES = 256
+
+
+def difficulty_level(value) -> Optional[int]:
+    """مستوى الصعوبة 1-3 من "سهلة" أو "hard"؛ None إذا لم يُعرف"""
+    if isinstance(value, str):
+        return DIFFICULTY_LEVELS.get(index_key(value))
+    return None
+
+
+class Recommender:
+    """مصفوفة خصائص اللغات وترتيبها حسب متجه أهداف المستخدم"""
+
+    def __init__(self, knowledge_base: Dict[str, Dict]):
+        self.names: List[str] = sorted(knowledge_base)
+        self._info = [knowledge_base[name] for name in self.names]
+
+        columns: Dict[str, List[int]] = {}
+        self._use_terms: List[List[Tuple[str, frozenset]]] = []
+        self._levels: List[Optional[int]] = []
+        base: List[float] = []
+        # الاستخدامات تتكرر كثيراً بين اللغات ("تطوير الويب")، فتُجرَّد كلماتها مرة واحدة
+        use_terms: Dict[str, frozenset] = {}
+        for position, info in enumerate(self._info):
+            uses = []
+            for use in info.get("uses") or ():
+                if isinstance(use, str):
+                    words = use_terms.get(use)
+                    if words is None:
+                        words = use_terms[use] = frozenset(terms(use))
+                    uses.append((use, words))
+            self._use_terms.append(uses)
+            for term in frozenset().union(*(words for _, words in uses)):
+                columns.setdefault(term, []).append(position)
+
+            level = difficulty_level(info.get("difficulty"))
+            self._levels.append(level)
+            popularity = min(MAX_POPULARITY, popularity_level(info.get("popularity")))
+            ease = 0.5 if level is None else (MAX_DIFFICULTY - level) / (MAX_DIFFICULTY - 1)
+            base.append(WEIGHTS["popularity"] * popularity / MAX_POPULARITY + WEIGHTS["ease"] * ease)
+
+        # الكلمات النادرة في الاستخدامات تميّز الهدف أكثر ("الويب" مقابل "تطوير")
+        count = len(self.names)
+        self._idf = {term: math.log(1 + (count + 1) / (len(positions) + 1))
+                     for term, positions in columns.items()}
+        self._missing_idf = math.log(2 + count)
+        self._columns = columns
+        self._base = base
+
+        self._vectorized = np is not None and count >= NUMPY_MIN_ENTRIES
+        if self._vectorized:
+            self._column_arrays = {term: np.array(positions, dtype=np.int64)
+                                   for term, positions in columns.items()}
+            levels = np.array([0 if level is None else level for level in self._levels])
+            # الدرجة الأساسية لكل حد صعوبة؛ اللغات الأصعب منه -inf فلا تُختار
+            self._base_arrays = {tolerance: np.where(levels <= tolerance, np.array(base), -np.inf)
+                                 for tolerance in range(1, MAX_DIFFICULTY + 1)}
+            self._allowed = {tolerance: int(np.count_nonzero(levels <= tolerance))
+                             for tolerance in range(1, MAX_DIFFICULTY + 1)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def goal_vector(self, uses: Iterable[str]) -> Tuple[Dict[str, float], frozenset]:
+        """أوزان أعمدة الاستخدامات لأهداف المستخدم وكل كلماتها
+
+        كل هدف يساهم بحد أقصى WEIGHTS["uses"] / عدد الأهداف، موزعاً على كلماته حسب
+        ندرتها؛ فاللغة التي تغطي كل الأهداف تأخذ الوزن كاملاً.
+        """
+        goals = [goal for goal in (frozenset(terms(use)) for use in uses) if goal]
+        weights: Dict[str, float] = {}
+        for goal in goals:
+            total = sum(self._idf.get(term, self._missing_idf) for term in goal)
+            for term in goal:
+                if term in self._idf:
+                    share = WEIGHTS["uses"] * self._idf[term] / total / len(goals)
+                    weights[term] = weights.get(term, 0.0) + share
+        return weights, frozenset().union(*goals)
+
+    def rank(self, weights: Dict[str, float], max_difficulty: Optional[int] = None,
+             k: int = 3) -> List[Tuple[int, float]]:
+        """أفضل k (موقع، درجة) لمتجه الأهداف بين اللغات التي لا تتجاوز max_difficulty"""
+        tolerance = max_difficulty or MAX_DIFFICULTY
+        if k <= 0:
+            return []
+        if self._vectorized:
+            return self._rank_numpy(weights, tolerance, k)
+
+        use_scores: Dict[int, float] = {}
+        get = use_scores.get
+        for term, weight in weights.items():
+            for position in self._columns[term]:
+                use_scores[position] = get(position, 0.0) + weight
+        base, levels = self._base, self._levels
+        candidates = ((position, base[position] + get(position, 0.0))
+                      for position in range(len(base))
+                      if levels[position] is None or levels[position] <= tolerance)
+        return heapq.nlargest(k, candidates, key=itemgetter(1))
+
+    def _rank_numpy(self, weights: Dict[str, float], tolerance: int, k: int) -> List[Tuple[int, float]]:
+        k = min(k, self._allowed[tolerance])
+        if k <= 0:
+            return []
+        scores = self._base_arrays[tolerance].copy()
+        for term, weight in weights.items():
+            # كل لغة مرة واحدة في عمود الكلمة، فالإضافة بالفهرسة آمنة
+            scores[self._column_arrays[term]] += weight
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(position, float(scores[position])) for position in top.tolist()]
+
+    def recommend(self, uses: Iterable[str] = (), max_difficulty: Optional[int] = None,
+                  k: int = 3) -> List[Dict]:
+        """أفضل k لغة مع الدرجة والاستخدامات المطابقة لأهداف المستخدم"""
+        weights, goal_terms = self.goal_vector(uses)
+        matches = []
+        for position, score in self.rank(weights, max_difficulty, k):
+            info = self._info[position]
+            matches.append({
+                "name": self.names[position],
+                "score": round(score, 4),
+                "difficulty": info.get("difficulty"),
+                "popularity": info.get("popularity"),
+                "matched_uses": [use for use, words in self._use_terms[position] if words & goal_terms],
+            })
+        return matches
+
+
+def render_matches(matches: List[Dict], has_goals: bool) -> str:
+    """نص التوصية لقائمة اللغات المرتبة"""
+    if not matches:
+        return "لم أجد لغات تناسب مستوى الصعوبة المطلوب! جرّب مستوى أعلى."
+    heading = "بناءً على أهدافك، هذه أنسب اللغات لك:" if has_goals else "لم تختر لغة محددة، هذه أنسب اللغات للبدء:"
+    lines = [heading]
+    for number, match in enumerate(matches, 1):
+        details = "، ".join(str(value) for value in (match["difficulty"], match["popularity"]) if value)
+        line = f"{number}. {match['name']}" + (f" ({details})" if details else "")
+        if match["matched_uses"]:
+            line += f": {', '.join(match['matched_uses'])}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,234 @@
+"""
+البحث النصي في محتوى قاعدة المعارف
+BM25 full-text search over the knowledge base for ANDO.5 AI
+
+فهرس مقلوب (كلمة ← اللغات وتكرار الكلمة فيها) فوق الوصف والاستخدامات وأسماء
+الموارد، مع ترتيب BM25. الكلمات تُطبَّع بـ textnorm وتُجرَّد من السوابق العربية
+(fuzzy.stem) حتى تطابق "البيانات" كلمة "بيانات". أفضل k نتيجة تُختار بكومة
+(heapq.nlargest) دون ترتيب كل النتائج؛ ومع NumPy والاستعلامات التي تمس قوائم طويلة
+تُجمع الدرجات في مصفوفة ويُختار الأفضل بـ argpartition.
+
+التحديث تدريجي: sync يقارن القاعدة الجديدة بالمفهرسة ويعيد فهرسة المدخلات المتغيرة
+فقط، في نسخة جديدة من حالة الفهرس (قوائم الكلمات غير المتغيرة مشتركة بين النسختين)
+تُنشر بإسناد مرجع واحد كما يبدّل KnowledgeStore لقطاته؛ فالبحث يعمل بدون قفل على
+الحالة التي قرأها ولا يرى تحديثاً نصف مكتمل.
+"""
+
+import heapq
+import math
+import threading
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+from fuzzy import stem
+from textnorm import normalize
+
+try:
+    import numpy as np
+except ImportError:  # NumPy اختياري: يُستخدم مسار الكومة وحده بدونه
+    np = None
+
+# معاملات BM25 المعتادة
+K1 = 1.2
+B = 0.75
+
+# وزن كل حقل كتكرار للكلمة: الاستخدامات أدق في وصف اللغة من الوصف العام
+FIELD_WEIGHTS = {"description": 1.0, "uses": 2.0, "resources": 1.0}
+
+# تحت هذا العدد من المدخلات التي يمسها الاستعلام تكون حلقة بايثون أسرع من NumPy
+NUMPY_MIN_POSTINGS = 1000
+
+
+def terms(text: str) -> List[str]:
+    """كلمات البحث من نص"""
+    return [stem(token) for token in normalize(text).split()]
+
+
+def document_terms(info: Dict) -> Counter:
+    """تكرار الكلمات الموزون لمدخل واحد من قاعدة المعارف"""
+    counts: Counter = Counter()
+    fields = {
+        "description": [info.get("description")],
+        "uses": info.get("uses") or [],
+        "resources": [r.get("name") for r in info.get("resources") or [] if isinstance(r, dict)],
+    }
+    for field, texts in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for text in texts:
+            if isinstance(text, str):
+                for term in terms(text):
+                    counts[term] += weight
+    return counts
+
+
+class _IndexState:
+    """حالة الفهرس؛ لا تتغير بعد نشرها إلا بإضافة مساهمات محسوبة إلى الذاكرة المؤقتة"""
+
+    __slots__ = ("docs", "postings", "total_length", "impacts",
+                 "slots", "slot_names", "free_slots", "arrays")
+
+    def __init__(self, previous: Optional["_IndexState"] = None):
+        # نسخ سطحية: قوائم الكلمات نفسها مشتركة وتُستبدل عند التعديل (copy-on-write)
+        # اللغة ← (المدخل، طول المستند)
+        self.docs: Dict[str, Tuple[Dict, float]] = dict(previous.docs) if previous else {}
+        # الكلمة ← {اللغة: التكرار}
+        self.postings: Dict[str, Dict[str, float]] = dict(previous.postings) if previous else {}
+        self.total_length = previous.total_length if previous else 0.0
+        # مساهمة كل كلمة جاهزة لكل لغة؛ تبدأ فارغة في كل حالة لأن idf ومتوسط الطول يتغيران
+        self.impacts: Dict[str, Dict[str, float]] = {}
+        # للمسار المتجه: رقم ثابت لكل لغة (يُعاد استخدام أرقام المحذوفة) ونفس المساهمات كمصفوفات
+        self.slots: Dict[str, int] = dict(previous.slots) if previous else {}
+        self.slot_names: List[Optional[str]] = list(previous.slot_names) if previous else []
+        self.free_slots: List[int] = list(previous.free_slots) if previous else []
+        self.arrays: Dict[str, Tuple] = {}
+
+    def add(self, name: str, info: Dict, copy: bool) -> None:
+        counts = document_terms(info)
+        length = sum(counts.values())
+        for term, tf in counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                self.postings[term] = {name: tf}
+            elif copy:
+                self.postings[term] = {**postings, name: tf}
+            else:
+                postings[name] = tf
+        self.docs[name] = (info, length)
+        self.total_length += length
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_names[slot] = name
+        else:
+            slot = len(self.slot_names)
+            self.slot_names.append(name)
+        self.slots[name] = slot
+
+    def remove(self, name: str, copy: bool) -> None:
+        info, length = self.docs.pop(name)
+        for term in document_terms(info):
+            postings = self.postings.get(term)
+            if postings is None or name not in postings:
+                continue
+            if len(postings) == 1:
+                del self.postings[term]
+            elif copy:
+                self.postings[term] = {doc: tf for doc, tf in postings.items() if doc != name}
+            else:
+                del postings[name]
+        self.total_length -= length
+        slot = self.slots.pop(name)
+        self.slot_names[slot] = None
+        self.free_slots.append(slot)
+
+
+class SearchIndex:
+    """فهرس BM25 يُحدَّث تدريجياً"""
+
+    def __init__(self, k1: float = K1, b: float = B):
+        self.k1 = k1
+        self.b = b
+        self._state = _IndexState()
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state.docs)
+
+    def sync(self, knowledge_base: Dict[str, Dict]) -> Tuple[int, int]:
+        """مطابقة الفهرس مع القاعدة؛ تعيد (المُضاف أو المُحدَّث، المحذوف)"""
+        with self._write_lock:
+            current = self._state
+            removed = [name for name in current.docs if name not in knowledge_base]
+            changed = [name for name, info in knowledge_base.items()
+                       if name not in current.docs or current.docs[name][0] != info]
+            if not removed and not changed:
+                return 0, 0
+            # البناء الأول يعدّل قوائم جديدة لم تُنشر بعد، فلا حاجة لنسخها
+            copy = bool(current.docs)
+            state = _IndexState(current if copy else None)
+            for name in removed:
+                state.remove(name, copy)
+            for name in changed:
+                if name in state.docs:
+                    state.remove(name, copy)
+                state.add(name, knowledge_base[name], copy)
+            self._state = state
+        return len(changed), len(removed)
+
+    def _impact(self, state: _IndexState, term: str) -> Dict[str, float]:
+        """مساهمة الكلمة في درجة كل لغة تحتويها (idf × وزن التكرار)"""
+        impacts = state.impacts
+        cached = impacts.get(term)
+        if cached is not None:
+            return cached
+        postings = state.postings.get(term)
+        if not postings:
+            return {}
+        count = len(state.docs) or 1
+        average = state.total_length / count or 1.0
+        idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+        k1, b, docs = self.k1, self.b, state.docs
+        cached = {}
+        for name, tf in postings.items():
+            doc = docs.get(name)
+            if doc is not None:
+                cached[name] = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc[1] / average))
+        impacts[term] = cached
+        return cached
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """أفضل k لغة لنص البحث مع درجة BM25"""
+        # كل البحث على حالة واحدة حتى لو نشر sync حالة أحدث أثناءه
+        state = self._state
+        words = [term for term in set(terms(query)) if self._impact(state, term)]
+        if not words or k <= 0:
+            return []
+        lists = sorted((self._impact(state, term) for term in words), key=len, reverse=True)
+        if np is not None and sum(map(len, lists)) >= NUMPY_MIN_POSTINGS:
+            return self._search_numpy(state, words, k)
+
+        # أطول قائمة تُنسخ كما هي (في C) وتُضاف إليها البقية
+        scores = dict(lists[0])
+        get = scores.get
+        for impacts in lists[1:]:
+            for name, impact in impacts.items():
+                scores[name] = get(name, 0.0) + impact
+        return heapq.nlargest(k, scores.items(), key=itemgetter(1))
+
+    def _term_arrays(self, state: _IndexState, term: str) -> Tuple:
+        """(أرقام اللغات، المساهمات) للكلمة كمصفوفات NumPy"""
+        arrays = state.arrays
+        cached = arrays.get(term)
+        if cached is None:
+            impacts = self._impact(state, term)
+            slots = state.slots
+            cached = arrays[term] = (
+                np.fromiter((slots[name] for name in impacts), dtype=np.int64, count=len(impacts)),
+                np.fromiter(impacts.values(), dtype=np.float64, count=len(impacts)))
+        return cached
+
+    def _search_numpy(self, state: _IndexState, words: List[str], k: int) -> List[Tuple[str, float]]:
+        """نفس الدرجات بجمع متجه في مصفوفة كثيفة، ثم اختيار أفضل k بـ argpartition"""
+        names = state.slot_names
+        scores = np.zeros(len(names))
+        for term in words:
+            slots, impacts = self._term_arrays(state, term)
+            # كل لغة مرة واحدة في قائمة الكلمة، فالإضافة بالفهرسة آمنة
+            scores[slots] += impacts
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(names[slot], float(scores[slot])) for slot in candidates.tolist()
+                if names[slot] is not None]
+
+    def warm(self) -> int:
+        """حساب مساهمات كل الكلمات مسبقاً حتى لا يدفع أول استعلام كلفتها؛ يعيد عددها"""
+        state = self._state
+        for term in list(state.postings):
+            self._impact(state, term)
+        return len(state.impacts)
+
+    def stats(self) -> Dict:
+        state = self._state
+        return {"documents": len(state.docs), "terms": len(state.postings)}
@@ -0,0 +1,222 @@
+"""
+تفضيلات المستخدم وسياق كل جلسة
+Session-scoped user preference store for ANDO.5 AI
+
+لكل جلسة سجل مضغوط (__slots__) فيه الاسم وآخر لغة ونية. تنتهي السجلات بعد ttl
+ثانية من آخر تحديث، وتُخرج الأقل استخداماً عند تجاوز ميزانية الذاكرة. يمكن حفظ
+السجلات دورياً في ملف واستعادتها عند إعادة التشغيل: كل عملية تكتب ملفها الخاص
+(path.<pid>) حتى لا يستبدل عامل جلسات العمال الآخرين، والاستعادة تدمج كل الملفات.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# تقدير تكلفة مدخل OrderedDict ومفتاحه فوق أحجام الحقول
+ENTRY_OVERHEAD = 120
+
+
+def snapshot_files(path: str) -> List[Tuple[str, Optional[int]]]:
+    """(الملف، رقم العملية) لكل ملفات الحفظ: path نفسه (بدون رقم) و path.<pid>"""
+    files: List[Tuple[str, Optional[int]]] = [(path, None)] if os.path.exists(path) else []
+    prefix = f"{path}."
+    for name in glob.glob(glob.escape(prefix) + "*"):
+        suffix = name[len(prefix):]
+        if suffix.isdigit():
+            files.append((name, int(suffix)))
+    return files
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SessionState:
+    """تفضيلات جلسة واحدة وسياقها الأخير"""
+
+    __slots__ = ("name", "language", "last_intent", "expires")
+
+    FIELDS = ("name", "language", "last_intent")
+
+    def __init__(self, name: Optional[str] = None, language: Optional[str] = None,
+                 last_intent: Optional[str] = None, expires: float = 0.0):
+        self.name = name
+        self.language = language
+        self.last_intent = last_intent
+        # وقت حقيقي وليس monotonic حتى يبقى صالحاً بعد الاستعادة من الملف
+        self.expires = expires
+
+    def size(self, session_id: str) -> int:
+        """حجم تقريبي بالبايت للسجل ومفتاحه"""
+        return (ENTRY_OVERHEAD + sys.getsizeof(self) + sys.getsizeof(session_id)
+                + sum(sys.getsizeof(getattr(self, f)) for f in self.FIELDS
+                      if getattr(self, f) is not None))
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class _SessionShard:
+    """جزء من الجلسات بقفل وحجم خاص به"""
+
+    __slots__ = ("data", "bytes", "evictions", "lock")
+
+    def __init__(self):
+        self.data: "OrderedDict[str, tuple]" = OrderedDict()  # الجلسة ← (السجل، الحجم)
+        self.bytes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """سجلات الجلسات مع TTL وإخراج LRU ضمن ميزانية ذاكرة بالبايت"""
+
+    def __init__(self, max_bytes: int, ttl: float, shards: int = 8):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._shard_bytes = max(1, max_bytes // shards)
+        self._shards = [_SessionShard() for _ in range(shards)]
+        self._snapshotter: Optional[threading.Thread] = None
+
+    def _shard(self, session_id: str) -> _SessionShard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        """سجل الجلسة إن وُجد ولم تنته صلاحيته"""
+        shard = self._shard(session_id)
+        with shard.lock:
+            entry = shard.data.get(session_id)
+            if entry is None:
+                return None
+            if entry[0].expires <= time.time():
+                del shard.data[session_id]
+                shard.bytes -= entry[1]
+                return None
+            shard.data.move_to_end(session_id)
+            return entry[0]
+
+    def update(self, session_id: str, **fields) -> SessionState:
+        """تحديث الحقول المعطاة (غير None) وتجديد الصلاحية"""
+        shard = self._shard(session_id)
+        now = time.time()
+        with shard.lock:
+            entry = shard.data.get(session_id)
+            if entry is None or entry[0].expires <= now:
+                state, old_size = SessionState(), entry[1] if entry else 0
+            else:
+                state, old_size = entry
+            for field, value in fields.items():
+                if value is not None:
+                    setattr(state, field, value)
+            state.expires = now + self.ttl
+            self._put(shard, session_id, state, old_size)
+        return state
+
+    def _put(self, shard: _SessionShard, session_id: str, state: SessionState, old_size: int) -> None:
+        size = state.size(session_id)
+        shard.data[session_id] = (state, size)
+        shard.data.move_to_end(session_id)
+        shard.bytes += size - old_size
+        # إخراج الأقل استخداماً حتى العودة تحت حصة الجزء
+        while shard.bytes > self._shard_bytes and len(shard.data) > 1:
+            _, (_, evicted) = shard.data.popitem(last=False)
+            shard.bytes -= evicted
+            shard.evictions += 1
+
+    def __len__(self) -> int:
+        return sum(len(shard.data) for shard in self._shards)
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self),
+            "bytes": sum(shard.bytes for shard in self._shards),
+            "max_bytes": self.max_bytes,
+            "evictions": sum(shard.evictions for shard in self._shards),
+        }
+
+    def save(self, path: str) -> int:
+        """حفظ الجلسات السارية في ملف هذه العملية path.<pid> (استبدال ذري)؛ تعيد عددها"""
+        now = time.time()
+        rows = []
+        for shard in self._shards:
+            with shard.lock:
+                rows.extend([session_id, state.name, state.language, state.last_intent, state.expires]
+                            for session_id, (state, _) in shard.data.items() if state.expires > now)
+        target = f"{path}.{os.getpid()}"
+        # الخيط الدوري و atexit قد يكتبان في نفس اللحظة
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": 1, "sessions": rows}, fh, ensure_ascii=False)
+        os.replace(tmp, target)
+        # ملفات العمليات المنتهية استُعيدت عند البدء وصارت جلساتها في ملفات العمليات الحية
+        for other, pid in snapshot_files(path):
+            if pid is None or (pid != os.getpid() and not _alive(pid)):
+                try:
+                    os.remove(other)
+                except OSError:
+                    pass
+        return len(rows)
+
+    def load(self, path: str) -> int:
+        """استعادة الجلسات السارية من ملفات save لكل العمليات؛ تعيد عددها
+
+        الجلسة الموجودة في أكثر من ملف تؤخذ من آخر تحديث لها (أبعد انتهاء).
+        """
+        now = time.time()
+        loaded = 0
+        for source, _ in snapshot_files(path):
+            try:
+                with open(source, encoding="utf-8") as fh:
+                    rows = json.load(fh).get("sessions", [])
+            except (OSError, ValueError) as e:
+                logger.warning("session snapshot %s not loaded: %s", source, e)
+                continue
+            for session_id, name, language, last_intent, expires in rows:
+                if expires <= now:
+                    continue
+                shard = self._shard(session_id)
+                with shard.lock:
+                    old = shard.data.get(session_id)
+                    if old is not None and old[0].expires >= expires:
+                        continue
+                    self._put(shard, session_id, SessionState(name, language, last_intent, expires),
+                              old[1] if old else 0)
+                loaded += old is None
+        return loaded
+
+    def start_snapshotting(self, path: str, interval: float) -> None:
+        """حفظ دوري في خيط خلفي وعند الخروج، بعد استعادة الملف الموجود"""
+        if self._snapshotter is not None:
+            return
+        loaded = self.load(path)
+        logger.info("restored %d sessions from %s", loaded, path)
+
+        def save():
+            try:
+                self.save(path)
+            except OSError as e:
+                logger.warning("session snapshot failed: %s", e)
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                save()
+
+        self._snapshotter = threading.Thread(target=loop, name="session-snapshot", daemon=True)
+        self._snapshotter.start()
+        atexit.register(save)
@@ -7,6 +7,7 @@ import requests
 import json
 
 BASE_URL = 'http://localhost:5000/api'
+HEADERS = {'X-Session-Id': 'test-api'}
 
 def test_health():
     """اختبار صحة الخادم"""
@@ -38,7 +39,8 @@ def test_chat():
         try:
             response = requests.post(
                 f'{BASE_URL}/chat',
-                json={'message': message}
+                json={'message': message},
+                headers=HEADERS
             )
             data = response.json()
             print(f"💬 الرد: {data.get('message')}")
@@ -47,6 +49,32 @@ def test_chat():
         except Exception as e:
             print(f"❌ خطأ: {e}")
 
+def test_chat_batch():
+    """اختبار دفعة المحادثات"""
+    print("\n" + "=" * 50)
+    print("✅ اختبار: دفعة المحادثات (Chat Batch)")
+    print("=" * 50)
+    
+    messages = [
+        "السلام عليكم",
+        "ما هي Python؟",
+        "ايهما أفضل JavaScript أم Python؟"
+    ]
+    
+    try:
+        response = requests.post(
+            f'{BASE_URL}/chat/batch',
+            json={'messages': messages},
+            headers=HEADERS
+        )
+        data = response.json()
+        for message, reply in zip(messages, data.get('responses', [])):
+            print(f"\n📝 الرسالة: {message}")
+            print(f"🎯 النية: {reply.get('intent')}")
+            print(f"📊 الثقة: {reply.get('confidence', 0):.2%}")
+    except Exception as e:
+        print(f"❌ خطأ: {e}")
+
 def test_language_info():
     """اختبار معلومات اللغة"""
     print("\n" + "=" * 50)
@@ -123,7 +151,7 @@ def test_history():
     print("✅ اختبار: سجل المحادثات (History)")
     print("=" * 50)
     try:
-        response = requests.get(f'{BASE_URL}/history')
+        response = requests.get(f'{BASE_URL}/history', headers=HEADERS)
         data = response.json()
         history = data.get('history', [])
         print(f"\n📜 آخر {len(history)} رسالة:")
@@ -144,6 +172,7 @@ def run_all_tests():
     try:
         test_health()
         test_chat()
+        test_chat_batch()
         test_language_info()
         test_suggestions()
         test_recommendations()
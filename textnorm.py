@@ -0,0 +1,71 @@
+"""
+تطبيع النصوص العربية والإنجليزية وتقطيعها
+Text normalization and tokenization for ANDO.5 AI
+
+جداول str.translate محسوبة مرة واحدة تُصغّر الحروف وتحذف الرموز وتوحّد أشكال
+الحروف العربية (الألف والهمزات والتاء المربوطة والألف المقصورة) وتحذف التشكيل
+والتطويل في مرور واحد. كلمات الأنماط تُطبَّع مرة واحدة وتُخزَّن مع interning.
+"""
+
+import sys
+from functools import lru_cache
+from typing import FrozenSet
+
+# str.translate يترك الحروف بعد نهاية الجدول كما هي. جدول التطبيع يغطي المستويين
+# الأول والثاني (فيهما الرموز التعبيرية) وما بعدهما حروف CJK تُبقى أصلاً؛ جدول fold
+# يكفيه نطاق الحروف العربية.
+NORMALIZE_LIMIT = 0x20000
+FOLD_LIMIT = 0x0700
+
+ARABIC_FOLD = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي",
+    "ـ": None,  # التطويل
+    **{chr(c): None for c in range(0x064B, 0x0653)},  # التشكيل
+    "ٰ": None,  # الألف الخنجرية
+}
+
+
+def _is_kept(char: str) -> bool:
+    # مطابق لـ [\w\s] في re
+    return char.isalnum() or char == "_" or char.isspace()
+
+
+def _build_table(limit: int, drop_punct: bool) -> list:
+    """جدول قائمة مفهرس برقم الحرف (أسرع من القاموس في str.translate)"""
+    table = []
+    for code in range(limit):
+        char = chr(code)
+        if char in ARABIC_FOLD:
+            mapped = ARABIC_FOLD[char]
+            table.append(ord(mapped) if mapped else None)
+        elif drop_punct and not _is_kept(char):
+            table.append(None)
+        else:
+            table.append(code)
+    return table
+
+
+_NORMALIZE_TABLE = _build_table(NORMALIZE_LIMIT, drop_punct=True)
+_FOLD_TABLE = _build_table(FOLD_LIMIT, drop_punct=False)
+
+
+def normalize(text: str) -> str:
+    """تصغير وتوحيد الحروف العربية وحذف الرموز (بديل clean_text)"""
+    return text.strip().lower().translate(_NORMALIZE_TABLE)
+
+
+def fold(text: str) -> str:
+    """تصغير وتوحيد الحروف العربية مع إبقاء الرموز (c++ مثلاً)"""
+    return text.lower().translate(_FOLD_TABLE)
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """مجموعة كلمات النص بعد التطبيع"""
+    return frozenset(normalize(text).split())
+
+
+@lru_cache(maxsize=65536)
+def tokenize_pattern(pattern: str) -> FrozenSet[str]:
+    """مثل tokenize لكن مخزنة ومع interning لأن الأنماط تتكرر مع كل طلب"""
+    return frozenset(sys.intern(token) for token in normalize(pattern).split())